@@ -600,6 +600,230 @@ BEGIN
 END;
 GO
 
+-- Thêm mới hoặc cập nhật một điểm đã mã hóa phía client
+CREATE PROCEDURE SP_UPSERT_ENCRYPTED_BANGDIEM
+    @MASV VARCHAR(20),
+    @MAHP VARCHAR(20),
+    @DIEMTHI_ENCRYPTED VARBINARY(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    UPDATE BANGDIEM WITH (UPDLOCK, SERIALIZABLE)
+    SET DIEMTHI = @DIEMTHI_ENCRYPTED
+    WHERE MASV = @MASV AND MAHP = @MAHP;
+
+    IF @@ROWCOUNT = 0
+        INSERT INTO BANGDIEM (MASV, MAHP, DIEMTHI)
+        VALUES (@MASV, @MAHP, @DIEMTHI_ENCRYPTED);
+END;
+GO
+
+-- Bảng kiểu dùng để truyền nhiều điểm đã mã hóa trong một lần gọi
+CREATE TYPE BANGDIEM_ENCRYPTED_TVP AS TABLE (
+    MASV VARCHAR(20) NOT NULL,
+    MAHP VARCHAR(20) NOT NULL,
+    DIEMTHI_ENCRYPTED VARBINARY(MAX),
+    PRIMARY KEY (MASV, MAHP)
+);
+GO
+
+-- Thêm mới hoặc cập nhật cả lô điểm đã mã hóa phía client
+CREATE PROCEDURE SP_UPSERT_ENCRYPTED_BANGDIEM_TVP
+    @BANGDIEM BANGDIEM_ENCRYPTED_TVP READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Changes TABLE (ACTION NVARCHAR(10));
+
+    MERGE BANGDIEM WITH (HOLDLOCK) AS T
+    USING @BANGDIEM AS S
+        ON T.MASV = S.MASV AND T.MAHP = S.MAHP
+    WHEN MATCHED THEN
+        UPDATE SET DIEMTHI = S.DIEMTHI_ENCRYPTED
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT (MASV, MAHP, DIEMTHI)
+        VALUES (S.MASV, S.MAHP, S.DIEMTHI_ENCRYPTED)
+    OUTPUT $action INTO @Changes;
+
+    SELECT
+        ISNULL(SUM(CASE WHEN ACTION = 'INSERT' THEN 1 ELSE 0 END), 0) AS INSERTED,
+        ISNULL(SUM(CASE WHEN ACTION = 'UPDATE' THEN 1 ELSE 0 END), 0) AS UPDATED
+    FROM @Changes;
+END;
+GO
+
+-- Khóa dữ liệu AES của từng lớp, được bọc bằng public key của nhân viên quản lý
+CREATE TABLE KHOALOP (
+    MALOP VARCHAR(20),
+    MANV VARCHAR(20),
+    KHOA VARBINARY(MAX) NOT NULL,  -- RSA-OAEP wrapped AES-256 data key
+    PHIENBAN INT NOT NULL DEFAULT 1,
+    PRIMARY KEY (MALOP, MANV),
+    FOREIGN KEY (MALOP) REFERENCES LOP(MALOP) ON DELETE CASCADE,
+    FOREIGN KEY (MANV) REFERENCES NHANVIEN(MANV) ON DELETE CASCADE
+);
+GO
+
+CREATE PROCEDURE SP_SEL_KHOALOP
+    @MALOP VARCHAR(20),
+    @MANV VARCHAR(20)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT MALOP, MANV, KHOA, PHIENBAN
+    FROM KHOALOP
+    WHERE MALOP = @MALOP AND MANV = @MANV;
+END;
+GO
+
+CREATE PROCEDURE SP_INS_KHOALOP
+    @MALOP VARCHAR(20),
+    @MANV VARCHAR(20),
+    @KHOA VARBINARY(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Giữ khóa đã có để không làm mất khả năng giải mã điểm cũ
+    IF NOT EXISTS (SELECT 1 FROM KHOALOP WHERE MALOP = @MALOP AND MANV = @MANV)
+        INSERT INTO KHOALOP (MALOP, MANV, KHOA)
+        VALUES (@MALOP, @MANV, @KHOA);
+END;
+GO
+
+-- ==============================
+-- Phân trang theo khóa (keyset) cho danh sách lớp lớn
+-- ==============================
+
+-- Cho phép tìm sinh viên của một lớp theo thứ tự MASV mà không cần sắp xếp lại
+CREATE INDEX IX_SINHVIEN_MALOP_MASV ON SINHVIEN (MALOP, MASV)
+    INCLUDE (HOTEN, NGAYSINH, DIACHI, TENDN);
+GO
+
+-- Lấy một trang sinh viên của lớp, bắt đầu sau @SAU_MASV (NULL = trang đầu)
+CREATE PROCEDURE SP_SEL_SINHVIEN_BY_MALOP_PAGE
+    @MALOP VARCHAR(20),
+    @SAU_MASV VARCHAR(20) = NULL,
+    @SOLUONG INT = 200
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT TOP (@SOLUONG) MASV, HOTEN, NGAYSINH, DIACHI, MALOP, TENDN
+    FROM SINHVIEN
+    WHERE MALOP = @MALOP
+      AND (@SAU_MASV IS NULL OR MASV > @SAU_MASV)
+    ORDER BY MASV
+    OPTION (RECOMPILE);
+END;
+GO
+
+-- Lấy một trang bảng điểm của lớp, bắt đầu sau cặp (@SAU_MASV, @SAU_MAHP)
+CREATE PROCEDURE SP_SEL_BANGDIEM_BY_MALOP_PAGE
+    @MALOP VARCHAR(20),
+    @SAU_MASV VARCHAR(20) = NULL,
+    @SAU_MAHP VARCHAR(20) = NULL,
+    @SOLUONG INT = 200
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT TOP (@SOLUONG) BD.MASV, S.HOTEN AS TENSV, BD.MAHP, HP.TENHP, BD.DIEMTHI
+    FROM BANGDIEM BD
+    JOIN SINHVIEN S ON BD.MASV = S.MASV
+    JOIN HOCPHAN HP ON BD.MAHP = HP.MAHP
+    WHERE S.MALOP = @MALOP
+      AND (@SAU_MASV IS NULL
+           OR BD.MASV > @SAU_MASV
+           OR (BD.MASV = @SAU_MASV AND BD.MAHP > @SAU_MAHP))
+    ORDER BY BD.MASV, BD.MAHP
+    OPTION (RECOMPILE);
+END;
+GO
+
+-- ==============================
+-- Kiểm tra dữ liệu lớp trong một lần gọi
+-- ==============================
+
+-- Trả về mọi kết quả kiểm tra qua tham số OUTPUT.
+-- Mã trả về: 0 = hợp lệ để thêm, 1 = nhân viên không tồn tại,
+-- 2 = lớp đã tồn tại, 3 = lớp đã do nhân viên này quản lý
+CREATE PROCEDURE SP_VALIDATE_LOP_INSERT
+    @MALOP VARCHAR(20),
+    @MANV VARCHAR(20),
+    @NHANVIEN_TONTAI BIT OUTPUT,
+    @LOP_TONTAI BIT OUTPUT,
+    @DA_QUAN_LY BIT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SET @NHANVIEN_TONTAI = CASE WHEN EXISTS (SELECT 1 FROM NHANVIEN WHERE MANV = @MANV) THEN 1 ELSE 0 END;
+    SET @LOP_TONTAI = CASE WHEN EXISTS (SELECT 1 FROM LOP WHERE MALOP = @MALOP) THEN 1 ELSE 0 END;
+    SET @DA_QUAN_LY = CASE WHEN EXISTS (SELECT 1 FROM LOP WHERE MALOP = @MALOP AND MANV = @MANV) THEN 1 ELSE 0 END;
+
+    IF @NHANVIEN_TONTAI = 0 RETURN 1;
+    IF @LOP_TONTAI = 1 RETURN 2;
+    IF @DA_QUAN_LY = 1 RETURN 3;
+    RETURN 0;
+END;
+GO
+
+-- ==============================
+-- Đăng nhập nhân viên trong một lần gọi
+-- ==============================
+
+-- Chấp nhận cả hai kiểu băm mật khẩu:
+--   @MK_HASH: SHA1 của chuỗi UTF-8 do client tính (nhân viên tạo từ ứng dụng)
+--   HASHBYTES('SHA1', @MK): SHA1 của NVARCHAR do server tính (SP_INS_PUBLIC_NHANVIEN)
+-- Trả về một dòng gồm mọi thông tin phiên làm việc cần:
+--   KIEU_KHOA = 'SERVER' (có asymmetric key tên MANV trong DB) hoặc 'CLIENT' (khóa RSA lưu ở client)
+--   LUONGCB chỉ được giải mã sẵn với khóa SERVER
+--   Không dựa vào PUBKEY: SP_INS_PUBLIC_NHANVIEN cũng ghi PUBKEY (bằng MANV)
+--   DS_LOP là danh sách MALOP nhân viên quản lý, ngăn cách bởi dấu phẩy
+CREATE PROCEDURE SP_LOGIN_NHANVIEN
+    @TENDN NVARCHAR(100),
+    @MK NVARCHAR(100),
+    @MK_HASH VARBINARY(20) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @EmpManv VARCHAR(20);
+
+    SELECT @EmpManv = MANV
+    FROM NHANVIEN
+    WHERE TENDN = @TENDN
+      AND (MATKHAU = @MK_HASH OR MATKHAU = HASHBYTES('SHA1', @MK));
+
+    IF @EmpManv IS NULL
+        RETURN 1;
+
+    SELECT
+        NV.MANV,
+        NV.HOTEN,
+        NV.EMAIL,
+        NV.LUONG,
+        NV.PUBKEY,
+        CASE WHEN ASYMKEY_ID(NV.MANV) IS NOT NULL THEN 'SERVER' ELSE 'CLIENT' END AS KIEU_KHOA,
+        CASE WHEN ASYMKEY_ID(NV.MANV) IS NOT NULL THEN
+            TRY_CAST(CAST(DECRYPTBYASYMKEY(ASYMKEY_ID(NV.MANV), NV.LUONG, @MK) AS VARCHAR(20)) AS INT)
+        END AS LUONGCB,
+        STUFF((SELECT ',' + L.MALOP
+               FROM LOP L
+               WHERE L.MANV = NV.MANV
+               ORDER BY L.MALOP
+               FOR XML PATH('')), 1, 1, '') AS DS_LOP
+    FROM NHANVIEN NV
+    WHERE NV.MANV = @EmpManv;
+
+    RETURN 0;
+END;
+GO
+
 -- ==============================
 -- Test data    
 -- ==============================   
@@ -614,6 +838,15 @@ EXEC SP_INS_PUBLIC_NHANVIEN 'NV001', 'NGUYEN VAN A',
 -- Test authentication
 EXEC SP_SEL_PUBLIC_NHANVIEN 'NVA', 'abcd12'
 
+-- Kiểm tra: NV001 dùng khóa SERVER nên đăng nhập phải trả về lương đã giải mã
+DECLARE @DANGNHAP TABLE (
+    MANV VARCHAR(20), HOTEN NVARCHAR(100), EMAIL VARCHAR(20), LUONG VARBINARY(MAX),
+    PUBKEY VARCHAR(MAX), KIEU_KHOA VARCHAR(10), LUONGCB INT, DS_LOP NVARCHAR(MAX));
+INSERT INTO @DANGNHAP EXEC SP_LOGIN_NHANVIEN 'NVA', 'abcd12';
+IF NOT EXISTS (SELECT 1 FROM @DANGNHAP
+               WHERE MANV = 'NV001' AND KIEU_KHOA = 'SERVER' AND LUONGCB = 3000000)
+    RAISERROR (N'SP_LOGIN_NHANVIEN: NV001 phải có KIEU_KHOA = SERVER và LUONGCB = 3000000', 16, 1);
+
 -- Initialize remaining test data
 EXEC SP_INS_LOP 'L001', N'Công nghệ thông tin K42', 'NV001';
 EXEC SP_INS_LOP 'L002', N'Khoa học máy tính K42', 'NV001';
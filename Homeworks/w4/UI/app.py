@@ -1,16 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
+import importlib
 import logging
-from ttkthemes import ThemedTk
+import sys
 
-from db_connector import DatabaseConnector
-from session import EmployeeSession
+from session import EmployeeSession, stop_key_factory
 from login_screen import LoginScreen
-from class_management import ClassManagementScreen
-from student_management import StudentManagementScreen
-from grade_management import GradeManagementScreen
-from employee_management import EmployeeManagementScreen
 from ui_components import MessageDisplay
+from task_runner import TaskExecutor
+from instrumentation import get_metrics, dump_interval_from_env
 
 # Configure logging
 logging.basicConfig(
@@ -19,24 +17,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger('app')
 
+# Screen modules are imported the first time their screen is opened
+SCREENS = {
+    'class': ('class_management', 'ClassManagementScreen'),
+    'student': ('student_management', 'StudentManagementScreen'),
+    'grade': ('grade_management', 'GradeManagementScreen'),
+    'employee': ('employee_management', 'EmployeeManagementScreen'),
+}
+
 
 class Application:
     """Main application class that integrates all modules."""
 
-    def __init__(self):
-        """Initialize the application."""
-        # Create themed Tk root
-        self.root = ThemedTk(theme="arc")  # Use 'arc' theme for modern look
+    def __init__(self, fast_start: bool = False):
+        """
+        Initialize the application.
+
+        Args:
+            fast_start: Show the login screen first, then load the theme,
+                        pyodbc and check the connection while the user types
+        """
+        self.fast_start = fast_start
+
+        if fast_start:
+            # Plain Tk paints immediately; the theme is applied after the first frame
+            self.root = tk.Tk()
+        else:
+            from ttkthemes import ThemedTk
+            self.root = ThemedTk(theme="arc")  # Use 'arc' theme for modern look
         self.root.title("Quản Lý Sinh Viên")
         self.root.geometry("1024x768")
         self.root.minsize(800, 600)
 
-        # Database connector
-        self.db = DatabaseConnector()
+        # Database connector, created on first use (importing it loads pyodbc)
+        self._db = None
 
         # Session manager
         self.session = EmployeeSession()
 
+        # Background worker for DB and crypto work started by the screens
+        self.tasks = TaskExecutor()
+        self.tasks.attach(self.root)
+        self.tasks.add_busy_listener(self._on_tasks_busy)
+
+        # Hot-path timings: F12 logs them, QLSV_METRICS_DUMP_INTERVAL logs them periodically
+        self.root.bind('<F12>', lambda event: get_metrics().dump())
+        get_metrics().start_periodic_dump(dump_interval_from_env())
+
         # Set up main container frame
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -55,6 +82,7 @@ class Application:
 
         # Create status bar
         self.status_var = tk.StringVar()
+        self._status_message = ""  # Restored when background tasks finish
         self.status_bar = ttk.Label(
             self.root, textvariable=self.status_var,
             relief=tk.SUNKEN, anchor=tk.W
@@ -118,32 +146,30 @@ class Application:
         # Create screens (but don't show them yet)
         self.screens = {}
 
+    @property
+    def db(self):
+        """Database connector, imported and created on first use."""
+        if self._db is None:
+            from db_connector import DatabaseConnector
+            self._db = DatabaseConnector()
+        return self._db
+
     def _create_screen(self, name):
         """Create a screen if it doesn't exist."""
         if name in self.screens and self.screens[name] is not None:
             return
+        if name not in SCREENS:
+            return
+
+        # Import the screen's module on first use
+        module_name, class_name = SCREENS[name]
+        screen_class = getattr(importlib.import_module(module_name), class_name)
 
         # Create the requested screen
-        if name == 'class':
-            screen = ClassManagementScreen(self.content_frame)
-            self.screens[name] = screen
-            screen.pack(fill=tk.BOTH, expand=True)
-            screen.pack_forget()  # Initially hidden
-        elif name == 'student':
-            screen = StudentManagementScreen(self.content_frame)
-            self.screens[name] = screen
-            screen.pack(fill=tk.BOTH, expand=True)
-            screen.pack_forget()  # Initially hidden
-        elif name == 'grade':
-            screen = GradeManagementScreen(self.content_frame)
-            self.screens[name] = screen
-            screen.pack(fill=tk.BOTH, expand=True)
-            screen.pack_forget()  # Initially hidden
-        elif name == 'employee':
-            screen = EmployeeManagementScreen(self.content_frame)
-            self.screens[name] = screen
-            screen.pack(fill=tk.BOTH, expand=True)
-            screen.pack_forget()  # Initially hidden
+        screen = screen_class(self.content_frame)
+        self.screens[name] = screen
+        screen.pack(fill=tk.BOTH, expand=True)
+        screen.pack_forget()  # Initially hidden
 
     def _show_screen(self, name):
         """Show a specific screen and hide others."""
@@ -167,7 +193,25 @@ class Application:
                 'grade': 'Quản lý điểm số',
                 'employee': 'Quản lý nhân viên'
             }
-            self.status_var.set(status_messages.get(name, ''))
+            self._set_status(status_messages.get(name, ''))
+
+    def _set_status(self, message: str):
+        """Set the status bar text shown when no background task is running."""
+        self._status_message = message
+        if not self.tasks.busy_count:
+            self.status_var.set(message)
+
+    def _on_tasks_busy(self, count: int, description: str):
+        """Show background task progress in the status bar."""
+        if count:
+            text = description or "Đang xử lý..."
+            if count > 1:
+                text = f"{text} ({count} tác vụ)"
+            self.status_var.set(text)
+            self.root.configure(cursor='watch')
+        else:
+            self.status_var.set(self._status_message)
+            self.root.configure(cursor='')
 
     def _on_login_success(self):
         """Handle successful login."""
@@ -198,6 +242,9 @@ class Application:
         """Log out the current user."""
         # Ask for confirmation
         if MessageDisplay.ask_yes_no("Xác nhận", "Bạn có chắc muốn đăng xuất?"):
+            # Drop results of loads started by the old session
+            self.tasks.cancel_all()
+
             # Reset session
             self.session.logout()
 
@@ -217,9 +264,39 @@ class Application:
             # Show login screen
             self._show_login_screen()
 
+    def _finish_startup(self):
+        """Fast start: theme and connection check once the login screen is visible."""
+        try:
+            from ttkthemes import ThemedStyle
+            ThemedStyle(self.root).set_theme("arc")
+        except Exception as e:
+            logger.error(f"Could not apply theme: {str(e)}")
+
+        # Importing db_connector (pyodbc) and connecting run in the background
+        self.tasks.submit(lambda: self.db.connect(),
+                          on_success=self._on_connection_checked,
+                          on_error=lambda e: self._on_connection_checked(False),
+                          key='startup-connect',
+                          description="Đang kết nối cơ sở dữ liệu...")
+
+    def _on_connection_checked(self, connected: bool):
+        """Close the application if the deferred connection check failed."""
+        if not connected:
+            MessageDisplay.show_error(
+                "Lỗi Kết Nối",
+                "Không thể kết nối đến cơ sở dữ liệu. Vui lòng kiểm tra cài đặt và thử lại."
+            )
+            self.root.destroy()
+
     def run(self):
         """Run the application."""
         try:
+            if self.fast_start:
+                # Let the login screen paint before loading anything heavy
+                self.root.after(50, self._finish_startup)
+                self.root.mainloop()
+                return True
+
             # Test database connection
             if not self.db.connect():
                 MessageDisplay.show_error(
@@ -237,11 +314,21 @@ class Application:
             MessageDisplay.show_error("Lỗi Ứng Dụng", str(e))
             return False
         finally:
-            # Ensure database connection is closed
-            if self.db:
-                self.db.disconnect()
+            self.tasks.shutdown()
+            stop_key_factory()
+
+            metrics = get_metrics()
+            metrics.stop_periodic_dump()
+            metrics.dump()
+
+            # Ensure database connections are closed; the pools are shared
+            # by every screen's connector, so close them all here
+            if self._db:
+                self._db.disconnect()
+            from connection_pool import close_all_pools
+            close_all_pools()
 
 
 if __name__ == "__main__":
-    app = Application()
+    app = Application(fast_start='--fast-start' in sys.argv[1:])
     app.run()
@@ -0,0 +1,369 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import logging
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+"""
+Offline Benchmark Suite
+
+Runs DatabaseConnector, CryptoManager and EmployeeSession against
+fake_pyodbc (SQLite emulating the QLSVNhom procedures), so throughput and
+latency can be tracked on any machine without SQL Server.
+
+The dataset is sized by its number of grades. Students take --courses
+courses each, classes hold --class-size students and every employee
+manages --classes-per-employee classes. Grades are encrypted with the
+benchmark employee's real RSA key; to keep seeding fast at a million rows,
+each grade value reuses one of a few ciphertexts.
+
+Operations measured (--runs times each):
+- login            login_employee (SP_LOGIN_NHANVIEN) + EmployeeSession.login
+                   with a cold private key cache
+- classes          get_classes and get_classes_by_employee, bypassing the cache
+- grade_page       one SP_SEL_BANGDIEM_BY_MALOP_PAGE page
+- grade_listing    every page of the employee's classes
+- bulk_insert      add_grades_bulk of --bulk new grades
+- bulk_decrypt     EmployeeSession.decrypt_grades of --decrypt RSA grades,
+                   and of the same number of envelope (AES-GCM) grades
+
+Usage:
+------
+cd Homeworks/w4/UI
+python benchmarks/bench_offline.py --grades 10k --runs 5
+python benchmarks/bench_offline.py --grades 1M --bulk 50k --json results.json
+"""
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+logging.disable(logging.INFO)
+
+import fake_pyodbc  # noqa: E402
+
+fake_pyodbc.install()
+
+from crypto_utils import CryptoManager  # noqa: E402
+from db_connector import DatabaseConnector  # noqa: E402
+from instrumentation import Metrics, get_metrics  # noqa: E402
+from connection_pool import close_all_pools  # noqa: E402
+from session import EmployeeSession  # noqa: E402
+
+EMPLOYEE_ID = 'NV0000'
+USERNAME = 'bench'
+PASSWORD = 'bench-password'
+SALARY = 15000000
+
+# Distinct ciphertexts kept per grade value when seeding
+CIPHERTEXT_VARIANTS = 4
+GRADE_VALUES = [step / 2 for step in range(21)]  # 0.0, 0.5, ..., 10.0
+
+
+def parse_size(text: str) -> int:
+    """Parse 1000, 10k or 1M."""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def realistic_grade(rng: random.Random) -> float:
+    """A grade on the 0-10 scale in steps of 0.5, roughly normal around 6.5."""
+    return min(10.0, max(0.0, round(rng.gauss(6.5, 1.8) * 2) / 2))
+
+
+class Dataset:
+    """Sizes and IDs of the seeded data."""
+
+    def __init__(self, grades: int, courses: int, class_size: int, classes_per_employee: int):
+        self.courses = max(1, courses)
+        self.students = max(1, math.ceil(grades / self.courses))
+        self.grades = grades
+        self.class_size = max(1, class_size)
+        self.classes = math.ceil(self.students / self.class_size)
+        self.classes_per_employee = max(1, classes_per_employee)
+        self.employees = math.ceil(self.classes / self.classes_per_employee)
+
+    @staticmethod
+    def student_id(i: int) -> str:
+        return f'SV{i:07d}'
+
+    @staticmethod
+    def class_id(i: int) -> str:
+        return f'L{i:05d}'
+
+    @staticmethod
+    def employee_id(i: int) -> str:
+        return f'NV{i:04d}'
+
+    @staticmethod
+    def course_id(i: int) -> str:
+        return f'HP{i:03d}'
+
+    def managed_classes(self) -> List[str]:
+        """Classes of the benchmark employee (NV0000)."""
+        return [self.class_id(i) for i in range(min(self.classes_per_employee, self.classes))]
+
+    def describe(self) -> str:
+        return (f"{self.grades} grades, {self.students} students, {self.courses} courses, "
+                f"{self.classes} classes, {self.employees} employees")
+
+
+def seed(path: str, dataset: Dataset, crypto: CryptoManager, seed_value: int) -> Dict[float, List[bytes]]:
+    """
+    Create the database and fill it with the dataset.
+
+    Returns:
+        Ciphertexts per grade value, reused for the bulk insert benchmark
+    """
+    import sqlite3
+
+    fake_pyodbc.configure(path)
+    rng = random.Random(seed_value)
+
+    _, public_key_pem = crypto.generate_key_pair(EMPLOYEE_ID, PASSWORD)
+    ciphertexts = {grade: [crypto.encrypt_data(public_key_pem, str(grade))
+                           for _ in range(CIPHERTEXT_VARIANTS)]
+                   for grade in GRADE_VALUES}
+
+    conn = sqlite3.connect(path)
+    try:
+        employees = [(EMPLOYEE_ID, 'Nhân Viên Benchmark', 'bench@', crypto.encrypt_data(
+            public_key_pem, str(SALARY)), USERNAME, CryptoManager.hash_password(PASSWORD), public_key_pem)]
+        employees += [(dataset.employee_id(i), f'Nhân Viên {i}', f'nv{i}@', None, f'nv{i}',
+                       fake_pyodbc.hashbytes_sha1(f'nv{i}'), None)
+                      for i in range(1, dataset.employees)]
+        conn.executemany("INSERT INTO NHANVIEN VALUES (?, ?, ?, ?, ?, ?, ?)", employees)
+
+        conn.executemany("INSERT INTO LOP VALUES (?, ?, ?)", (
+            (dataset.class_id(i), f'Lớp {i}', dataset.employee_id(i // dataset.classes_per_employee))
+            for i in range(dataset.classes)))
+
+        conn.executemany("INSERT INTO HOCPHAN VALUES (?, ?, ?)", (
+            (dataset.course_id(j), f'Học Phần {j}', rng.choice((2, 3, 4)))
+            for j in range(dataset.courses)))
+
+        # Every student shares one password hash; hashing 100k passwords is not what we measure
+        student_password = fake_pyodbc.hashbytes_sha1('sv123456')
+        conn.executemany("INSERT INTO SINHVIEN VALUES (?, ?, ?, ?, ?, ?, ?)", (
+            (dataset.student_id(i), f'Sinh Viên {i}', f'200{i % 5}-0{1 + i % 9}-1{i % 9}',
+             'TP.HCM', dataset.class_id(i // dataset.class_size), f'sv{i}', student_password)
+            for i in range(dataset.students)))
+
+        def grades():
+            for n in range(dataset.grades):
+                grade = realistic_grade(rng)
+                yield (dataset.student_id(n // dataset.courses), dataset.course_id(n % dataset.courses),
+                       ciphertexts[grade][n % CIPHERTEXT_VARIANTS])
+
+        conn.executemany("INSERT INTO BANGDIEM VALUES (?, ?, ?)", grades())
+        conn.commit()
+    finally:
+        conn.close()
+    return ciphertexts
+
+
+class Runner:
+    """Runs operations and keeps their latencies and row counts."""
+
+    def __init__(self, runs: int):
+        self.runs = runs
+        self.metrics = Metrics()
+        self.rows: Dict[str, int] = {}
+        self.order: List[str] = []
+
+    def measure(self, name: str, operation: Callable[[], Any], rows: Optional[int] = 1,
+                before: Optional[Callable[[], None]] = None) -> None:
+        """
+        Time an operation self.runs times.
+
+        Args:
+            name: Operation name in the report
+            operation: Function to time
+            rows: Items one run processes; None if the operation returns the count
+            before: Untimed setup run before every repetition
+        """
+        if name not in self.order:
+            self.order.append(name)
+        for _ in range(self.runs):
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            result = operation()
+            self.metrics.record(name, time.perf_counter() - start)
+            self.rows[name] = self.rows.get(name, 0) + (result if rows is None else rows)
+
+    def results(self) -> Dict[str, Dict[str, float]]:
+        snapshot = self.metrics.snapshot()
+        results = {}
+        for name in self.order:
+            stats = snapshot[name]
+            results[name] = {
+                'runs': stats['count'],
+                'rows': self.rows[name],
+                'ops_per_s': stats['count'] / stats['total'] if stats['total'] else 0.0,
+                'rows_per_s': self.rows[name] / stats['total'] if stats['total'] else 0.0,
+                'p50_ms': stats['p50'] * 1000,
+                'p95_ms': stats['p95'] * 1000,
+                'p99_ms': stats['p99'] * 1000,
+            }
+        return results
+
+
+def page_through(db: DatabaseConnector, class_id: str, page_size: int) -> List[Dict]:
+    """Read every grade of a class page by page, as the grade screen does."""
+    rows, token = [], None
+    while True:
+        page = db.get_grades_page_with_client_encryption(class_id, token, page_size)
+        if page is None:
+            raise RuntimeError(f"Grade page query failed for {class_id}")
+        results, token = page
+        rows.extend(results)
+        if token is None:
+            return rows
+
+
+def run(grades: int, courses: int, class_size: int, classes_per_employee: int,
+        runs: int, bulk: int, decrypt: int, page_size: int, database: Optional[str],
+        json_path: Optional[str], show_metrics: bool, seed_value: int) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix='qlsv-bench-')
+    path = os.path.abspath(database) if database else os.path.join(workdir, 'qlsv.sqlite')
+    previous_cwd = os.getcwd()
+    if json_path:
+        json_path = os.path.abspath(json_path)
+    # CryptoManager and EmployeeSession keep private keys under ./keys
+    os.chdir(workdir)
+    try:
+        dataset = Dataset(grades, courses, class_size, classes_per_employee)
+        crypto = CryptoManager()
+        for stale in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+        print(f"Seeding {dataset.describe()}")
+        start = time.perf_counter()
+        ciphertexts = seed(path, dataset, crypto, seed_value)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+
+        get_metrics().reset()
+        db = DatabaseConnector()
+        session = EmployeeSession()
+        runner = Runner(runs)
+        managed = dataset.managed_classes()
+
+        # Login, unlocking the private key from disk every time
+        def login():
+            employee = db.login_employee(USERNAME, PASSWORD)
+            if not employee or not session.login(employee, PASSWORD):
+                raise RuntimeError("Benchmark login failed")
+        runner.measure('login', login, before=lambda: (session.logout(), CryptoManager.forget_private_key()))
+
+        # Class listing
+        runner.measure('classes.all', lambda: db.get_classes(refresh=True), rows=dataset.classes)
+        runner.measure('classes.by_employee',
+                       lambda: db.get_classes_by_employee(EMPLOYEE_ID, refresh=True), rows=len(managed))
+
+        # Grade listing
+        per_class = min(dataset.class_size * dataset.courses, grades)
+        runner.measure('grade_page', lambda: db.get_grades_page_with_client_encryption(
+            managed[0], None, page_size), rows=min(page_size, per_class))
+        listed: List[Dict] = []
+
+        def list_grades():
+            listed.clear()
+            for class_id in managed:
+                listed.extend(page_through(db, class_id, page_size))
+            return len(listed)
+        runner.measure('grade_listing', list_grades, rows=None)
+
+        # Bulk insert into fresh courses, one per run, removed afterwards
+        bulk = min(bulk, dataset.students)
+        rng = random.Random(seed_value + 1)
+        bulk_courses = iter(f'HPB{i:02d}' for i in range(runs))
+        db.execute_query("INSERT INTO HOCPHAN (MAHP, TENHP, SOTC) VALUES "
+                         + ", ".join(f"('HPB{i:02d}', 'Benchmark {i}', 3)" for i in range(runs)))
+
+        def bulk_insert():
+            course = next(bulk_courses)
+            rows = [(dataset.student_id(i), course,
+                     rng.choice(ciphertexts[realistic_grade(rng)])) for i in range(bulk)]
+            result = db.add_grades_bulk(rows)
+            if result['inserted'] != bulk:
+                raise RuntimeError(f"Bulk insert stored {result['inserted']} of {bulk} grades: "
+                                   f"{result['errors'][:3]}")
+        runner.measure('bulk_insert', bulk_insert, rows=bulk)
+        db.execute_query("DELETE FROM HOCPHAN WHERE MAHP LIKE 'HPB%'")
+
+        # Bulk decrypt, RSA per grade and envelope (one AES data key per class)
+        encrypted = [row['ENCRYPTED_DIEMTHI'] for row in listed[:decrypt]]
+        if len(encrypted) < decrypt:
+            encrypted = (encrypted * (decrypt // max(len(encrypted), 1) + 1))[:decrypt]
+        runner.measure('bulk_decrypt.rsa', lambda: session.decrypt_grades(encrypted), rows=len(encrypted))
+
+        data_key = crypto.generate_data_key()
+        rng = random.Random(seed_value + 2)
+        enveloped = [crypto.encrypt_with_data_key(data_key, str(realistic_grade(rng)))
+                     for _ in range(len(encrypted))]
+        runner.measure('bulk_decrypt.envelope',
+                       lambda: session.decrypt_grades(enveloped, data_key), rows=len(enveloped))
+
+        session.logout()
+        results = runner.results()
+        report(dataset, results)
+        if show_metrics:
+            print()
+            print(get_metrics().format_report())
+
+        output = {'dataset': vars(dataset), 'runs': runs, 'page_size': page_size,
+                  'results': results, 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, indent=2)
+        return output
+    finally:
+        close_all_pools()
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def report(dataset: Dataset, results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{dataset.describe()}")
+    print(f"{'operation':<24}{'runs':>6}{'rows/run':>10}{'ops/s':>10}{'rows/s':>12}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results.items():
+        rows_per_run = stats['rows'] / stats['runs'] if stats['runs'] else 0
+        print(f"{name:<24}{stats['runs']:>6}{rows_per_run:>10.0f}{stats['ops_per_s']:>10.1f}"
+              f"{stats['rows_per_s']:>12.0f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the data layer against a SQLite stand-in")
+    parser.add_argument('--grades', type=parse_size, default=parse_size('10k'),
+                        help="Number of grades to seed (e.g. 1k, 100k, 1M)")
+    parser.add_argument('--courses', type=int, default=10, help="Courses per student")
+    parser.add_argument('--class-size', type=int, default=50, help="Students per class")
+    parser.add_argument('--classes-per-employee', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=5, help="Repetitions of each operation")
+    parser.add_argument('--bulk', type=parse_size, default=parse_size('5k'),
+                        help="Grades per bulk insert (at most one per student)")
+    parser.add_argument('--decrypt', type=parse_size, default=500,
+                        help="Grades per bulk decrypt")
+    parser.add_argument('--page-size', type=int, default=200)
+    parser.add_argument('--database', help="SQLite file to (re)create instead of a temporary one")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this file")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Print the hot-path timers collected during the run")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.grades, args.courses, args.class_size, args.classes_per_employee, args.runs,
+        args.bulk, args.decrypt, args.page_size, args.database, args.json_path,
+        args.metrics, args.seed)
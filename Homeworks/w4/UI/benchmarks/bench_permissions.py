@@ -0,0 +1,108 @@
+import os
+import sys
+import logging
+from typing import Dict, List, Optional
+
+"""
+Permission Check Benchmark
+
+Counts the database round trips spent on "may this employee manage class X"
+checks along the navigation paths of the class, student and grade screens,
+with the old per-check stored procedure call and with the session's
+memoized set of managed classes.
+
+The connector below only counts calls; it answers from an in-memory class
+list and goes through the same reference cache as DatabaseConnector, so
+the counts match what the real connector would send to SQL Server.
+
+Usage:
+------
+cd Homeworks/w4/UI
+python benchmarks/bench_permissions.py --classes 20 --visits 5
+"""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.INFO)
+
+from reference_cache import get_reference_cache  # noqa: E402
+from session import EmployeeSession  # noqa: E402
+
+
+class CountingConnector:
+    """Stand-in for DatabaseConnector that counts the queries it would run."""
+
+    def __init__(self, employee_id: str, class_count: int):
+        self.employee_id = employee_id
+        self.classes = [{'MALOP': f'L{i:03d}', 'TENLOP': f'Lớp {i}', 'MANV': employee_id}
+                        for i in range(class_count)]
+        self.queries: Dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        self.queries[name] = self.queries.get(name, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.queries.values())
+
+    def get_classes_by_employee(self, manv: str) -> Optional[List[Dict]]:
+        def load():
+            self._count('SP_SEL_LOP_BY_MANV')
+            return [cls for cls in self.classes if cls['MANV'] == manv]
+        return get_reference_cache().get('classes', ('bench', manv), load)
+
+    def check_employee_manages_class(self, manv: str, malop: str) -> bool:
+        self._count('SP_CHECK_EMPLOYEE_MANAGES_CLASS')
+        return any(cls['MALOP'] == malop and cls['MANV'] == manv for cls in self.classes)
+
+    def add_class(self, malop: str, tenlop: str, manv: str) -> bool:
+        self._count('SP_INS_LOP')
+        self.classes.append({'MALOP': malop, 'TENLOP': tenlop, 'MANV': manv})
+        get_reference_cache().invalidate('classes')
+        return True
+
+
+def navigate(db: CountingConnector, check, visits: int) -> None:
+    """
+    Replay a session: open every class's student list and grade view
+    `visits` times, add a class, then open the new class.
+    """
+    for _ in range(visits):
+        db.get_classes_by_employee(db.employee_id)  # Class list screen
+        for cls in list(db.classes):
+            check(cls['MALOP'])  # StudentListScreen._check_permissions
+            check(cls['MALOP'])  # GradeManagementScreen._on_view_grades_clicked
+    db.add_class('LMOI', 'Lớp mới', db.employee_id)
+    db.get_classes_by_employee(db.employee_id)
+    check('LMOI')
+
+
+def run(class_count: int, visits: int) -> None:
+    session = EmployeeSession()
+    employee_id = 'NV01'
+
+    get_reference_cache().invalidate()
+    old_db = CountingConnector(employee_id, class_count)
+    navigate(old_db, lambda malop: old_db.check_employee_manages_class(employee_id, malop), visits)
+
+    get_reference_cache().invalidate()
+    new_db = CountingConnector(employee_id, class_count)
+    session.login({'MANV': employee_id, 'HOTEN': 'Benchmark'})
+    navigate(new_db, lambda malop: session.can_manage_class(malop, new_db), visits)
+    session.logout()
+
+    print(f"{class_count} classes, {visits} visits per class and screen")
+    print(f"{'query':<36}{'per-check':>12}{'memoized':>12}")
+    for name in sorted(set(old_db.queries) | set(new_db.queries)):
+        print(f"{name:<36}{old_db.queries.get(name, 0):>12}{new_db.queries.get(name, 0):>12}")
+    print(f"{'total':<36}{old_db.total:>12}{new_db.total:>12}")
+    print(f"Saved {old_db.total - new_db.total} of {old_db.total} queries")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Count permission check queries per navigation path")
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--visits', type=int, default=5)
+    args = parser.parse_args()
+    run(args.classes, args.visits)
@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+"""
+Startup Import Benchmark
+
+Measures what the application imports before the login screen can be
+shown, using `python -X importtime`. The "lazy" run imports app.py as it
+is now; the "eager" run additionally imports everything app.py used to
+pull in at startup (every screen, db_connector/pyodbc, crypto_utils/
+cryptography, dateutil and ttkthemes). Modules that are not installed
+(or whose dependencies are not) are left out and listed.
+
+Usage:
+------
+cd Homeworks/w4/UI
+python benchmarks/bench_startup.py --runs 5 --top 10
+"""
+
+UI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imported at module level before screens and backends were deferred
+EAGER_MODULES = [
+    'ttkthemes', 'dateutil.parser', 'pyodbc', 'cryptography',
+    'db_connector', 'crypto_utils', 'class_management',
+    'student_management', 'grade_management', 'employee_management',
+]
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def available(modules: List[str]) -> Tuple[List[str], List[str]]:
+    """Split modules into importable ones and ones missing a dependency."""
+    found, missing = [], []
+    for name in modules:
+        proc = subprocess.run([sys.executable, '-c', f'import {name}'],
+                              cwd=UI_DIR, capture_output=True)
+        (found if proc.returncode == 0 else missing).append(name)
+    return found, missing
+
+
+def measure(modules: List[str]) -> Tuple[int, Dict[str, int]]:
+    """
+    Import modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        Tuple of (total microseconds, cumulative microseconds per top-level module)
+    """
+    code = '; '.join(f'import {name}' for name in modules)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=UI_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    per_module: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Only imports done directly by the -c code; nested ones are indented
+        if match and not match.group(3):
+            per_module[match.group(4)] = int(match.group(2))
+    return sum(per_module.values()), per_module
+
+
+def run(runs: int, top: int) -> None:
+    eager, missing = available(EAGER_MODULES)
+    scenarios = {'lazy': ['app'], 'eager': ['app'] + eager}
+
+    results = {}
+    for name, modules in scenarios.items():
+        totals, last = [], {}
+        for _ in range(runs):
+            total, last = measure(modules)
+            totals.append(total)
+        results[name] = (statistics.median(totals), last)
+
+    if missing:
+        print(f"Not importable here, left out: {', '.join(missing)}")
+    for name, (median, per_module) in results.items():
+        print(f"\n{name}: {median / 1000:.1f} ms median over {runs} runs")
+        slowest = sorted(per_module.items(), key=lambda item: item[1], reverse=True)[:top]
+        for module, micros in slowest:
+            print(f"  {module:<32}{micros / 1000:>8.1f} ms")
+
+    lazy, eager_total = results['lazy'][0], results['eager'][0]
+    print(f"\nDeferred: {(eager_total - lazy) / 1000:.1f} ms "
+          f"({eager_total / 1000:.1f} -> {lazy / 1000:.1f} ms before the login screen)")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure startup imports with -X importtime")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    run(args.runs, args.top)
@@ -0,0 +1,798 @@
+import re
+import sys
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+"""
+Fake pyodbc Module
+
+A pyodbc stand-in backed by SQLite, so DatabaseConnector can run without
+SQL Server or an ODBC driver. It creates the QLSVNhom tables and emulates
+the stored procedures the application calls, in Python over SQLite.
+
+Supported statements:
+- The batches built by db_connector's _SprocPlan (DECLARE / EXEC with named
+  and OUTPUT arguments / SELECT of the output variables), including
+  RETURN codes
+- Positional calls such as "EXEC SP_INS_ENCRYPTED_BANGDIEM ?, ?, ?"
+- The sys.parameters metadata query, SELECT OBJECT_ID(?, 'P') and
+  SELECT XACT_STATE()
+- BEGIN / SAVE / ROLLBACK TRANSACTION, mapped to SQLite savepoints
+- Plain SELECT / INSERT / UPDATE / DELETE that SQLite understands as is
+
+Everything else raises ProgrammingError, the way an unknown statement
+would fail on the server.
+
+Usage Examples:
+--------------
+import fake_pyodbc
+fake_pyodbc.configure('/tmp/qlsv.sqlite')  # Create the schema if needed
+fake_pyodbc.install()                      # Replace pyodbc in sys.modules
+
+from db_connector import DatabaseConnector
+db = DatabaseConnector()
+db.get_classes()
+"""
+
+logger = logging.getLogger('fake_pyodbc')
+
+apilevel = '2.0'
+threadsafety = 1
+paramstyle = 'qmark'
+
+
+class Error(Exception):
+    """Base class of every error, like pyodbc.Error (args: SQLSTATE, message)."""
+
+
+class DatabaseError(Error):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+def Binary(value) -> bytes:
+    """pyodbc.Binary; SQLite stores bytes as BLOB."""
+    return bytes(value)
+
+
+class Row(tuple):
+    """Result row supporting both row[0] and row.COLUMN access."""
+
+    _columns: Dict[str, int] = {}
+    cursor_description: Tuple = ()
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[self._columns[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _row_type(description: Sequence[Tuple]) -> type:
+    """Row subclass that knows the column names of one result set."""
+    return type('Row', (Row,), {
+        '_columns': {column[0]: i for i, column in enumerate(description)},
+        'cursor_description': tuple(description),
+    })
+
+
+# ==============================
+# Schema
+# ==============================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS NHANVIEN (
+    MANV VARCHAR(20) PRIMARY KEY,
+    HOTEN NVARCHAR(100) NOT NULL,
+    EMAIL VARCHAR(20),
+    LUONG BLOB,
+    TENDN NVARCHAR(100) NOT NULL UNIQUE,
+    MATKHAU BLOB NOT NULL,
+    PUBKEY TEXT
+);
+CREATE TABLE IF NOT EXISTS LOP (
+    MALOP VARCHAR(20) PRIMARY KEY,
+    TENLOP NVARCHAR(100) NOT NULL,
+    MANV VARCHAR(20) REFERENCES NHANVIEN(MANV) ON DELETE SET NULL
+);
+CREATE INDEX IF NOT EXISTS IX_LOP_MANV ON LOP (MANV);
+CREATE TABLE IF NOT EXISTS SINHVIEN (
+    MASV VARCHAR(20) PRIMARY KEY,
+    HOTEN NVARCHAR(100) NOT NULL,
+    NGAYSINH DATETIME,
+    DIACHI NVARCHAR(200),
+    MALOP VARCHAR(20) REFERENCES LOP(MALOP) ON DELETE SET NULL,
+    TENDN NVARCHAR(100) NOT NULL UNIQUE,
+    MATKHAU BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS IX_SINHVIEN_MALOP_MASV ON SINHVIEN (MALOP, MASV);
+CREATE TABLE IF NOT EXISTS HOCPHAN (
+    MAHP VARCHAR(20) PRIMARY KEY,
+    TENHP NVARCHAR(100) NOT NULL,
+    SOTC INT
+);
+CREATE TABLE IF NOT EXISTS BANGDIEM (
+    MASV VARCHAR(20) REFERENCES SINHVIEN(MASV) ON DELETE CASCADE,
+    MAHP VARCHAR(20) REFERENCES HOCPHAN(MAHP) ON DELETE CASCADE,
+    DIEMTHI BLOB,
+    PRIMARY KEY (MASV, MAHP)
+);
+CREATE TABLE IF NOT EXISTS KHOALOP (
+    MALOP VARCHAR(20) REFERENCES LOP(MALOP) ON DELETE CASCADE,
+    MANV VARCHAR(20) REFERENCES NHANVIEN(MANV) ON DELETE CASCADE,
+    KHOA BLOB NOT NULL,
+    PHIENBAN INT NOT NULL DEFAULT 1,
+    PRIMARY KEY (MALOP, MANV)
+);
+-- Stands in for sys.asymmetric_keys: the server-side key of an employee,
+-- protected by the HASHBYTES('SHA1') of their password
+CREATE TABLE IF NOT EXISTS ASYMKEY (
+    MANV VARCHAR(20) PRIMARY KEY,
+    MATKHAU BLOB NOT NULL
+);
+"""
+
+
+def hashbytes_sha1(text: Optional[str]) -> Optional[bytes]:
+    """HASHBYTES('SHA1', @nvarchar): SHA1 of the UTF-16LE encoded string."""
+    if text is None:
+        return None
+    return hashlib.sha1(text.encode('utf-16-le')).digest()
+
+
+# ==============================
+# Stored procedures
+# ==============================
+
+class _Param:
+    """One procedure parameter as sys.parameters would describe it."""
+
+    __slots__ = ('name', 'type_name', 'max_length', 'precision', 'scale', 'is_output', 'default')
+
+    _SIZES = {'int': (4, 10), 'bit': (1, 1), 'float': (8, 53), 'datetime': (8, 23)}
+
+    def __init__(self, name: str, type_name: str, length: int = 0,
+                 is_output: bool = False, default: Any = None):
+        self.name = name
+        self.type_name = type_name
+        max_length, precision = self._SIZES.get(type_name, (length, 0))
+        if type_name in ('nvarchar', 'nchar') and length > 0:
+            max_length = length * 2  # Bytes, as in sys.parameters
+        self.max_length = max_length
+        self.precision = precision
+        self.scale = 0
+        self.is_output = is_output
+        self.default = default
+
+
+# Procedure body: (connection, arguments by name) -> (result sets, RETURN code).
+# OUTPUT parameters are returned by assigning them in the arguments dict.
+ResultSet = Tuple[List[Tuple], List[Tuple]]
+ProcedureBody = Callable[[sqlite3.Connection, Dict[str, Any]], Tuple[List[ResultSet], int]]
+
+PROCEDURES: Dict[str, Tuple[List[_Param], ProcedureBody]] = {}
+
+
+def procedure(name: str, *params: _Param):
+    """Register a function as the emulation of a stored procedure."""
+    def decorator(body: ProcedureBody) -> ProcedureBody:
+        PROCEDURES[name.upper()] = (list(params), body)
+        return body
+    return decorator
+
+
+def _select(conn: sqlite3.Connection, sql: str, args: Dict[str, Any]) -> ResultSet:
+    """Run a query with :NAME parameters and return (description, rows)."""
+    cursor = conn.execute(sql, args)
+    return cursor.description, cursor.fetchall()
+
+
+def _exists(conn: sqlite3.Connection, sql: str, args: Dict[str, Any]) -> int:
+    return 1 if conn.execute(sql, args).fetchone() else 0
+
+
+_MALOP = _Param('@MALOP', 'varchar', 20)
+_MANV = _Param('@MANV', 'varchar', 20)
+_MASV = _Param('@MASV', 'varchar', 20)
+_MAHP = _Param('@MAHP', 'varchar', 20)
+_RESULT = _Param('@RESULT', 'bit', is_output=True)
+
+_SEL_LOP = """
+SELECT L.MALOP, L.TENLOP, L.MANV, N.HOTEN AS TENNV
+FROM LOP L
+LEFT JOIN NHANVIEN N ON L.MANV = N.MANV
+"""
+
+
+@procedure('SP_SEL_LOP')
+def _sp_sel_lop(conn, args):
+    return [_select(conn, _SEL_LOP, args)], 0
+
+
+@procedure('SP_SEL_LOP_BY_MANV', _MANV)
+def _sp_sel_lop_by_manv(conn, args):
+    return [_select(conn, _SEL_LOP + "WHERE L.MANV = :MANV", args)], 0
+
+
+@procedure('SP_INS_LOP', _MALOP, _Param('@TENLOP', 'nvarchar', 100), _MANV)
+def _sp_ins_lop(conn, args):
+    conn.execute("INSERT INTO LOP (MALOP, TENLOP, MANV) VALUES (:MALOP, :TENLOP, :MANV)", args)
+    return [], 0
+
+
+@procedure('SP_UPD_LOP', _MALOP, _Param('@TENLOP', 'nvarchar', 100), _MANV)
+def _sp_upd_lop(conn, args):
+    conn.execute("UPDATE LOP SET TENLOP = :TENLOP, MANV = :MANV WHERE MALOP = :MALOP", args)
+    return [], 0
+
+
+@procedure('SP_DEL_LOP', _MALOP)
+def _sp_del_lop(conn, args):
+    conn.execute("DELETE FROM LOP WHERE MALOP = :MALOP", args)
+    return [], 0
+
+
+@procedure('SP_CHECK_EMPLOYEE_MANAGES_CLASS', _MANV, _MALOP,
+           _Param('@IS_MANAGER', 'bit', is_output=True))
+def _sp_check_employee_manages_class(conn, args):
+    args['IS_MANAGER'] = _exists(
+        conn, "SELECT 1 FROM LOP WHERE MALOP = :MALOP AND MANV = :MANV", args)
+    return [], 0
+
+
+@procedure('SP_CHECK_EMPLOYEE', _MANV, _RESULT)
+def _sp_check_employee(conn, args):
+    args['RESULT'] = _exists(conn, "SELECT 1 FROM NHANVIEN WHERE MANV = :MANV", args)
+    return [], 0
+
+
+@procedure('SP_CHECK_CLASS_EXISTS', _MALOP, _RESULT)
+def _sp_check_class_exists(conn, args):
+    args['RESULT'] = _exists(conn, "SELECT 1 FROM LOP WHERE MALOP = :MALOP", args)
+    return [], 0
+
+
+@procedure('SP_CHECK_CLASS_MANAGED_BY_EMPLOYEE', _MALOP, _MANV, _RESULT)
+def _sp_check_class_managed_by_employee(conn, args):
+    args['RESULT'] = _exists(
+        conn, "SELECT 1 FROM LOP WHERE MALOP = :MALOP AND MANV = :MANV", args)
+    return [], 0
+
+
+@procedure('SP_VALIDATE_LOP_INSERT', _MALOP, _MANV,
+           _Param('@NHANVIEN_TONTAI', 'bit', is_output=True),
+           _Param('@LOP_TONTAI', 'bit', is_output=True),
+           _Param('@DA_QUAN_LY', 'bit', is_output=True))
+def _sp_validate_lop_insert(conn, args):
+    args['NHANVIEN_TONTAI'] = _exists(conn, "SELECT 1 FROM NHANVIEN WHERE MANV = :MANV", args)
+    args['LOP_TONTAI'] = _exists(conn, "SELECT 1 FROM LOP WHERE MALOP = :MALOP", args)
+    args['DA_QUAN_LY'] = _exists(
+        conn, "SELECT 1 FROM LOP WHERE MALOP = :MALOP AND MANV = :MANV", args)
+    if not args['NHANVIEN_TONTAI']:
+        return [], 1
+    if args['LOP_TONTAI']:
+        return [], 2
+    if args['DA_QUAN_LY']:
+        return [], 3
+    return [], 0
+
+
+_SEL_SINHVIEN = "SELECT MASV, HOTEN, NGAYSINH, DIACHI, MALOP, TENDN FROM SINHVIEN "
+
+
+@procedure('SP_SEL_SINHVIEN_BY_MALOP', _MALOP)
+def _sp_sel_sinhvien_by_malop(conn, args):
+    return [_select(conn, _SEL_SINHVIEN + "WHERE MALOP = :MALOP", args)], 0
+
+
+@procedure('SP_SEL_SINHVIEN_BY_ID', _MASV)
+def _sp_sel_sinhvien_by_id(conn, args):
+    return [_select(conn, _SEL_SINHVIEN + "WHERE MASV = :MASV", args)], 0
+
+
+@procedure('SP_SEL_SINHVIEN_BY_MALOP_PAGE', _MALOP,
+           _Param('@SAU_MASV', 'varchar', 20), _Param('@SOLUONG', 'int', default=200))
+def _sp_sel_sinhvien_by_malop_page(conn, args):
+    return [_select(conn, _SEL_SINHVIEN + """
+        WHERE MALOP = :MALOP AND (:SAU_MASV IS NULL OR MASV > :SAU_MASV)
+        ORDER BY MASV LIMIT :SOLUONG""", args)], 0
+
+
+_SINHVIEN_FIELDS = (_MASV, _Param('@HOTEN', 'nvarchar', 100), _Param('@NGAYSINH', 'datetime'),
+                    _Param('@DIACHI', 'nvarchar', 200), _MALOP)
+
+
+@procedure('SP_INS_SINHVIEN', *_SINHVIEN_FIELDS,
+           _Param('@TENDN', 'nvarchar', 100), _Param('@MK', 'nvarchar', 100))
+def _sp_ins_sinhvien(conn, args):
+    conn.execute("""
+        INSERT INTO SINHVIEN (MASV, HOTEN, NGAYSINH, DIACHI, MALOP, TENDN, MATKHAU)
+        VALUES (:MASV, :HOTEN, :NGAYSINH, :DIACHI, :MALOP, :TENDN, :MATKHAU)""",
+                 dict(args, MATKHAU=hashbytes_sha1(args['MK'])))
+    return [], 0
+
+
+@procedure('SP_UPD_SINHVIEN', *_SINHVIEN_FIELDS)
+def _sp_upd_sinhvien(conn, args):
+    conn.execute("""
+        UPDATE SINHVIEN SET HOTEN = :HOTEN, NGAYSINH = :NGAYSINH, DIACHI = :DIACHI, MALOP = :MALOP
+        WHERE MASV = :MASV""", args)
+    return [], 0
+
+
+@procedure('SP_DEL_SINHVIEN', _MASV)
+def _sp_del_sinhvien(conn, args):
+    conn.execute("DELETE FROM SINHVIEN WHERE MASV = :MASV", args)
+    return [], 0
+
+
+@procedure('SP_INS_HOCPHAN', _MAHP, _Param('@TENHP', 'nvarchar', 100), _Param('@SOTC', 'int'))
+def _sp_ins_hocphan(conn, args):
+    conn.execute("INSERT INTO HOCPHAN (MAHP, TENHP, SOTC) VALUES (:MAHP, :TENHP, :SOTC)", args)
+    return [], 0
+
+
+_DIEMTHI_ENCRYPTED = _Param('@DIEMTHI_ENCRYPTED', 'varbinary', -1)
+
+
+@procedure('SP_INS_ENCRYPTED_BANGDIEM', _MASV, _MAHP, _DIEMTHI_ENCRYPTED)
+def _sp_ins_encrypted_bangdiem(conn, args):
+    conn.execute("INSERT INTO BANGDIEM (MASV, MAHP, DIEMTHI) VALUES (:MASV, :MAHP, :DIEMTHI_ENCRYPTED)",
+                 args)
+    return [], 0
+
+
+@procedure('SP_UPD_ENCRYPTED_BANGDIEM', _MASV, _MAHP, _DIEMTHI_ENCRYPTED)
+def _sp_upd_encrypted_bangdiem(conn, args):
+    conn.execute("UPDATE BANGDIEM SET DIEMTHI = :DIEMTHI_ENCRYPTED WHERE MASV = :MASV AND MAHP = :MAHP",
+                 args)
+    return [], 0
+
+
+@procedure('SP_UPSERT_ENCRYPTED_BANGDIEM', _MASV, _MAHP, _DIEMTHI_ENCRYPTED)
+def _sp_upsert_encrypted_bangdiem(conn, args):
+    conn.execute("""
+        INSERT INTO BANGDIEM (MASV, MAHP, DIEMTHI) VALUES (:MASV, :MAHP, :DIEMTHI_ENCRYPTED)
+        ON CONFLICT (MASV, MAHP) DO UPDATE SET DIEMTHI = excluded.DIEMTHI""", args)
+    return [], 0
+
+
+@procedure('SP_UPSERT_ENCRYPTED_BANGDIEM_TVP', _Param('@BANGDIEM', 'BANGDIEM_ENCRYPTED_TVP'))
+def _sp_upsert_encrypted_bangdiem_tvp(conn, args):
+    rows = list(args['BANGDIEM'] or [])
+    existing = 0
+    for masv, mahp, _ in rows:
+        existing += _exists(conn, "SELECT 1 FROM BANGDIEM WHERE MASV = ? AND MAHP = ?", (masv, mahp))
+    conn.executemany("""
+        INSERT INTO BANGDIEM (MASV, MAHP, DIEMTHI) VALUES (?, ?, ?)
+        ON CONFLICT (MASV, MAHP) DO UPDATE SET DIEMTHI = excluded.DIEMTHI""", rows)
+    description = (('INSERTED',) + (None,) * 6, ('UPDATED',) + (None,) * 6)
+    return [(description, [(len(rows) - existing, existing)])], 0
+
+
+@procedure('SP_SEL_BANGDIEM_BY_MALOP_PAGE', _MALOP,
+           _Param('@SAU_MASV', 'varchar', 20), _Param('@SAU_MAHP', 'varchar', 20),
+           _Param('@SOLUONG', 'int', default=200))
+def _sp_sel_bangdiem_by_malop_page(conn, args):
+    return [_select(conn, """
+        SELECT BD.MASV, S.HOTEN AS TENSV, BD.MAHP, HP.TENHP, BD.DIEMTHI
+        FROM BANGDIEM BD
+        JOIN SINHVIEN S ON BD.MASV = S.MASV
+        JOIN HOCPHAN HP ON BD.MAHP = HP.MAHP
+        WHERE S.MALOP = :MALOP
+          AND (:SAU_MASV IS NULL
+               OR BD.MASV > :SAU_MASV
+               OR (BD.MASV = :SAU_MASV AND BD.MAHP > :SAU_MAHP))
+        ORDER BY BD.MASV, BD.MAHP
+        LIMIT :SOLUONG""", args)], 0
+
+
+@procedure('SP_SEL_KHOALOP', _MALOP, _MANV)
+def _sp_sel_khoalop(conn, args):
+    return [_select(conn, """
+        SELECT MALOP, MANV, KHOA, PHIENBAN FROM KHOALOP
+        WHERE MALOP = :MALOP AND MANV = :MANV""", args)], 0
+
+
+@procedure('SP_INS_KHOALOP', _MALOP, _MANV, _Param('@KHOA', 'varbinary', -1))
+def _sp_ins_khoalop(conn, args):
+    conn.execute("INSERT OR IGNORE INTO KHOALOP (MALOP, MANV, KHOA) VALUES (:MALOP, :MANV, :KHOA)", args)
+    return [], 0
+
+
+@procedure('SP_INS_PUBLIC_NHANVIEN', _MANV, _Param('@HOTEN', 'nvarchar', 100),
+           _Param('@EMAIL', 'varchar', 20), _Param('@LUONGCB', 'int'),
+           _Param('@TENDN', 'nvarchar', 100), _Param('@MK', 'nvarchar', 50))
+def _sp_ins_public_nhanvien(conn, args):
+    # The "asymmetric key" is a row in ASYMKEY and the salary is stored as text
+    matkhau = hashbytes_sha1(args['MK'])
+    conn.execute("INSERT OR IGNORE INTO ASYMKEY (MANV, MATKHAU) VALUES (?, ?)",
+                 (args['MANV'], matkhau))
+    luong = args['LUONGCB']
+    conn.execute("""
+        INSERT INTO NHANVIEN (MANV, HOTEN, EMAIL, LUONG, TENDN, MATKHAU, PUBKEY)
+        VALUES (:MANV, :HOTEN, :EMAIL, :LUONG, :TENDN, :MATKHAU, :MANV)""",
+                 dict(args, LUONG=None if luong is None else str(luong).encode('ascii'),
+                      MATKHAU=matkhau))
+    return [], 0
+
+
+@procedure('SP_INS_PUBLIC_ENCRYPT_NHANVIEN', _MANV, _Param('@HOTEN', 'nvarchar', 100),
+           _Param('@EMAIL', 'varchar', 20), _Param('@LUONG', 'varchar', -1),
+           _Param('@TENDN', 'nvarchar', 100), _Param('@MK', 'nvarchar', 100),
+           _Param('@PUB', 'varchar', -1))
+def _sp_ins_public_encrypt_nhanvien(conn, args):
+    luong = args['LUONG']
+    conn.execute("""
+        INSERT INTO NHANVIEN (MANV, HOTEN, EMAIL, LUONG, TENDN, MATKHAU, PUBKEY)
+        VALUES (:MANV, :HOTEN, :EMAIL, :LUONG, :TENDN, :MATKHAU, :PUB)""",
+                 dict(args, LUONG=None if luong is None else str(luong).encode('ascii'),
+                      MATKHAU=hashbytes_sha1(args['MK'])))
+    return [], 0
+
+
+@procedure('SP_LOGIN_NHANVIEN', _Param('@TENDN', 'nvarchar', 100), _Param('@MK', 'nvarchar', 100),
+           _Param('@MK_HASH', 'varbinary', 20))
+def _sp_login_nhanvien(conn, args):
+    row = conn.execute("""
+        SELECT MANV FROM NHANVIEN
+        WHERE TENDN = :TENDN AND (MATKHAU = :MK_HASH OR MATKHAU = :MK_SERVER_HASH)""",
+                       dict(args, MK_SERVER_HASH=hashbytes_sha1(args['MK']))).fetchone()
+    if row is None:
+        return [], 1
+
+    # DECRYPTBYASYMKEY returns NULL when the key password is wrong
+    return [_select(conn, """
+        SELECT NV.MANV, NV.HOTEN, NV.EMAIL, NV.LUONG, NV.PUBKEY,
+               CASE WHEN K.MANV IS NOT NULL THEN 'SERVER' ELSE 'CLIENT' END AS KIEU_KHOA,
+               CASE WHEN K.MATKHAU = :MK_SERVER_HASH THEN CAST(CAST(NV.LUONG AS TEXT) AS INTEGER)
+               END AS LUONGCB,
+               (SELECT group_concat(MALOP, ',') FROM
+                   (SELECT L.MALOP FROM LOP L WHERE L.MANV = NV.MANV ORDER BY L.MALOP)) AS DS_LOP
+        FROM NHANVIEN NV
+        LEFT JOIN ASYMKEY K ON K.MANV = NV.MANV
+        WHERE NV.MANV = :MANV""", {'MANV': row[0], 'MK_SERVER_HASH': hashbytes_sha1(args['MK'])})], 0
+
+
+# ==============================
+# Statement parsing
+# ==============================
+
+_DECLARE = re.compile(r"DECLARE\s+@(\w+)\s+[^=;]+?(\s*=\s*\?)?\s*;?$", re.I)
+_EXEC = re.compile(r"EXEC(?:UTE)?\s+(?:@(\w+)\s*=\s*)?(\[?[\w.]+\]?)\s*(.*?);?$", re.I | re.S)
+_NAMED_ARG = re.compile(r"@(\w+)\s*=\s*(\?|@\w+)(\s+OUT(?:PUT)?)?$", re.I)
+_SELECT_VARS = re.compile(r"SELECT\s+(@\w+\s+AS\s+\w+(?:\s*,\s*@\w+\s+AS\s+\w+)*)\s*;?$", re.I)
+_SELECT_VAR = re.compile(r"@(\w+)\s+AS\s+(\w+)", re.I)
+_SAVE = re.compile(r"SAVE\s+TRAN(?:SACTION)?\s+(\w+)$", re.I)
+_ROLLBACK_TO = re.compile(r"ROLLBACK\s+TRAN(?:SACTION)?\s+(\w+)$", re.I)
+_BEGIN = re.compile(r"(?:IF\s+@@TRANCOUNT\s*=\s*0\s+)?BEGIN\s+TRAN(?:SACTION)?$", re.I)
+_COMMIT = re.compile(r"COMMIT(?:\s+TRAN(?:SACTION)?)?$", re.I)
+_OBJECT_ID = re.compile(r"SELECT\s+OBJECT_ID\(\s*\?\s*,\s*'P'\s*\)$", re.I)
+_XACT_STATE = re.compile(r"SELECT\s+XACT_STATE\(\)$", re.I)
+
+
+def _translate_error(error: sqlite3.Error) -> Error:
+    """Wrap a SQLite error in the matching pyodbc-style exception."""
+    if isinstance(error, sqlite3.IntegrityError):
+        return IntegrityError('23000', f"[SQLite] {error}")
+    if isinstance(error, sqlite3.OperationalError):
+        return OperationalError('42000', f"[SQLite] {error}")
+    return DatabaseError('HY000', f"[SQLite] {error}")
+
+
+class Cursor:
+    """DB-API cursor understanding the statements listed in the module docstring."""
+
+    def __init__(self, connection: 'Connection'):
+        self.connection = connection
+        self.arraysize = 1
+        self.fast_executemany = False  # Accepted for compatibility; executemany is always batched
+        self.rowcount = -1
+        self._result_sets: List[ResultSet] = []
+        self._rows: List[Tuple] = []
+        self._row_type: type = Row
+        self.description: Optional[Tuple] = None
+
+    # Result handling
+
+    def _set_results(self, result_sets: List[ResultSet]) -> None:
+        self._result_sets = [(tuple(tuple(column) for column in description), list(rows))
+                             for description, rows in result_sets if description]
+        self._next_result_set()
+
+    def _next_result_set(self) -> bool:
+        if not self._result_sets:
+            self.description = None
+            self._rows = []
+            return False
+        self.description, self._rows = self._result_sets.pop(0)
+        self._rows.reverse()  # Pop from the end while fetching
+        self._row_type = _row_type(self.description)
+        return True
+
+    def nextset(self) -> bool:
+        return self._next_result_set()
+
+    def fetchone(self) -> Optional[Row]:
+        if self.description is None:
+            raise ProgrammingError('24000', "No results. Previous SQL was not a query.")
+        return self._row_type(self._rows.pop()) if self._rows else None
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Row]:
+        if self.description is None:
+            raise ProgrammingError('24000', "No results. Previous SQL was not a query.")
+        count = min(size or self.arraysize, len(self._rows))
+        row_type = self._row_type
+        rows = [row_type(self._rows.pop()) for _ in range(count)]
+        return rows
+
+    def fetchall(self) -> List[Row]:
+        if self.description is None:
+            raise ProgrammingError('24000', "No results. Previous SQL was not a query.")
+        row_type = self._row_type
+        rows = [row_type(row) for row in reversed(self._rows)]
+        self._rows = []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self) -> None:
+        self._result_sets = []
+        self._rows = []
+        self.description = None
+
+    # Execution
+
+    def execute(self, sql: str, *params) -> 'Cursor':
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        try:
+            with self.connection._lock:
+                self._set_results(self._run(sql.strip(), list(params)))
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Sequence[Sequence[Any]]) -> None:
+        sql = sql.strip()
+        conn = self.connection._sqlite
+        match = _EXEC.match(sql)
+        try:
+            with self.connection._lock:
+                if match and '\n' not in sql:
+                    # Run every row inside one savepoint so a failure applies none of them,
+                    # as a failed fast_executemany batch does
+                    self.connection._begin()
+                    conn.execute("SAVEPOINT fake_executemany")
+                    try:
+                        for params in seq_of_params:
+                            self._run(sql, list(params))
+                    except Exception:
+                        conn.execute("ROLLBACK TO fake_executemany")
+                        conn.execute("RELEASE fake_executemany")
+                        raise
+                    conn.execute("RELEASE fake_executemany")
+                else:
+                    conn.executemany(sql, seq_of_params)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        self._set_results([])
+
+    def _run(self, sql: str, params: List[Any]) -> List[ResultSet]:
+        """Execute one statement or procedure batch and return its result sets."""
+        conn = self.connection._sqlite
+
+        if 'sys.parameters' in sql:
+            return [self._describe_procedure(params[0])]
+        if _OBJECT_ID.match(sql):
+            known = str(params[0]).strip('[]').upper() in PROCEDURES
+            return [((('', None, None, None, None, None, True),), [(1 if known else None,)])]
+        if _XACT_STATE.match(sql):
+            # SQLite never dooms a transaction: it is either open and committable or absent
+            state = 1 if conn.in_transaction else 0
+            return [((('', None, None, None, None, None, True),), [(state,)])]
+        if _BEGIN.match(sql):
+            self.connection._begin()
+            return []
+        if _COMMIT.match(sql):
+            conn.commit()
+            return []
+        match = _SAVE.match(sql)
+        if match:
+            # An outermost savepoint would commit on release; nest it in a transaction
+            self.connection._begin()
+            conn.execute(f"SAVEPOINT {match.group(1)}")
+            return []
+        match = _ROLLBACK_TO.match(sql)
+        if match:
+            conn.execute(f"ROLLBACK TO {match.group(1)}")
+            return []
+        if re.match(r"(DECLARE|EXEC)\b", sql, re.I):
+            return self._run_batch(sql, params)
+
+        cursor = conn.execute(sql, params)
+        self.rowcount = cursor.rowcount
+        if cursor.description:
+            return [(cursor.description, cursor.fetchall())]
+        return []
+
+    @staticmethod
+    def _describe_procedure(name: str) -> ResultSet:
+        """Rows of the sys.parameters metadata query for one procedure."""
+        entry = PROCEDURES.get(str(name).strip('[]').upper())
+        description = tuple((column,) + (None,) * 6 for column in
+                            ('name', 'type_name', 'max_length', 'precision', 'scale', 'is_output'))
+        rows = [(p.name, p.type_name, p.max_length, p.precision, p.scale, p.is_output)
+                for p in (entry[0] if entry else [])]
+        return description, rows
+
+    def _run_batch(self, sql: str, params: List[Any]) -> List[ResultSet]:
+        """Run DECLARE / EXEC / SELECT @variables batches."""
+        variables: Dict[str, Any] = {}
+        params = list(params)
+        result_sets: List[ResultSet] = []
+
+        for statement in (line.strip() for line in sql.split('\n')):
+            if not statement:
+                continue
+            match = _DECLARE.match(statement)
+            if match:
+                variables[match.group(1).upper()] = params.pop(0) if match.group(2) else None
+                continue
+            match = _SELECT_VARS.match(statement)
+            if match:
+                pairs = _SELECT_VAR.findall(match.group(1))
+                description = tuple((alias,) + (None,) * 6 for _, alias in pairs)
+                row = tuple(variables.get(variable.upper()) for variable, _ in pairs)
+                result_sets.append((description, [row]))
+                continue
+            match = _EXEC.match(statement)
+            if match:
+                result_sets.extend(self._call(match, params, variables))
+                continue
+            raise ProgrammingError('42000', f"Statement not supported by the SQLite stand-in: {statement}")
+        return result_sets
+
+    def _call(self, match: 're.Match', params: List[Any],
+              variables: Dict[str, Any]) -> List[ResultSet]:
+        """Bind the arguments of one EXEC and run the emulated procedure."""
+        return_variable, name, arguments = match.groups()
+        entry = PROCEDURES.get(name.strip('[]').upper())
+        if entry is None:
+            raise ProgrammingError(
+                '42000', f"Could not find stored procedure '{name}'. (2812)")
+        declared, body = entry
+        by_name = {param.name[1:].upper(): param for param in declared}
+
+        args = {param.name[1:]: param.default for param in declared}
+        outputs: Dict[str, str] = {}  # Parameter -> variable receiving it
+        position = 0
+        for argument in (part.strip() for part in arguments.split(',')):
+            if not argument:
+                continue
+            named = _NAMED_ARG.match(argument)
+            if named is None:
+                if argument != '?' or position >= len(declared):
+                    raise ProgrammingError('42000', f"Unsupported argument: {argument}")
+                args[declared[position].name[1:]] = params.pop(0)
+                position += 1
+                continue
+
+            param_name, value, is_output = named.groups()
+            param = by_name.get(param_name.upper())
+            if param is None:
+                raise ProgrammingError(
+                    '42000', f"{name} has no parameter named '@{param_name}'. (8145)")
+            if value == '?':
+                args[param.name[1:]] = params.pop(0)
+            else:
+                args[param.name[1:]] = variables.get(value[1:].upper())
+                if is_output:
+                    outputs[param.name[1:]] = value[1:].upper()
+
+        result_sets, return_code = body(self.connection._sqlite, args)
+        for param_name, variable in outputs.items():
+            variables[variable] = args[param_name]
+        if return_variable:
+            variables[return_variable.upper()] = return_code
+        return result_sets
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class Connection:
+    """DB-API connection over one SQLite connection."""
+
+    def __init__(self, database: str):
+        self._sqlite = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        self._sqlite.execute("PRAGMA foreign_keys = ON")
+        self._lock = threading.RLock()
+        self.autocommit = False
+
+    def _begin(self) -> None:
+        """Open a transaction unless one is already active."""
+        if not self._sqlite.in_transaction:
+            self._sqlite.execute("BEGIN")
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def execute(self, sql: str, *params) -> Cursor:
+        return self.cursor().execute(sql, *params)
+
+    def commit(self) -> None:
+        with self._lock:
+            self._sqlite.commit()
+
+    def rollback(self) -> None:
+        with self._lock:
+            self._sqlite.rollback()
+
+    def close(self) -> None:
+        self._sqlite.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+
+_database: Optional[str] = None
+
+
+def configure(database: str) -> None:
+    """
+    Point every connection at a SQLite file and create the schema in it.
+
+    Args:
+        database: Path of the SQLite database file
+    """
+    global _database
+    _database = database
+    conn = sqlite3.connect(database)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def connect(connection_string: str = '', autocommit: bool = False, **kwargs) -> Connection:
+    """pyodbc.connect; the connection string is ignored in favour of configure()."""
+    if _database is None:
+        raise OperationalError('08001', "fake_pyodbc.configure() has not been called")
+    conn = Connection(_database)
+    conn.autocommit = autocommit
+    return conn
+
+
+def install() -> None:
+    """Make `import pyodbc` return this module. Call before importing db_connector."""
+    existing = sys.modules.get('pyodbc')
+    if existing is not None and existing is not sys.modules[__name__]:
+        logger.warning("Replacing an already imported pyodbc module")
+    sys.modules['pyodbc'] = sys.modules[__name__]
@@ -0,0 +1,546 @@
+import os
+import sys
+import csv
+import hashlib
+import time
+import random
+import logging
+import unicodedata
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+"""
+Synthetic Dataset Generator
+
+Generates a QLSVNhom dataset at university scale for load testing:
+- N employees, each with a real RSA key pair; the encrypted private keys
+  are written to --keys-dir as the application expects, and the logins
+  and passwords are listed in credentials.csv
+- M classes, assigned to employees with a skewed distribution, so a few
+  employees manage many classes and some manage none
+- Students with Vietnamese names, birth dates matching their cohort and
+  normally distributed class sizes
+- Courses with credits and a difficulty, and a curriculum per class
+- BANGDIEM grades from student ability, course difficulty and noise,
+  encrypted with the public key of the employee managing the class
+
+Output formats:
+- sql     One T-SQL script of 1000-row INSERT batches
+- csv     One CSV per table (binary columns in hex) plus load.sql with
+          BULK INSERT statements
+- direct  INSERT through DatabaseConnector's pool with fast_executemany;
+          --sqlite PATH writes into a fake_pyodbc database instead of SQL
+          Server
+
+Key generation and grade encryption run in a process pool. Every grade gets
+its own RSA ciphertext unless --ciphertext-pool K reuses K ciphertexts per
+employee and grade value, which makes million-row datasets quick to build.
+
+Usage:
+------
+cd Homeworks/w4/UI
+python benchmarks/generate_dataset.py --employees 50 --classes 400 --format sql --output dataset
+python benchmarks/generate_dataset.py --employees 5 --classes 20 --format direct --server localhost
+python benchmarks/generate_dataset.py --classes 20 --format direct --sqlite /tmp/qlsv.sqlite
+"""
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+logging.disable(logging.INFO)
+
+logger = logging.getLogger('generate_dataset')
+
+# Columns in load order; parents come before the tables referencing them
+TABLES: Dict[str, Tuple[str, ...]] = {
+    'NHANVIEN': ('MANV', 'HOTEN', 'EMAIL', 'LUONG', 'TENDN', 'MATKHAU', 'PUBKEY'),
+    'HOCPHAN': ('MAHP', 'TENHP', 'SOTC'),
+    'LOP': ('MALOP', 'TENLOP', 'MANV'),
+    'SINHVIEN': ('MASV', 'HOTEN', 'NGAYSINH', 'DIACHI', 'MALOP', 'TENDN', 'MATKHAU'),
+    'BANGDIEM': ('MASV', 'MAHP', 'DIEMTHI'),
+}
+TABLE_ORDER = list(TABLES)
+
+# Vietnamese surnames with their approximate share of the population
+SURNAMES = [('Nguyễn', 38), ('Trần', 11), ('Lê', 9.5), ('Phạm', 7), ('Hoàng', 4), ('Huỳnh', 4),
+            ('Phan', 4.5), ('Vũ', 2), ('Võ', 2), ('Đặng', 2.1), ('Bùi', 2), ('Đỗ', 1.4),
+            ('Hồ', 1.3), ('Ngô', 1.3), ('Dương', 1), ('Lý', 0.5)]
+MIDDLE_NAMES = {'M': ['Văn', 'Minh', 'Đức', 'Quốc', 'Hoàng', 'Gia', 'Thanh', 'Hữu', 'Công', 'Tuấn'],
+                'F': ['Thị', 'Ngọc', 'Thu', 'Thanh', 'Minh', 'Kim', 'Phương', 'Hồng', 'Mai', 'Bảo']}
+GIVEN_NAMES = {'M': ['An', 'Bình', 'Cường', 'Dũng', 'Đạt', 'Hải', 'Hiếu', 'Hùng', 'Huy', 'Khang',
+                     'Khoa', 'Long', 'Minh', 'Nam', 'Phong', 'Phúc', 'Quân', 'Sơn', 'Tài', 'Thắng',
+                     'Thịnh', 'Trung', 'Tuấn', 'Việt', 'Vinh'],
+               'F': ['Anh', 'Chi', 'Dung', 'Giang', 'Hà', 'Hằng', 'Hạnh', 'Hoa', 'Hương', 'Lan',
+                     'Linh', 'Loan', 'Mai', 'My', 'Ngân', 'Nhi', 'Oanh', 'Phương', 'Quỳnh', 'Tâm',
+                     'Thảo', 'Trang', 'Uyên', 'Vân', 'Yến']}
+PROVINCES = [('TP. Hồ Chí Minh', 30), ('Hà Nội', 12), ('Đồng Nai', 5), ('Bình Dương', 5),
+             ('Long An', 4), ('Tiền Giang', 4), ('Đà Nẵng', 3), ('Cần Thơ', 3), ('Bến Tre', 3),
+             ('Khánh Hòa', 3), ('Lâm Đồng', 3), ('Bình Định', 3), ('Quảng Ngãi', 3),
+             ('Nghệ An', 3), ('Thanh Hóa', 3), ('Hải Phòng', 2), ('Huế', 2), ('An Giang', 2),
+             ('Đắk Lắk', 2), ('Bà Rịa - Vũng Tàu', 2)]
+PROGRAMS = [('CNTT', 'Công nghệ thông tin'), ('KHMT', 'Khoa học máy tính'),
+            ('KTPM', 'Kỹ thuật phần mềm'), ('HTTT', 'Hệ thống thông tin'),
+            ('ATTT', 'An toàn thông tin'), ('MMT', 'Mạng máy tính'),
+            ('KHDL', 'Khoa học dữ liệu'), ('TTNT', 'Trí tuệ nhân tạo')]
+SUBJECTS = ['Nhập môn lập trình', 'Kỹ thuật lập trình', 'Cấu trúc dữ liệu và giải thuật',
+            'Lập trình hướng đối tượng', 'Cơ sở dữ liệu', 'Hệ điều hành', 'Mạng máy tính',
+            'Kiến trúc máy tính', 'Toán rời rạc', 'Giải tích', 'Đại số tuyến tính',
+            'Xác suất thống kê', 'Công nghệ phần mềm', 'Phân tích thiết kế hệ thống',
+            'Lập trình web', 'An toàn thông tin', 'Trí tuệ nhân tạo', 'Học máy',
+            'Hệ quản trị cơ sở dữ liệu', 'Triết học Mác - Lênin', 'Tiếng Anh', 'Vật lý đại cương']
+
+DEFAULT_STUDENT_PASSWORD = 'sv123456'
+GRADE_STEP = 0.25
+
+# Rows per INSERT statement; SQL Server accepts at most 1000
+SQL_BATCH_ROWS = 1000
+DIRECT_BATCH_ROWS = 5000
+
+
+def _server_hash(password: str) -> bytes:
+    """HASHBYTES('SHA1', @MK) of an NVARCHAR password, as SP_INS_SINHVIEN stores it."""
+    return hashlib.sha1(password.encode('utf-16-le')).digest()
+
+
+def _ascii(text: str) -> str:
+    """Strip Vietnamese diacritics for logins ('Đặng Văn Hùng' -> 'Dang Van Hung')."""
+    text = text.replace('Đ', 'D').replace('đ', 'd')
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+# ==============================
+# Process pool workers
+# ==============================
+
+_worker_crypto = None
+
+
+def _crypto(keys_dir: str):
+    """CryptoManager of this worker process (public keys stay cached between tasks)."""
+    global _worker_crypto
+    if _worker_crypto is None or _worker_crypto.keys_dir != keys_dir:
+        from crypto_utils import CryptoManager
+        _worker_crypto = CryptoManager(keys_dir)
+    return _worker_crypto
+
+
+def _create_employee_keys(keys_dir: str, manv: str, password: str, salary: int) -> Tuple[str, bytes]:
+    """Generate an employee's key pair and encrypt their salary; returns (PUBKEY, LUONG)."""
+    crypto = _crypto(keys_dir)
+    _, public_key_pem = crypto.generate_key_pair(manv, password)
+    return public_key_pem, crypto.encrypt_data(public_key_pem, str(salary))
+
+
+def _encrypt_grades(keys_dir: str, public_key_pem: str, grades: Sequence[float]) -> List[bytes]:
+    """Encrypt grades for one class with its employee's public key."""
+    crypto = _crypto(keys_dir)
+    return [crypto.encrypt_data(public_key_pem, str(grade)) for grade in grades]
+
+
+def _bounded_map(executor: Executor, function, tasks: Iterable[Tuple[Any, tuple]],
+                 window: int) -> Iterator[Tuple[Any, Any]]:
+    """
+    Run function(*args) for (item, args) tasks in the pool, yielding
+    (item, result) in order while keeping at most window tasks in flight.
+    Tasks whose args are None are not run and yield None.
+    """
+    pending = deque()
+    for item, args in tasks:
+        pending.append((item, None if args is None else executor.submit(function, *args)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, None if future is None else future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, None if future is None else future.result()
+
+
+# ==============================
+# Writers
+# ==============================
+
+class _Writer:
+    """Buffers rows per table and flushes parents before children."""
+
+    def __init__(self, batch_rows: int):
+        self.batch_rows = batch_rows
+        self.buffers: Dict[str, List[tuple]] = {table: [] for table in TABLES}
+        self.counts: Dict[str, int] = {table: 0 for table in TABLES}
+
+    def add(self, table: str, row: tuple) -> None:
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_rows:
+            # Rows of later tables may reference unflushed rows of earlier ones
+            for parent in TABLE_ORDER[:TABLE_ORDER.index(table) + 1]:
+                self._flush_table(parent)
+
+    def _flush_table(self, table: str) -> None:
+        rows = self.buffers[table]
+        if rows:
+            self.write(table, rows)
+            self.counts[table] += len(rows)
+            self.buffers[table] = []
+
+    def write(self, table: str, rows: List[tuple]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        for table in TABLE_ORDER:
+            self._flush_table(table)
+
+
+def _sql_literal(value: Any) -> str:
+    """Format a value as a T-SQL literal."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + value.hex()
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "N'" + str(value).replace("'", "''") + "'"
+
+
+class SqlWriter(_Writer):
+    """Writes one T-SQL script of multi-row INSERT batches."""
+
+    def __init__(self, path: str, database: str):
+        super().__init__(SQL_BATCH_ROWS)
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(f"-- Dữ liệu tổng hợp cho kiểm thử tải, tạo bởi generate_dataset.py\n"
+                        f"USE {database};\nGO\nSET NOCOUNT ON;\nGO\n")
+
+    def write(self, table: str, rows: List[tuple]) -> None:
+        columns = ', '.join(TABLES[table])
+        values = ',\n'.join('(' + ', '.join(_sql_literal(value) for value in row) + ')' for row in rows)
+        self.file.write(f"INSERT INTO {table} ({columns}) VALUES\n{values};\nGO\n")
+
+    def close(self) -> None:
+        super().close()
+        self.file.close()
+
+
+class CsvWriter(_Writer):
+    """Writes one CSV per table and a BULK INSERT script loading them in order."""
+
+    def __init__(self, directory: str, database: str):
+        super().__init__(DIRECT_BATCH_ROWS)
+        self.directory = directory
+        self.database = database
+        self.files = {}
+        self.writers = {}
+        for table, columns in TABLES.items():
+            handle = open(os.path.join(directory, f'{table}.csv'), 'w', encoding='utf-8', newline='')
+            self.files[table] = handle
+            self.writers[table] = csv.writer(handle)
+            self.writers[table].writerow(columns)
+
+    def write(self, table: str, rows: List[tuple]) -> None:
+        # bcp and BULK INSERT read binary columns as hex digits in character files
+        self.writers[table].writerows(
+            tuple(value.hex() if isinstance(value, bytes) else value for value in row) for row in rows)
+
+    def close(self) -> None:
+        super().close()
+        for handle in self.files.values():
+            handle.close()
+
+        with open(os.path.join(self.directory, 'load.sql'), 'w', encoding='utf-8') as f:
+            f.write(f"-- Nạp các file CSV (SQL Server 2017 trở lên)\nUSE {self.database};\nGO\n")
+            for table in TABLE_ORDER:
+                path = os.path.abspath(os.path.join(self.directory, f'{table}.csv'))
+                f.write(f"BULK INSERT {table} FROM '{path}'\n"
+                        f"WITH (FORMAT = 'CSV', FIRSTROW = 2, CODEPAGE = '65001', "
+                        f"TABLOCK, BATCHSIZE = 50000);\nGO\n")
+
+
+class DirectWriter(_Writer):
+    """Inserts straight into the database with fast_executemany, one commit per batch."""
+
+    def __init__(self, connector):
+        super().__init__(DIRECT_BATCH_ROWS)
+        import pyodbc
+        self.binary = pyodbc.Binary
+        self.connector = connector
+
+    def write(self, table: str, rows: List[tuple]) -> None:
+        columns = TABLES[table]
+        query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join('?' for _ in columns)})")
+        params = [tuple(self.binary(value) if isinstance(value, bytes) else value for value in row)
+                  for row in rows]
+        with self.connector.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.fast_executemany = True
+                cursor.executemany(query, params)
+                conn.commit()
+            finally:
+                cursor.close()
+
+
+# ==============================
+# Generation
+# ==============================
+
+class DatasetGenerator:
+    """Builds every row of the dataset from one random seed."""
+
+    def __init__(self, employees: int, classes: int, students_per_class: int, courses: int,
+                 courses_per_student: int, seed: int = 42, first_cohort: int = 20,
+                 cohorts: int = 5):
+        self.employee_count = employees
+        self.class_count = classes
+        self.students_per_class = students_per_class
+        self.course_count = courses
+        self.courses_per_student = min(courses_per_student, courses)
+        self.cohorts = [first_cohort + i for i in range(max(1, cohorts))]
+        self.rng = random.Random(seed)
+
+        self._surnames, surname_weights = zip(*SURNAMES)
+        self._surname_weights = list(surname_weights)
+        self._provinces, province_weights = zip(*PROVINCES)
+        self._province_weights = list(province_weights)
+        self._logins = set()
+
+    def person_name(self) -> str:
+        gender = self.rng.choice('MF')
+        surname = self.rng.choices(self._surnames, self._surname_weights)[0]
+        return f"{surname} {self.rng.choice(MIDDLE_NAMES[gender])} {self.rng.choice(GIVEN_NAMES[gender])}"
+
+    def login(self, name: str) -> str:
+        """Unique login in the usual style: given name + initials ('Trần Văn An' -> 'antv')."""
+        parts = _ascii(name).lower().split()
+        base = parts[-1] + ''.join(part[0] for part in parts[:-1])
+        login, n = base, 1
+        while login in self._logins:
+            n += 1
+            login = f"{base}{n}"
+        self._logins.add(login)
+        return login
+
+    def employees(self) -> List[Dict[str, Any]]:
+        """Employee specs; keys and encrypted salaries are added by the caller."""
+        employees = []
+        for i in range(1, self.employee_count + 1):
+            name = self.person_name()
+            login = self.login(name)
+            # Salaries are log-normal around 12 million VND, in steps of 100k
+            salary = int(round(self.rng.lognormvariate(16.3, 0.35), -5))
+            employees.append({'MANV': f'NV{i:05d}', 'HOTEN': name, 'EMAIL': f'nv{i}@uni.edu.vn',
+                              'TENDN': login, 'password': f'{login}@{self.rng.randint(1000, 9999)}',
+                              'salary': salary})
+        return employees
+
+    def courses(self) -> List[Dict[str, Any]]:
+        courses = []
+        for j in range(self.course_count):
+            name = SUBJECTS[j % len(SUBJECTS)]
+            if j >= len(SUBJECTS):
+                name = f"{name} {j // len(SUBJECTS) + 1}"
+            courses.append({'MAHP': f'HP{j + 1:04d}', 'TENHP': name,
+                            'SOTC': self.rng.choices((2, 3, 4), (2, 5, 3))[0],
+                            'difficulty': self.rng.gauss(0.0, 0.8)})
+        return courses
+
+    def classes(self, employees: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Classes per cohort and program, each managed by a weighted random employee."""
+        # Log-normal workloads: most employees manage a few classes, some many
+        workload = [self.rng.lognormvariate(0.0, 0.8) for _ in employees]
+        counters: Dict[Tuple[int, str], int] = {}
+        classes = []
+        for i in range(self.class_count):
+            cohort = self.cohorts[i % len(self.cohorts)]
+            code, program = PROGRAMS[(i // len(self.cohorts)) % len(PROGRAMS)]
+            n = counters[(cohort, code)] = counters.get((cohort, code), 0) + 1
+            manager = self.rng.choices(employees, workload)[0] if employees else None
+            classes.append({'MALOP': f'{cohort}{code}{n}', 'TENLOP': f'{program} K{cohort} - {n}',
+                            'MANV': manager['MANV'] if manager else None, 'cohort': cohort})
+        return classes
+
+    def class_roster(self, cls: Dict[str, Any], courses: List[Dict[str, Any]],
+                     first_student: int) -> Tuple[List[tuple], List[Tuple[str, str]], List[float]]:
+        """
+        Students and grades of one class.
+
+        Returns:
+            Tuple of (SINHVIEN rows without MATKHAU, (MASV, MAHP) keys, grades)
+        """
+        rng = self.rng
+        size = max(5, int(round(rng.gauss(self.students_per_class, self.students_per_class * 0.2))))
+        curriculum = rng.sample(courses, self.courses_per_student)
+        birth_year = 2000 + cls['cohort'] - 18
+
+        students, keys, grades = [], [], []
+        for k in range(size):
+            number = first_student + k
+            masv = f"{cls['cohort']}{number:06d}"
+            name = self.person_name()
+            birthday = f"{birth_year + rng.choice((-1, 0, 0, 0, 0, 1))}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            province = rng.choices(self._provinces, self._province_weights)[0]
+            students.append((masv, name, birthday, province, cls['MALOP'], self.login(name)))
+
+            ability = rng.gauss(0.0, 1.0)
+            for course in curriculum:
+                # About one grade in ten is not entered yet
+                if rng.random() < 0.1:
+                    continue
+                raw = 6.5 + 1.3 * ability - course['difficulty'] + rng.gauss(0.0, 1.0)
+                grades.append(min(10.0, max(0.0, round(raw / GRADE_STEP) * GRADE_STEP)))
+                keys.append((masv, course['MAHP']))
+        return students, keys, grades
+
+
+def generate(writer: _Writer, generator: DatasetGenerator, keys_dir: str, output_dir: str,
+             workers: Optional[int], ciphertext_pool: int, student_password: str) -> Dict[str, int]:
+    """
+    Generate the dataset into a writer.
+
+    Returns:
+        Number of rows written per table
+    """
+    from crypto_utils import CryptoManager
+
+    os.makedirs(keys_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    window = 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        # Employees and their key pairs
+        employees = generator.employees()
+        tasks = ((employee, (keys_dir, employee['MANV'], employee['password'], employee['salary']))
+                 for employee in employees)
+        for employee, (public_key_pem, encrypted_salary) in _bounded_map(
+                executor, _create_employee_keys, tasks, window):
+            employee['PUBKEY'] = public_key_pem
+            writer.add('NHANVIEN', (employee['MANV'], employee['HOTEN'], employee['EMAIL'],
+                                    encrypted_salary, employee['TENDN'],
+                                    CryptoManager.hash_password(employee['password']), public_key_pem))
+        print(f"{len(employees)} employees and key pairs in {time.perf_counter() - started:.1f}s")
+
+        with open(os.path.join(output_dir, 'credentials.csv'), 'w', encoding='utf-8', newline='') as f:
+            credentials = csv.writer(f)
+            credentials.writerow(('MANV', 'TENDN', 'MATKHAU'))
+            credentials.writerows((e['MANV'], e['TENDN'], e['password']) for e in employees)
+
+        courses = generator.courses()
+        for course in courses:
+            writer.add('HOCPHAN', (course['MAHP'], course['TENHP'], course['SOTC']))
+
+        classes = generator.classes(employees)
+        for cls in classes:
+            writer.add('LOP', (cls['MALOP'], cls['TENLOP'], cls['MANV']))
+
+        # Optional pool of reusable ciphertexts per employee and grade value
+        public_keys = {employee['MANV']: employee['PUBKEY'] for employee in employees}
+        pools: Dict[str, Dict[float, List[bytes]]] = {}
+        if ciphertext_pool > 0:
+            values = [step * GRADE_STEP for step in range(int(10 / GRADE_STEP) + 1)]
+            tasks = ((manv, (keys_dir, pem, [value for value in values for _ in range(ciphertext_pool)]))
+                     for manv, pem in public_keys.items())
+            for manv, ciphertexts in _bounded_map(executor, _encrypt_grades, tasks, window):
+                pools[manv] = {value: ciphertexts[i * ciphertext_pool:(i + 1) * ciphertext_pool]
+                               for i, value in enumerate(values)}
+
+        # Students and grades class by class; grades use the class manager's key
+        student_hash = _server_hash(student_password)
+        next_student = {cohort: 1 for cohort in generator.cohorts}
+
+        def rosters():
+            for cls in classes:
+                students, keys, grades = generator.class_roster(
+                    cls, courses, next_student[cls['cohort']])
+                next_student[cls['cohort']] += len(students)
+                manv = cls['MANV']
+                # Pooled ciphertexts and classes without a manager need no encryption task
+                args = None if manv is None or manv in pools else (keys_dir, public_keys[manv], grades)
+                yield (cls, students, keys, grades), args
+
+        done = grades_written = 0
+        report_every = max(1, len(classes) // 10)
+        for (cls, students, keys, grades), ciphertexts in _bounded_map(
+                executor, _encrypt_grades, rosters(), window):
+            for student in students:
+                writer.add('SINHVIEN', student + (student_hash,))
+            pool = pools.get(cls['MANV'])
+            if pool is not None:
+                ciphertexts = [pool[grade][i % ciphertext_pool] for i, grade in enumerate(grades)]
+            elif ciphertexts is None:
+                ciphertexts = [None] * len(keys)
+            for (masv, mahp), ciphertext in zip(keys, ciphertexts):
+                writer.add('BANGDIEM', (masv, mahp, ciphertext))
+            grades_written += len(keys)
+
+            done += 1
+            if done % report_every == 0 or done == len(classes):
+                print(f"  {done}/{len(classes)} classes, {grades_written} grades, "
+                      f"{time.perf_counter() - started:.1f}s")
+
+    writer.close()
+    return dict(writer.counts)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic QLSVNhom dataset")
+    parser.add_argument('--employees', type=int, default=20)
+    parser.add_argument('--classes', type=int, default=100)
+    parser.add_argument('--students-per-class', type=int, default=40, help="Mean class size")
+    parser.add_argument('--courses', type=int, default=40)
+    parser.add_argument('--courses-per-student', type=int, default=8)
+    parser.add_argument('--cohorts', type=int, default=5, help="Intake years (K20, K21, ...)")
+    parser.add_argument('--format', choices=('sql', 'csv', 'direct'), default='sql')
+    parser.add_argument('--output', default='dataset',
+                        help="Directory for the SQL/CSV files and credentials.csv")
+    parser.add_argument('--keys-dir', default='keys', help="Where private keys are written")
+    parser.add_argument('--student-password', default=DEFAULT_STUDENT_PASSWORD)
+    parser.add_argument('--ciphertext-pool', type=int, default=0,
+                        help="Reuse this many ciphertexts per employee and grade (0: one per grade)")
+    parser.add_argument('--workers', type=int, help="Processes for key generation and encryption")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='QLSVNhom')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--driver', default='SQL Server')
+    parser.add_argument('--sqlite', help="With --format direct, load into this fake_pyodbc database")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.format == 'sql':
+        writer = SqlWriter(os.path.join(args.output, 'dataset.sql'), args.database)
+    elif args.format == 'csv':
+        writer = CsvWriter(args.output, args.database)
+    else:
+        if args.sqlite:
+            import fake_pyodbc
+            fake_pyodbc.configure(args.sqlite)
+            fake_pyodbc.install()
+        from db_connector import DatabaseConnector
+        connector = DatabaseConnector(args.server, args.database, args.username, args.password,
+                                      trusted_connection=not args.username, driver=args.driver)
+        writer = DirectWriter(connector)
+
+    generator = DatasetGenerator(args.employees, args.classes, args.students_per_class,
+                                 args.courses, args.courses_per_student, args.seed,
+                                 cohorts=args.cohorts)
+    started = time.perf_counter()
+    counts = generate(writer, generator, args.keys_dir, args.output, args.workers,
+                      args.ciphertext_pool, args.student_password)
+    elapsed = time.perf_counter() - started
+
+    total = sum(counts.values())
+    print(f"Wrote {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s):")
+    for table in TABLE_ORDER:
+        print(f"  {table:<10}{counts[table]:>10}")
+    print(f"Private keys in {os.path.abspath(args.keys_dir)}, "
+          f"logins in {os.path.abspath(os.path.join(args.output, 'credentials.csv'))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -80,7 +80,6 @@ class ClassForm(Form):
 
         # Get form data using get_data() method from Form base class
         form_data = self.get_data()
-        logger.info(f"Form data: {form_data}")
 
         malop = form_data.get("MALOP", "")
         tenlop = form_data.get("TENLOP", "")
@@ -203,7 +202,7 @@ class ClassManagementScreen(ttk.Frame):
         self.classes_table.delete_button.configure(
             command=self._on_delete_clicked)
         self.classes_table.refresh_button.configure(
-            command=self._load_class_list)
+            command=lambda: self._load_class_list(refresh=True))
 
         # Create separator between list and form
         self.separator = ttk.Separator(self.main_container, orient='vertical')
@@ -226,18 +225,18 @@ class ClassManagementScreen(ttk.Frame):
         )
         self.class_form.pack(fill=tk.BOTH, expand=True)
 
-    def _load_class_list(self):
-        """Load class list data from database."""
+    def _load_class_list(self, refresh: bool = False):
+        """Load class list data from database; refresh bypasses the cache."""
         try:
             # Get classes managed by the current employee
             employee_id = self.employee_session.employee_id
 
             if employee_id:
                 # Sử dụng SP_SEL_LOP_BY_MANV cho lấy danh sách lớp của nhân viên
-                classes = self.db.get_classes_by_employee(employee_id)
+                classes = self.db.get_classes_by_employee(employee_id, refresh=refresh)
             else:
                 # Sử dụng SP_SEL_LOP cho lấy tất cả các lớp
-                classes = self.db.get_classes()
+                classes = self.db.get_classes(refresh=refresh)
 
             # Transform data for the table
             table_data = []
@@ -339,8 +338,6 @@ class ClassManagementScreen(ttk.Frame):
                 return
 
             # Populate form với dữ liệu
-            logger.info(f"Populating form with class data: {selected_class}")
-
             # Chuẩn bị dữ liệu cho form
             form_data = {
                 'MALOP': selected_class.get('MALOP', ''),
@@ -384,8 +381,8 @@ class ClassManagementScreen(ttk.Frame):
             if success:
                 logger.info(f"Successfully deleted class: {selected_id}")
                 MessageDisplay.show_info("Thành Công", "Xóa lớp thành công")
-                # Tải lại danh sách lớp sau khi xóa
-                self._load_class_list()
+                # Chỉ gỡ dòng đã xóa, không tải lại cả danh sách
+                self.classes_table.apply_changes(deletes=[selected_id])
             else:
                 logger.error(f"Failed to delete class: {selected_id}")
                 MessageDisplay.show_error("Lỗi", "Không thể xóa lớp")
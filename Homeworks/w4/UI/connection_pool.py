@@ -0,0 +1,349 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from instrumentation import get_metrics
+
+"""
+Connection Pool Module
+
+Keeps a bounded set of open database connections so that every stored
+procedure call or query does not pay for a full ODBC handshake.
+
+Usage Examples:
+--------------
+pool = get_pool(connection_string, pyodbc.connect)
+
+with pool.connection() as conn:
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+
+print(pool.stats())
+"""
+
+logger = logging.getLogger('connection_pool')
+
+
+class _PooledConnection:
+    """Bookkeeping wrapper around a raw DB-API connection."""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections."""
+
+    def __init__(self, connect: Callable[[], Any], max_size: int = 5,
+                 idle_timeout: float = 300.0, max_lifetime: float = 1800.0,
+                 checkout_timeout: float = 30.0,
+                 health_check_after: Optional[float] = 30.0):
+        """Initialize the pool.
+
+        Args:
+            connect: Zero-argument factory that opens a new connection
+            max_size: Maximum number of open connections (idle + in use)
+            idle_timeout: Seconds an idle connection may sit in the pool
+            max_lifetime: Seconds after which a connection is recycled
+            checkout_timeout: Seconds to wait for a free connection
+            health_check_after: Ping connections idle for longer than this many
+                seconds on checkout (0 pings every time, None disables the check)
+        """
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._closed = False
+
+        # Statistics
+        self._checkouts = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._evictions = 0
+        self._health_check_failures = 0
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle and in use."""
+        with self._lock:
+            return len(self._idle) + len(self._in_use)
+
+    def acquire(self) -> Any:
+        """
+        Check out a connection from the pool.
+
+        Returns:
+            An open connection
+
+        Raises:
+            TimeoutError: If no connection becomes available in time
+        """
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        waited = False
+
+        while True:
+            expired = []
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                entry = self._take_idle(expired)
+                if entry is None and len(self._in_use) + len(self._idle) >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Timed out after {self.checkout_timeout}s waiting for a database connection")
+                    waited = True
+                    self._lock.wait(remaining)
+                    continue
+
+                # Reserve the slot before leaving the lock so concurrent
+                # callers cannot overshoot max_size while we connect
+                reserved = entry is None
+                if reserved:
+                    placeholder = _PooledConnection(None)
+                    self._in_use[id(placeholder)] = placeholder
+
+            for stale in expired:
+                self._close_quietly(stale.conn)
+
+            if reserved:
+                try:
+                    with get_metrics().timer('db.connect'):
+                        entry = _PooledConnection(self._connect())
+                except Exception:
+                    with self._lock:
+                        del self._in_use[id(placeholder)]
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    del self._in_use[id(placeholder)]
+                    self._misses += 1
+            elif self._needs_health_check(entry) and not self._is_healthy(entry.conn):
+                with self._lock:
+                    self._health_check_failures += 1
+                self._close_quietly(entry.conn)
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._in_use[id(entry.conn)] = entry
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                    self._wait_time += elapsed
+                    self._max_wait_time = max(self._max_wait_time, elapsed)
+            get_metrics().record('db.checkout', elapsed)
+            return entry.conn
+
+    def release(self, conn: Any, discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Any open transaction is rolled back so the next borrower starts clean.
+
+        Args:
+            conn: Connection previously returned by acquire()
+            discard: Close the connection instead of keeping it
+        """
+        with self._lock:
+            entry = self._in_use.pop(id(conn), None)
+
+        if entry is None:
+            logger.warning("Released a connection that is not owned by the pool")
+            self._close_quietly(conn)
+            return
+
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            if discard or self._closed:
+                to_close = conn
+            elif self._expired(entry, time.monotonic()):
+                self._evictions += 1
+                to_close = conn
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                to_close = None
+            self._lock.notify()
+
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+        # Idle connections at the bottom of the stack are rarely reused;
+        # sweep them here so they do not outlive their idle timeout
+        self.evict_idle()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            # Connection-level failures leave the handle in an unknown state
+            discard = self._is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def evict_idle(self) -> int:
+        """
+        Close idle connections that exceeded their idle timeout or lifetime.
+
+        Returns:
+            Number of connections closed
+        """
+        now = time.monotonic()
+        with self._lock:
+            keep, expired = [], []
+            for entry in self._idle:
+                (expired if self._expired(entry, now) else keep).append(entry)
+            self._idle = keep
+            self._evictions += len(expired)
+
+        for entry in expired:
+            self._close_quietly(entry.conn)
+        return len(expired)
+
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+
+        for entry in idle:
+            self._close_quietly(entry.conn)
+        logger.info("Connection pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        with self._lock:
+            return {
+                'size': len(self._idle) + len(self._in_use),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'misses': self._misses,
+                'waits': self._waits,
+                'total_wait_time': self._wait_time,
+                'max_wait_time': self._max_wait_time,
+                'evictions': self._evictions,
+                'health_check_failures': self._health_check_failures,
+            }
+
+    def _take_idle(self, expired: List[_PooledConnection]) -> Optional[_PooledConnection]:
+        """
+        Pop the most recently used live connection. Caller holds the lock.
+
+        Expired connections are moved to `expired` so the caller can close
+        them after releasing the lock.
+        """
+        now = time.monotonic()
+        while self._idle:
+            entry = self._idle.pop()
+            if not self._expired(entry, now):
+                return entry
+            self._evictions += 1
+            expired.append(entry)
+        return None
+
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        """Check whether a connection exceeded its idle timeout or lifetime."""
+        return (now - entry.last_used > self.idle_timeout or
+                now - entry.created_at > self.max_lifetime)
+
+    def _needs_health_check(self, entry: _PooledConnection) -> bool:
+        """Check whether a connection has been idle long enough to need a ping."""
+        if self.health_check_after is None:
+            return False
+        return time.monotonic() - entry.last_used >= self.health_check_after
+
+    @staticmethod
+    def _is_healthy(conn: Any) -> bool:
+        """Ping a connection with a trivial query."""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection: {str(e)}")
+            return False
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """Guess whether an error means the connection itself is broken."""
+        # ODBC SQLSTATE class 08 is "connection exception"
+        args = getattr(error, 'args', ())
+        return bool(args) and isinstance(args[0], str) and args[0].startswith('08')
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        """Close a connection, ignoring errors."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connection_string: str, connect: Callable[[str], Any],
+             **options) -> ConnectionPool:
+    """
+    Get the process-wide pool for a connection string, creating it if needed.
+
+    Args:
+        connection_string: ODBC connection string identifying the pool
+        connect: Function that opens a connection from a connection string
+        **options: Extra ConnectionPool arguments used on first creation
+
+    Returns:
+        The shared ConnectionPool
+    """
+    with _pools_lock:
+        pool = _pools.get(connection_string)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(lambda: connect(connection_string), **options)
+            _pools[connection_string] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every pool created through get_pool()."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
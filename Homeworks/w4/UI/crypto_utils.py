@@ -1,11 +1,20 @@
 import base64
 import hashlib
+import hmac
 import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization, hashes
-from typing import Tuple, Optional, Dict, Any
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from typing import Tuple, Optional, Dict, Any, List, Sequence, Union
 import logging
 
+from instrumentation import timer, timed, increment
+
 """
 Crypto Utilities Module for Secure Data Management
 
@@ -15,6 +24,7 @@ This module provides cryptographic functionality for the client application, inc
 3. Database-friendly encoding and decoding of binary data
 4. Password hashing
 5. Combined operations for database storage
+6. Envelope encryption with per-class AES-GCM data keys
 
 Usage Examples:
 --------------
@@ -24,7 +34,12 @@ crypto_mgr = CryptoManager()
 # Generate a key pair
 private_key_path, public_key_pem = crypto_mgr.generate_key_pair("EMP001", "password")
 
-# Load keys
+# Or generate elsewhere (e.g. a worker process) and publish the key later
+encrypted_pem, public_key_pem = CryptoManager.create_key_pair("password")
+staged_path = crypto_mgr.stage_private_key("EMP001", encrypted_pem)
+crypto_mgr.commit_private_key("EMP001", staged_path)  # Or discard_staged_key(staged_path)
+
+# Load keys (the unlocked private key is cached until PRIVATE_KEY_TTL expires)
 private_key = crypto_mgr.load_private_key("EMP001", "password")
 public_key = crypto_mgr.load_public_key(public_key_pem)
 
@@ -32,6 +47,15 @@ public_key = crypto_mgr.load_public_key(public_key_pem)
 encrypted_data = crypto_mgr.encrypt_data(public_key_pem, "sensitive data")
 decrypted_data = crypto_mgr.decrypt_data(private_key, encrypted_data)
 
+# Decrypt a whole grade sheet in parallel (results keep input order)
+results = crypto_mgr.decrypt_many(private_key, [cipher1, cipher2])
+
+# Envelope mode: one RSA-wrapped AES key per class encrypts all its grades
+data_key = crypto_mgr.generate_data_key()
+wrapped_key = crypto_mgr.wrap_data_key(public_key_pem, data_key)  # Store with the class
+encrypted_grade = crypto_mgr.encrypt_with_data_key(data_key, "8.5")
+decrypted_grade = crypto_mgr.decrypt_data(private_key, encrypted_grade, data_key)
+
 # DB operations
 db_ready_data = crypto_mgr.encrypt_data_for_db(public_key_pem, "50000")  # For DB storage
 original_data = crypto_mgr.decrypt_data_from_db(private_key, db_ready_data)  # After DB retrieval
@@ -39,6 +63,152 @@ original_data = crypto_mgr.decrypt_data_from_db(private_key, db_ready_data)  # A
 
 logger = logging.getLogger('crypto_utils')
 
+# Below this many items the thread pool costs more than it saves
+PARALLEL_DECRYPT_THRESHOLD = 16
+
+# Envelope ciphertext layout: MAGIC | VERSION | 12-byte nonce | AES-GCM ciphertext+tag.
+# Legacy values are bare RSA-OAEP ciphertexts, exactly one key size long.
+ENVELOPE_MAGIC = b'QLE'
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = ENVELOPE_MAGIC + bytes([ENVELOPE_VERSION])
+ENVELOPE_NONCE_SIZE = 12
+
+# Seconds an unlocked private key stays in memory after it was loaded
+PRIVATE_KEY_TTL = 900
+
+
+class _PublicKeyCache:
+    """Bounded LRU cache of parsed public keys keyed by PEM fingerprint."""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._keys: 'OrderedDict[str, rsa.RSAPublicKey]' = OrderedDict()
+        self._owners: Dict[str, str] = {}  # Employee ID -> fingerprint
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(public_key_pem: Union[str, bytes]) -> str:
+        """SHA-256 fingerprint of a PEM string or bytes, ignoring surrounding whitespace."""
+        if isinstance(public_key_pem, str):
+            public_key_pem = public_key_pem.encode()
+        return hashlib.sha256(public_key_pem.strip()).hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[rsa.RSAPublicKey]:
+        with self._lock:
+            public_key = self._keys.get(fingerprint)
+            if public_key is None:
+                self.misses += 1
+                return None
+            self._keys.move_to_end(fingerprint)
+            self.hits += 1
+            return public_key
+
+    def put(self, fingerprint: str, public_key: rsa.RSAPublicKey,
+            employee_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._keys[fingerprint] = public_key
+            self._keys.move_to_end(fingerprint)
+            if employee_id:
+                previous = self._owners.get(employee_id)
+                if previous and previous != fingerprint:
+                    # The employee's key changed; drop the stale entry
+                    self._keys.pop(previous, None)
+                self._owners[employee_id] = fingerprint
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+    def invalidate(self, fingerprint: Optional[str] = None,
+                   employee_id: Optional[str] = None) -> None:
+        with self._lock:
+            if employee_id:
+                fingerprint = self._owners.pop(employee_id, None) or fingerprint
+            if fingerprint:
+                self._keys.pop(fingerprint, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._owners.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._keys), 'max_size': self.max_size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class _PrivateKeyCache:
+    """Unlocked private keys by employee ID, so the PKCS8 KDF runs once per TTL."""
+
+    class _Entry:
+        __slots__ = ('private_key', 'path', 'mtime', 'salt', 'verifier', 'expires_at')
+
+        def __init__(self, private_key, path, mtime, salt, verifier, expires_at):
+            self.private_key = private_key
+            self.path = path
+            self.mtime = mtime
+            self.salt = salt
+            self.verifier = verifier
+            self.expires_at = expires_at
+
+    def __init__(self, ttl: float = PRIVATE_KEY_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, '_PrivateKeyCache._Entry'] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _verifier(salt: bytes, password: str) -> bytes:
+        return hashlib.sha256(salt + password.encode()).digest()
+
+    def get(self, employee_id: str, password: str, path: str,
+            mtime: float) -> Optional[rsa.RSAPrivateKey]:
+        """
+        Return the cached key if it is fresh, came from the same file and
+        was unlocked with the same password.
+        """
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            if entry is not None and (time.monotonic() >= entry.expires_at or
+                                      entry.path != path or entry.mtime != mtime):
+                del self._entries[employee_id]
+                entry = None
+            if entry is None or not hmac.compare_digest(
+                    entry.verifier, self._verifier(entry.salt, password)):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.private_key
+
+    def put(self, employee_id: str, password: str, path: str, mtime: float,
+            private_key: rsa.RSAPrivateKey) -> None:
+        salt = os.urandom(16)
+        entry = self._Entry(private_key, path, mtime, salt,
+                            self._verifier(salt, password),
+                            time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[employee_id] = entry
+
+    def invalidate(self, employee_id: Optional[str] = None) -> None:
+        """Drop one employee's key, or every key when no ID is given."""
+        with self._lock:
+            if employee_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(employee_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every CryptoManager in the process
+_public_key_cache = _PublicKeyCache()
+_private_key_cache = _PrivateKeyCache()
+
 
 class CryptoManager:
     """Manages cryptographic operations for the client application."""
@@ -52,13 +222,16 @@ class CryptoManager:
         self.keys_dir = keys_dir
         os.makedirs(keys_dir, exist_ok=True)
 
-    def generate_key_pair(self, employee_id: str, password: str) -> Tuple[str, str]:
+    def generate_key_pair(self, employee_id: str, password: str,
+                          private_key: Optional[rsa.RSAPrivateKey] = None) -> Tuple[str, str]:
         """
         Generate an RSA key pair for an employee.
 
         Args:
             employee_id: Employee ID to use as the key identifier
             password: Password to encrypt the private key
+            private_key: Pre-generated key to use (e.g. from the key
+                         factory) instead of generating one
 
         Returns:
             Tuple of (private_key_path, public_key_pem)
@@ -70,38 +243,13 @@ class CryptoManager:
                 raise ValueError(
                     "Employee ID and password are required for key generation")
 
-            # Ensure keys directory exists
-            os.makedirs(self.keys_dir, exist_ok=True)
-
-            # Generate a new RSA key pair
-            private_key = rsa.generate_private_key(
-                public_exponent=65537,
-                key_size=2048
-            )
-
-            # Get the public key in PEM format
-            public_key = private_key.public_key()
-            public_key_pem = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            ).decode('utf-8')
-
-            # Encrypt and save the private key
-            private_key_path = os.path.join(
-                self.keys_dir, f"{employee_id}.pem")
-            encrypted_private_key = private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.BestAvailableEncryption(
-                    password.encode())
-            )
-
-            with open(private_key_path, 'wb') as f:
-                f.write(encrypted_private_key)
+            encrypted_private_key, public_key_pem = self.create_key_pair(
+                password, private_key)
+            private_key_path = self.store_private_key(
+                employee_id, encrypted_private_key)
 
             logger.info(
                 f"Key pair generated successfully for employee {employee_id}")
-            logger.info(f"Private key saved at: {private_key_path}")
 
             return private_key_path, public_key_pem
 
@@ -109,10 +257,143 @@ class CryptoManager:
             logger.error(f"Error generating key pair: {str(e)}")
             raise
 
+    @staticmethod
+    @timed('crypto.keygen')
+    def new_private_key() -> rsa.RSAPrivateKey:
+        """Generate a 2048-bit RSA private key."""
+        return rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048
+        )
+
+    @staticmethod
+    def create_key_pair(password: str,
+                        private_key: Optional[rsa.RSAPrivateKey] = None) -> Tuple[bytes, str]:
+        """
+        Generate an RSA key pair without storing it.
+
+        Safe to call from worker processes; nothing touches the key
+        directory or the caches.
+
+        Args:
+            password: Password to encrypt the private key
+            private_key: Pre-generated key to serialize instead of a new one
+
+        Returns:
+            Tuple of (encrypted private key PEM bytes, public_key_pem)
+        """
+        if private_key is None:
+            private_key = CryptoManager.new_private_key()
+
+        public_key_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('utf-8')
+
+        return CryptoManager.wrap_private_key(private_key, password), public_key_pem
+
+    @staticmethod
+    @timed('crypto.key_wrap')
+    def wrap_private_key(private_key: rsa.RSAPrivateKey, password: str) -> bytes:
+        """
+        Serialize a private key as PKCS8 PEM encrypted with a password.
+
+        Args:
+            private_key: Key to serialize
+            password: Password to encrypt the key with
+
+        Returns:
+            Encrypted private key PEM bytes
+        """
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.BestAvailableEncryption(
+                password.encode())
+        )
+
+    def private_key_path(self, employee_id: str) -> str:
+        """Path of an employee's private key file."""
+        return os.path.join(self.keys_dir, f"{employee_id}.pem")
+
+    def stage_private_key(self, employee_id: str, encrypted_private_key: bytes) -> str:
+        """
+        Write an encrypted private key to a temporary file next to its final path.
+
+        The key becomes visible only once commit_private_key() moves it into
+        place, so a failed import never leaves a half-written or orphaned key.
+
+        Args:
+            employee_id: Employee the key belongs to
+            encrypted_private_key: Encrypted PEM bytes
+
+        Returns:
+            Path of the staged file
+        """
+        os.makedirs(self.keys_dir, exist_ok=True)
+        fd, staged_path = tempfile.mkstemp(
+            prefix=f".{employee_id}.", suffix='.tmp', dir=self.keys_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encrypted_private_key)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            self.discard_staged_key(staged_path)
+            raise
+        return staged_path
+
+    def commit_private_key(self, employee_id: str, staged_path: str) -> str:
+        """
+        Atomically move a staged private key to the employee's key path.
+
+        Args:
+            employee_id: Employee the key belongs to
+            staged_path: Path returned by stage_private_key()
+
+        Returns:
+            Path of the private key file
+        """
+        private_key_path = self.private_key_path(employee_id)
+        os.replace(staged_path, private_key_path)
+
+        # Any key cached for this employee is now stale
+        self.invalidate_public_key(employee_id=employee_id)
+        self.forget_private_key(employee_id)
+        return private_key_path
+
+    @staticmethod
+    def discard_staged_key(staged_path: str) -> None:
+        """Delete a staged private key that will not be committed."""
+        try:
+            os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing staged key {staged_path}: {str(e)}")
+
+    def store_private_key(self, employee_id: str, encrypted_private_key: bytes) -> str:
+        """
+        Atomically write an employee's encrypted private key.
+
+        Args:
+            employee_id: Employee the key belongs to
+            encrypted_private_key: Encrypted PEM bytes
+
+        Returns:
+            Path of the private key file
+        """
+        return self.commit_private_key(
+            employee_id, self.stage_private_key(employee_id, encrypted_private_key))
+
     def load_private_key(self, employee_id: str, password: str) -> Optional[rsa.RSAPrivateKey]:
         """
         Load a private key from file.
 
+        Unlocked keys are cached process-wide for PRIVATE_KEY_TTL seconds, so
+        later calls with the same password skip the slow PKCS8 KDF. A cached
+        key is dropped if the PEM file changes on disk.
+
         Args:
             employee_id: Employee ID to load the key for
             password: Password to decrypt the private key
@@ -121,20 +402,30 @@ class CryptoManager:
             RSA private key object or None if loading fails
         """
         try:
-            private_key_path = os.path.join(
-                self.keys_dir, f"{employee_id}.pem")
+            private_key_path = os.path.abspath(self.private_key_path(employee_id))
 
             if not os.path.exists(private_key_path):
                 logger.error(f"Private key file not found: {private_key_path}")
+                _private_key_cache.invalidate(employee_id)
                 return None
 
-            with open(private_key_path, 'rb') as f:
-                private_key_data = f.read()
+            mtime = os.stat(private_key_path).st_mtime
+            private_key = _private_key_cache.get(
+                employee_id, password, private_key_path, mtime)
+            if private_key is not None:
+                increment('crypto.private_key_cache_hit')
+                return private_key
 
-            private_key = serialization.load_pem_private_key(
-                private_key_data,
-                password=password.encode()
-            )
+            with timer('crypto.private_key_load'):
+                with open(private_key_path, 'rb') as f:
+                    private_key_data = f.read()
+
+                private_key = serialization.load_pem_private_key(
+                    private_key_data,
+                    password=password.encode()
+                )
+            _private_key_cache.put(
+                employee_id, password, private_key_path, mtime, private_key)
 
             return private_key
 
@@ -142,29 +433,43 @@ class CryptoManager:
             logger.error(f"Error loading private key: {str(e)}")
             return None
 
-    def load_public_key(self, public_key_pem: str) -> Optional[rsa.RSAPublicKey]:
+    def load_public_key(self, public_key_pem: Union[str, bytes],
+                        employee_id: Optional[str] = None) -> Optional[rsa.RSAPublicKey]:
         """
-        Load a public key from a PEM string.
+        Load a public key from a PEM string or bytes.
+
+        Parsed keys are kept in a process-wide LRU cache, so repeated
+        encryptions with the same PEM skip parsing.
 
         Args:
             public_key_pem: Public key in PEM format
+            employee_id: Owner of the key; a new key for the same employee
+                         replaces the previously cached one
 
         Returns:
             RSA public key object or None if loading fails
         """
         try:
-            if not public_key_pem or not isinstance(public_key_pem, str):
+            if not public_key_pem or not isinstance(public_key_pem, (str, bytes)):
                 logger.error("Invalid public key PEM string provided")
                 return None
 
-            # Ensure the PEM string is properly encoded
-            if isinstance(public_key_pem, str):
-                public_key_data = public_key_pem.encode()
-            else:
-                public_key_data = public_key_pem
+            fingerprint = _public_key_cache.fingerprint(public_key_pem)
+            public_key = _public_key_cache.get(fingerprint)
+            if public_key is not None:
+                if employee_id:
+                    _public_key_cache.put(fingerprint, public_key, employee_id)
+                return public_key
 
             # Load the public key
-            public_key = serialization.load_pem_public_key(public_key_data)
+            with timer('crypto.public_key_load'):
+                # Ensure the PEM string is properly encoded
+                if isinstance(public_key_pem, str):
+                    public_key_data = public_key_pem.encode()
+                else:
+                    public_key_data = public_key_pem
+                public_key = serialization.load_pem_public_key(public_key_data)
+            _public_key_cache.put(fingerprint, public_key, employee_id)
 
             return public_key
 
@@ -172,6 +477,40 @@ class CryptoManager:
             logger.error(f"Error loading public key: {str(e)}")
             return None
 
+    @staticmethod
+    def forget_private_key(employee_id: Optional[str] = None) -> None:
+        """
+        Remove unlocked private keys from the cache.
+
+        Args:
+            employee_id: Employee whose key to drop; None drops all keys
+        """
+        _private_key_cache.invalidate(employee_id)
+
+    @staticmethod
+    def private_key_cache_stats() -> Dict[str, int]:
+        """Get private key cache statistics (size, ttl, hits, misses)."""
+        return _private_key_cache.stats()
+
+    @staticmethod
+    def invalidate_public_key(public_key_pem: Optional[Union[str, bytes]] = None,
+                              employee_id: Optional[str] = None) -> None:
+        """
+        Drop a parsed public key from the cache.
+
+        Args:
+            public_key_pem: PEM of the key to drop
+            employee_id: Drop whichever key is cached for this employee
+        """
+        fingerprint = _public_key_cache.fingerprint(
+            public_key_pem) if public_key_pem else None
+        _public_key_cache.invalidate(fingerprint, employee_id)
+
+    @staticmethod
+    def public_key_cache_stats() -> Dict[str, int]:
+        """Get public key cache statistics (size, hits, misses)."""
+        return _public_key_cache.stats()
+
     def encrypt_data(self, public_key_pem: str, data: str) -> bytes:
         """
         Encrypt data using an RSA public key.
@@ -195,8 +534,6 @@ class CryptoManager:
             # Check data type and convert if necessary
             if not isinstance(data, str):
                 data = str(data)
-                logger.info(
-                    f"Converted non-string data to string for encryption: {type(data).__name__}")
 
             # Load the public key (using our new method)
             public_key = self.load_public_key(public_key_pem)
@@ -205,30 +542,33 @@ class CryptoManager:
                 raise ValueError("Invalid public key format")
 
             # Encrypt the data
-            encrypted_data = public_key.encrypt(
-                data.encode(),
-                padding.OAEP(
-                    mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                    algorithm=hashes.SHA256(),
-                    label=None
+            with timer('crypto.rsa_encrypt'):
+                encrypted_data = public_key.encrypt(
+                    data.encode(),
+                    padding.OAEP(
+                        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                        algorithm=hashes.SHA256(),
+                        label=None
+                    )
                 )
-            )
 
-            logger.info(
-                f"Data encrypted successfully. Length: {len(encrypted_data)} bytes")
             return encrypted_data
 
         except Exception as e:
             logger.error(f"Encryption error: {str(e)}")
             raise
 
-    def decrypt_data(self, private_key: rsa.RSAPrivateKey, encrypted_data: bytes) -> str:
+    def decrypt_data(self, private_key: rsa.RSAPrivateKey, encrypted_data: bytes,
+                     data_key: Optional[bytes] = None) -> str:
         """
         Decrypt data using an RSA private key.
 
+        Envelope-format values are decrypted with the data key instead.
+
         Args:
             private_key: RSA private key object
             encrypted_data: Encrypted data as bytes
+            data_key: Unwrapped AES data key for envelope-format values
 
         Returns:
             Decrypted data as string
@@ -242,25 +582,42 @@ class CryptoManager:
                 logger.error("No data provided for decryption")
                 raise ValueError("Encrypted data is required for decryption")
 
-            # Check encrypted_data type and convert if necessary
-            if isinstance(encrypted_data, str):
-                # Assume it's a base64 encoded string
-                try:
-                    encrypted_data = base64.b64decode(encrypted_data)
-                    logger.info(
-                        "Converted string encrypted data from base64 to bytes")
-                except:
-                    logger.error(
-                        "Failed to convert string encrypted data from base64")
-                    raise ValueError(
-                        "Invalid encrypted data format (not valid base64)")
-            elif not isinstance(encrypted_data, bytes):
-                logger.error(
-                    f"Invalid encrypted data type: {type(encrypted_data).__name__}")
-                raise TypeError(
-                    "Encrypted data must be bytes or base64 encoded string")
+            return self._decrypt_bytes(
+                private_key, encrypted_data, data_key)
 
-            # Decrypt the data
+        except Exception as e:
+            logger.error(f"Decryption error: {str(e)}")
+            raise
+
+    @staticmethod
+    def _decrypt_bytes(private_key: rsa.RSAPrivateKey, encrypted_data: Union[bytes, str],
+                       data_key: Optional[bytes] = None) -> str:
+        """Decrypt a single RSA-OAEP or envelope ciphertext without logging."""
+        # Check encrypted_data type and convert if necessary
+        if isinstance(encrypted_data, str):
+            # Assume it's a base64 encoded string
+            try:
+                encrypted_data = base64.b64decode(encrypted_data)
+            except Exception:
+                raise ValueError(
+                    "Invalid encrypted data format (not valid base64)")
+        elif isinstance(encrypted_data, (bytearray, memoryview)):
+            encrypted_data = bytes(encrypted_data)
+        elif not isinstance(encrypted_data, bytes):
+            raise TypeError(
+                "Encrypted data must be bytes or base64 encoded string")
+
+        if CryptoManager.is_envelope(encrypted_data, private_key.key_size // 8):
+            if not data_key:
+                raise ValueError("Data key is required for envelope-encrypted data")
+            header = encrypted_data[:len(ENVELOPE_HEADER)]
+            nonce_end = len(ENVELOPE_HEADER) + ENVELOPE_NONCE_SIZE
+            nonce = encrypted_data[len(ENVELOPE_HEADER):nonce_end]
+            with timer('crypto.aes_decrypt'):
+                return AESGCM(data_key).decrypt(
+                    nonce, encrypted_data[nonce_end:], header).decode()
+
+        with timer('crypto.rsa_decrypt'):
             decrypted_data = private_key.decrypt(
                 encrypted_data,
                 padding.OAEP(
@@ -269,13 +626,148 @@ class CryptoManager:
                     label=None
                 )
             )
+        return decrypted_data.decode()
 
-            logger.info("Data decrypted successfully")
-            return decrypted_data.decode()
+    def decrypt_many(self, private_key: rsa.RSAPrivateKey,
+                     ciphertexts: Sequence[Union[bytes, str, None]],
+                     max_workers: Optional[int] = None,
+                     data_key: Optional[bytes] = None) -> List[Tuple[Optional[str], Optional[Exception]]]:
+        """
+        Decrypt many values with the same private key using a thread pool.
 
-        except Exception as e:
-            logger.error(f"Decryption error: {str(e)}")
-            raise
+        OpenSSL releases the GIL during the RSA private-key operation, so a
+        grade sheet decrypts in parallel across cores.
+
+        Args:
+            private_key: RSA private key object
+            ciphertexts: Encrypted values as bytes or base64 strings
+            max_workers: Number of worker threads (default: CPU count, max 8)
+            data_key: Unwrapped AES data key for envelope-format values
+
+        Returns:
+            List of (plaintext, error) tuples in the same order as the input;
+            exactly one element of each tuple is None
+        """
+        if not private_key:
+            raise ValueError("Private key is required for decryption")
+
+        def decrypt_one(encrypted_data):
+            if not encrypted_data:
+                return None, ValueError("Encrypted data is required for decryption")
+            try:
+                return self._decrypt_bytes(private_key, encrypted_data, data_key), None
+            except Exception as e:
+                return None, e
+
+        if len(ciphertexts) < PARALLEL_DECRYPT_THRESHOLD:
+            results = [decrypt_one(c) for c in ciphertexts]
+        else:
+            workers = max_workers or min(8, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(decrypt_one, ciphertexts))
+
+        failures = sum(1 for _, error in results if error is not None)
+        if failures:
+            logger.warning(
+                f"Failed to decrypt {failures} of {len(results)} values")
+        return results
+
+    @staticmethod
+    def generate_data_key() -> bytes:
+        """
+        Generate a random AES-256 data key for envelope encryption.
+
+        Returns:
+            32-byte data key
+        """
+        return AESGCM.generate_key(bit_length=256)
+
+    def wrap_data_key(self, public_key_pem: str, data_key: bytes) -> bytes:
+        """
+        Encrypt a data key with an RSA public key so it can be stored.
+
+        Args:
+            public_key_pem: Public key in PEM format
+            data_key: Raw AES data key
+
+        Returns:
+            RSA-OAEP encrypted data key
+        """
+        public_key = self.load_public_key(public_key_pem)
+        if not public_key:
+            raise ValueError("Invalid public key format")
+
+        with timer('crypto.rsa_encrypt'):
+            return public_key.encrypt(
+                data_key,
+                padding.OAEP(
+                    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                    algorithm=hashes.SHA256(),
+                    label=None
+                )
+            )
+
+    @staticmethod
+    def unwrap_data_key(private_key: rsa.RSAPrivateKey, wrapped_key: bytes) -> bytes:
+        """
+        Decrypt a data key previously wrapped with wrap_data_key.
+
+        Args:
+            private_key: RSA private key object
+            wrapped_key: RSA-OAEP encrypted data key
+
+        Returns:
+            Raw AES data key
+        """
+        if not private_key:
+            raise ValueError("Private key is required to unwrap a data key")
+
+        with timer('crypto.rsa_decrypt'):
+            return private_key.decrypt(
+                bytes(wrapped_key),
+                padding.OAEP(
+                    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                    algorithm=hashes.SHA256(),
+                    label=None
+                )
+            )
+
+    @staticmethod
+    def encrypt_with_data_key(data_key: bytes, data: str) -> bytes:
+        """
+        Encrypt data with an AES-GCM data key using the versioned envelope format.
+
+        Args:
+            data_key: Raw AES data key
+            data: String data to encrypt
+
+        Returns:
+            Envelope ciphertext (header, nonce, ciphertext and tag)
+        """
+        if not data_key:
+            raise ValueError("Data key is required for encryption")
+
+        nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+        # The header is authenticated so the version byte cannot be tampered with
+        with timer('crypto.aes_encrypt'):
+            ciphertext = AESGCM(data_key).encrypt(
+                nonce, str(data).encode(), ENVELOPE_HEADER)
+        return ENVELOPE_HEADER + nonce + ciphertext
+
+    @staticmethod
+    def is_envelope(encrypted_data: bytes, rsa_ciphertext_size: int = 256) -> bool:
+        """
+        Check whether a value uses the envelope format rather than bare RSA.
+
+        Args:
+            encrypted_data: Encrypted value as bytes
+            rsa_ciphertext_size: Length of a legacy RSA ciphertext in bytes
+
+        Returns:
+            True if the value is an envelope ciphertext
+        """
+        return (len(encrypted_data) != rsa_ciphertext_size and
+                encrypted_data[:len(ENVELOPE_HEADER)] == ENVELOPE_HEADER)
 
     @staticmethod
     def hash_password(password: str) -> bytes:
@@ -320,10 +812,7 @@ class CryptoManager:
                     # Try to convert to bytes
                     binary_data = bytes(binary_data)
 
-            encoded = base64.b64encode(binary_data).decode('utf-8')
-            logger.debug(
-                f"Encoded {len(binary_data)} bytes to {len(encoded)} character base64 string")
-            return encoded
+            return base64.b64encode(binary_data).decode('utf-8')
 
         except Exception as e:
             logger.error(f"Error encoding binary data for DB: {str(e)}")
@@ -355,10 +844,7 @@ class CryptoManager:
                     # Try to convert to string
                     encoded_data = str(encoded_data)
 
-            decoded = base64.b64decode(encoded_data)
-            logger.debug(
-                f"Decoded {len(encoded_data)} character base64 string to {len(decoded)} bytes")
-            return decoded
+            return base64.b64decode(encoded_data)
 
         except Exception as e:
             logger.error(f"Error decoding data from DB: {str(e)}")
@@ -386,13 +872,15 @@ class CryptoManager:
             logger.error(f"Error in encrypt_data_for_db: {str(e)}")
             raise
 
-    def decrypt_data_from_db(self, private_key: rsa.RSAPrivateKey, encoded_data: str) -> str:
+    def decrypt_data_from_db(self, private_key: rsa.RSAPrivateKey, encoded_data: str,
+                             data_key: Optional[bytes] = None) -> str:
         """
         Decrypt data retrieved from database storage.
 
         Args:
             private_key: RSA private key object
             encoded_data: Base64 encoded encrypted data from database
+            data_key: Unwrapped AES data key for envelope-format values
 
         Returns:
             Decrypted data as string
@@ -402,7 +890,7 @@ class CryptoManager:
             encrypted_bytes = self.decode_from_db(encoded_data)
 
             # Decrypt the data
-            return self.decrypt_data(private_key, encrypted_bytes)
+            return self.decrypt_data(private_key, encrypted_bytes, data_key)
 
         except Exception as e:
             logger.error(f"Error in decrypt_data_from_db: {str(e)}")
@@ -1,10 +1,15 @@
 import pyodbc
 import logging
+import threading
 import base64
 import hashlib
-from typing import Optional, Dict, List, Any, Tuple, Union
+from typing import Optional, Dict, List, Any, Tuple, Union, Iterator
 from datetime import datetime
 
+from connection_pool import ConnectionPool, get_pool
+from reference_cache import get_reference_cache
+from instrumentation import timer
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -13,230 +18,501 @@ logging.basicConfig(
 logger = logging.getLogger('db_connector')
 
 
+# Parameters of a stored procedure, in declaration order
+_SPROC_PARAMS_QUERY = """
+SELECT p.name, TYPE_NAME(p.user_type_id) AS type_name, p.max_length,
+       p.precision, p.scale, p.is_output
+FROM sys.parameters p
+WHERE p.object_id = OBJECT_ID(?, 'P')
+ORDER BY p.parameter_id
+"""
+
+
+def _sql_type_name(type_name: str, max_length: int, precision: int, scale: int) -> str:
+    """Build a DECLARE-able type name from sys.parameters columns."""
+    type_name = type_name.upper()
+    if type_name in ('VARCHAR', 'CHAR', 'VARBINARY', 'BINARY'):
+        return f"{type_name}({'MAX' if max_length == -1 else max_length})"
+    if type_name in ('NVARCHAR', 'NCHAR'):
+        # max_length is in bytes; N types use two per character
+        return f"{type_name}({'MAX' if max_length == -1 else max_length // 2})"
+    if type_name in ('DECIMAL', 'NUMERIC'):
+        return f"{type_name}({precision}, {scale})"
+    if type_name in ('DATETIME2', 'TIME', 'DATETIMEOFFSET'):
+        return f"{type_name}({scale})"
+    return type_name
+
+
+class _SprocParam:
+    """One procedure parameter as declared in sys.parameters (name without @)."""
+
+    __slots__ = ('name', 'sql_type', 'is_output')
+
+    def __init__(self, name: str, sql_type: str, is_output: bool):
+        self.name = name
+        self.sql_type = sql_type
+        self.is_output = is_output
+
+
+class _SprocPlan:
+    """Prebuilt EXEC batch for one procedure and one set of supplied parameters."""
+
+    __slots__ = ('sql', 'inputs', 'outputs')
+
+    RETURN_VALUE = 'RETURN_VALUE'  # Output key holding the procedure's RETURN code
+
+    def __init__(self, sql: str, inputs: List[str], outputs: List[str]):
+        self.sql = sql
+        self.inputs = inputs    # Names bound as ? placeholders, in order
+        self.outputs = outputs  # OUTPUT parameter names, read back by a final SELECT
+
+    @classmethod
+    def build(cls, sproc_name: str, param_names: Tuple[str, ...],
+              metadata: Optional[List[_SprocParam]],
+              return_value: bool = False) -> '_SprocPlan':
+        """
+        Build the call plan.
+
+        Args:
+            sproc_name: Procedure name
+            param_names: Names the caller supplies, without @
+            metadata: Declared parameters, or None when unknown
+            return_value: Also capture the procedure's RETURN code
+        """
+        declared = {param.name.upper(): param for param in metadata or []}
+        supplied = {name.upper(): name for name in param_names}
+        seed_inputs, call_inputs = [], []
+        declarations, arguments, outputs = [], [], []
+
+        for name in param_names:
+            param = declared.get(name.upper())
+            if param is None or not param.is_output:
+                arguments.append(f"@{name}=?")
+                call_inputs.append(name)
+
+        for param in metadata or []:
+            if not param.is_output:
+                continue
+            variable = f"@out_{param.name}"
+            initial = ''
+            if param.name.upper() in supplied:
+                # The caller's value seeds the variable (None leaves it NULL)
+                initial = ' = ?'
+                seed_inputs.append(supplied[param.name.upper()])
+            declarations.append(f"DECLARE {variable} {param.sql_type}{initial};")
+            arguments.append(f"@{param.name}={variable} OUTPUT")
+            outputs.append(param.name)
+
+        target = sproc_name
+        if return_value:
+            declarations.insert(0, f"DECLARE @out_{cls.RETURN_VALUE} INT;")
+            target = f"@out_{cls.RETURN_VALUE} = {sproc_name}"
+            outputs.insert(0, cls.RETURN_VALUE)
+
+        call = f"EXEC {target} {', '.join(arguments)}".rstrip() + ';'
+        if not outputs:
+            return cls(call, call_inputs, outputs)
+
+        select = ', '.join(f"@out_{name} AS {name}" for name in outputs)
+        sql = '\n'.join([*declarations, call, f"SELECT {select};"])
+        # DECLAREs come before the EXEC, so their placeholders bind first
+        return cls(sql, seed_inputs + call_inputs, outputs)
+
+    def bind(self, params: Dict[str, Any]) -> List[Any]:
+        """Order the caller's values to match the placeholders."""
+        return [params[name] for name in self.inputs]
+
+
+# Call plans and parameter metadata shared by all connectors
+_sproc_plans: Dict[Tuple, _SprocPlan] = {}
+_sproc_metadata: Dict[Tuple, Optional[List[_SprocParam]]] = {}
+_sproc_plans_lock = threading.Lock()
+
+# Classes, courses, employees and class rosters shared by every connector
+_reference_cache = get_reference_cache()
+
+
 class DatabaseConnector:
     """Database connection manager for the QLSV application."""
 
     def __init__(self, server: str = 'localhost', database: str = 'QLSVNhom',
                  username: Optional[str] = None, password: Optional[str] = None,
-                 trusted_connection: bool = True):
-        """Initialize database connection parameters."""
+                 trusted_connection: bool = True, driver: str = 'SQL Server'):
+        """Initialize database connection parameters.
+
+        Table-valued parameters (upsert_grades_tvp) need a modern driver such as
+        'ODBC Driver 17 for SQL Server'; the legacy 'SQL Server' driver lacks them.
+        """
         self.server = server
         self.database = database
         self.username = username
         self.password = password
         self.trusted_connection = trusted_connection
-        self.conn = None
+        self.driver = driver
 
     def get_connection_string(self) -> str:
         """Generate the connection string based on authentication method."""
         if self.trusted_connection:
-            return f'DRIVER={{SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;'
+            return f'DRIVER={{{self.driver}}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;'
         else:
-            return f'DRIVER={{SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password}'
+            return f'DRIVER={{{self.driver}}};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password}'
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Get the connection pool shared by all connectors with the same settings."""
+        return get_pool(self.get_connection_string(), pyodbc.connect)
 
     def connect(self) -> bool:
-        """Establish a connection to the database."""
+        """Establish a connection to the database and keep it in the pool."""
         try:
-            connection_string = self.get_connection_string()
-            self.conn = pyodbc.connect(connection_string)
+            with self.pool.connection():
+                pass
             logger.info("Database connection established successfully")
             return True
-        except pyodbc.Error as e:
+        except (pyodbc.Error, TimeoutError) as e:
             logger.error(f"Database connection error: {str(e)}")
             return False
 
     def disconnect(self) -> None:
-        """Close the database connection."""
-        if self.conn:
-            try:
-                self.conn.close()
-                logger.info("Database connection closed")
-            except pyodbc.Error as e:
-                logger.error(f"Error closing database connection: {str(e)}")
-            finally:
-                self.conn = None
+        """
+        Release this connector.
+
+        The pool is shared with every other connector using the same settings,
+        so it stays open; close_all_pools() closes it at application shutdown.
+        Connections are only held for the duration of a call, so there is
+        nothing of this connector's own to close.
+        """
+        logger.info("Database connector released")
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics (checkouts, misses, wait time)."""
+        return self.pool.stats()
 
     def execute_query(self, query: str, params: Optional[Tuple] = None) -> Optional[List[Dict]]:
         """Execute a SQL query and return results as a list of dictionaries."""
-        if not self.conn:
-            if not self.connect():
-                return None
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    with timer('db.execute'):
+                        if params:
+                            cursor.execute(query, params)
+                        else:
+                            cursor.execute(query)
+
+                    # If it's a SELECT query, return results
+                    if query.strip().upper().startswith('SELECT'):
+                        columns = [column[0] for column in cursor.description]
+                        with timer('db.fetch'):
+                            rows = cursor.fetchall()
+                        with timer('db.convert'):
+                            results = [dict(zip(columns, row)) for row in rows]
+                        return results
+
+                    # For INSERT, UPDATE, DELETE, commit changes
+                    conn.commit()
+                    return []
+                finally:
+                    cursor.close()
+
+        except (pyodbc.Error, TimeoutError) as e:
+            logger.error(f"Query execution error: {str(e)}, Query: {query}")
+            return None
+
+    def iter_query(self, query: str, params: Optional[Tuple] = None,
+                   arraysize: int = 500) -> Iterator[pyodbc.Row]:
+        """
+        Stream the rows of a query instead of building a list of dictionaries.
+
+        Rows are fetched arraysize at a time and yielded as pyodbc Rows, which
+        support both row[0] and row.COLUMN access. Values are not converted
+        (datetimes stay datetimes). The pooled connection is held until the
+        generator is exhausted or closed, so consume it promptly.
 
+        Args:
+            query: SQL query
+            params: Query parameters
+            arraysize: Rows fetched per round trip
+
+        Yields:
+            One pyodbc Row per result row
+        """
         try:
-            cursor = self.conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-
-            # If it's a SELECT query, return results
-            if query.strip().upper().startswith('SELECT'):
-                columns = [column[0] for column in cursor.description]
-                results = []
-                for row in cursor.fetchall():
-                    results.append(dict(zip(columns, row)))
-                return results
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.arraysize = arraysize
+                    with timer('db.execute'):
+                        if params:
+                            cursor.execute(query, params)
+                        else:
+                            cursor.execute(query)
+
+                    while cursor.description:
+                        with timer('db.fetch'):
+                            rows = cursor.fetchmany(arraysize)
+                        if not rows:
+                            break
+                        yield from rows
+                finally:
+                    cursor.close()
+
+        except (pyodbc.Error, TimeoutError) as e:
+            # A silently truncated stream would look like a complete one
+            logger.error(f"Query streaming error: {str(e)}, Query: {query}")
+            raise
 
-            # For INSERT, UPDATE, DELETE, commit changes
-            self.conn.commit()
-            return []
+    def iter_sproc(self, sproc_name: str, params: Optional[Dict[str, Any]] = None,
+                   arraysize: int = 500) -> Iterator[pyodbc.Row]:
+        """
+        Stream the first result set of a stored procedure.
 
-        except pyodbc.Error as e:
-            logger.error(f"Query execution error: {str(e)}, Query: {query}")
-            self.conn.rollback()
-            return None
+        See iter_query() for how rows are fetched and yielded.
+
+        Args:
+            sproc_name: Stored procedure name
+            params: Input parameters by name
+            arraysize: Rows fetched per round trip
+
+        Yields:
+            One pyodbc Row per result row
+        """
+        params = params or {}
+        call_string = f"EXEC {sproc_name} " + \
+            ", ".join(f"@{key}=?" for key in params)
+        return self.iter_query(call_string.rstrip(), tuple(params.values()), arraysize)
+
+    def _get_sproc_metadata(self, cursor, sproc_name: str) -> Optional[List[_SprocParam]]:
+        """Read a procedure's parameters from sys.parameters, once per procedure."""
+        cache_key = (self.server, self.database, sproc_name.upper())
+        with _sproc_plans_lock:
+            if cache_key in _sproc_metadata:
+                return _sproc_metadata[cache_key]
+
+        cursor.execute(_SPROC_PARAMS_QUERY, (sproc_name,))
+        rows = cursor.fetchall()
+        if rows:
+            metadata = [_SprocParam(row.name[1:], _sql_type_name(row.type_name, row.max_length,
+                                                                row.precision, row.scale),
+                                    bool(row.is_output))
+                        for row in rows]
+        else:
+            # Unknown procedure or no permission to read metadata; send inputs only
+            cursor.execute("SELECT OBJECT_ID(?, 'P')", (sproc_name,))
+            metadata = [] if cursor.fetchone()[0] is not None else None
+
+        with _sproc_plans_lock:
+            _sproc_metadata[cache_key] = metadata
+        return metadata
+
+    def _get_sproc_plan(self, cursor, sproc_name: str, param_names: Tuple[str, ...],
+                        return_value: bool = False) -> _SprocPlan:
+        """Get the cached call plan for a procedure and set of supplied parameters."""
+        plan_key = (self.server, self.database, sproc_name.upper(), param_names, return_value)
+        with _sproc_plans_lock:
+            plan = _sproc_plans.get(plan_key)
+        if plan is not None:
+            return plan
+
+        metadata = self._get_sproc_metadata(cursor, sproc_name)
+        plan = _SprocPlan.build(sproc_name, param_names, metadata, return_value)
+        with _sproc_plans_lock:
+            _sproc_plans[plan_key] = plan
+        return plan
+
+    @staticmethod
+    def clear_sproc_plans() -> None:
+        """Forget cached procedure call plans, e.g. after a schema change."""
+        with _sproc_plans_lock:
+            _sproc_plans.clear()
+            _sproc_metadata.clear()
+
+    def _cached(self, kind: str, key: Any, loader, refresh: bool = False) -> Any:
+        """Read reference data through the shared cache, scoped to this database."""
+        return _reference_cache.get(kind, (self.server, self.database, key), loader, refresh)
+
+    def invalidate_reference_data(self, kind: Optional[str] = None, key: Any = None) -> None:
+        """
+        Drop cached reference data so the next lookup hits the database.
+
+        Args:
+            kind: 'classes', 'courses', 'employees' or 'students'; None drops everything
+            key: Entry within the kind (an employee ID for 'classes', a class
+                 ID for 'students'); None drops the whole kind
+        """
+        if key is not None:
+            key = (self.server, self.database, key)
+        _reference_cache.invalidate(kind, key)
 
-    def execute_sproc(self, sproc_name: str, params: Optional[Dict[str, Any]] = None) -> Optional[Union[List[Dict], Dict[str, Any], bool]]:
-        """Execute a stored procedure and return the results."""
+    @staticmethod
+    def reference_cache_stats() -> Dict[str, Any]:
+        """Get reference data cache statistics."""
+        return _reference_cache.stats()
+
+    def execute_sproc(self, sproc_name: str, params: Optional[Dict[str, Any]] = None,
+                      return_value: bool = False) -> Optional[Union[List[Dict], Dict[str, Any], bool]]:
+        """
+        Execute a stored procedure and return the results.
+
+        The EXEC batch is built once per procedure and parameter set from
+        sys.parameters and then reused. Parameters declared OUTPUT are bound to
+        typed variables and read back after the call; they may be omitted from
+        params or given an initial value. With return_value=True the
+        procedure's RETURN code is read back as output 'RETURN_VALUE'.
+
+        Returns:
+            List of row dictionaries if the procedure returns rows, True if it
+            returns none, or {'results': rows, 'output_params': {...}} when it
+            has OUTPUT parameters ('results' only if it also returned rows)
+        """
+        params = params or {}
         try:
-            # Connect to the database
-            conn = pyodbc.connect(self.get_connection_string())
-            cursor = conn.cursor()
-
-            # Log the stored procedure call
-            logger.info(f"Executing stored procedure: {sproc_name}")
-            logger.info(f"Parameters: {params}")
-
-            # Handle parameters if provided
-            if params:
-                # Separate input and output parameters
-                input_params = {}
-                output_params = {}
-
-                for key, value in params.items():
-                    if value is None and key.startswith('@') is False and key.endswith('_OUTPUT') is False:
-                        # This is likely an output parameter
-                        output_params[key] = value
-                    else:
-                        input_params[key] = value
-
-                # Build parameter string for the SQL call
-                param_string = ""
-                param_values = []
-
-                # For pyodbc, we need to use a different approach for output parameters
-                if output_params:
-                    # Create a stored procedure call with both input and output parameters
-                    param_placeholders = []
-
-                    # Add input parameters
-                    for key in input_params:
-                        param_placeholders.append(f"@{key}=?")
-                        param_values.append(input_params[key])
-
-                    # Add output parameters
-                    for key in output_params:
-                        param_placeholders.append(f"@{key}=? OUTPUT")
-                        # Add a placeholder value for the output parameter
-                        param_values.append(None)
-
-                    param_string = ", ".join(param_placeholders)
-                else:
-                    # Only input parameters
-                    for key, value in input_params.items():
-                        param_string += f"@{key}=?, "
-                        param_values.append(value)
-
-                    # Remove trailing comma and space
-                    if param_string:
-                        param_string = param_string[:-2]
-
-                # Execute the stored procedure
-                call_string = f"EXEC {sproc_name} {param_string}"
-
-                logger.info(f"SQL to execute: {call_string}")
-                logger.info(f"Parameter values: {param_values}")
-
-                cursor.execute(call_string, param_values)
-
-                # For output parameters, we need to fetch them from the cursor
-                # This is a workaround since pyodbc doesn't directly support OUTPUT parameters
-                # We'll check if there are any results that might contain our output values
-                if output_params:
-                    # Try to get output parameters from result set
-                    # Some stored procedures return output parameters as a single-row result set
-                    if cursor.description:
-                        columns = [column[0] for column in cursor.description]
-                        row = cursor.fetchone()
-                        if row:
-                            # If we have output parameters in the result set
-                            for i, col_name in enumerate(columns):
-                                # Remove @ prefix if present
-                                clean_name = col_name.replace('@', '')
-                                if clean_name in output_params:
-                                    output_params[clean_name] = row[i]
-            else:
-                # Execute without parameters
-                cursor.execute(f"EXEC {sproc_name}")
-
-            # Check if the stored procedure returns result set
-            results = []
-            if cursor.description:
-                columns = [column[0] for column in cursor.description]
-
-                # Log column information for debugging
-                column_info = []
-                for i, column in enumerate(cursor.description):
-                    col_name = column[0]
-                    col_type = type(column[1])
-                    col_size = column[2]
-                    col_precision = column[3]
-                    column_info.append(
-                        f"{col_name} (type: {col_type}, size: {col_size}, precision: {col_precision})")
-                logger.info(f"Result columns: {column_info}")
-
-                # Fetch all rows
-                rows = cursor.fetchall()
-                for row in rows:
-                    result_dict = {}
-                    for i, value in enumerate(row):
-                        # Convert datetime objects to string for easier handling
-                        if isinstance(value, datetime):
-                            value = value.strftime('%Y-%m-%d %H:%M:%S')
-                        result_dict[columns[i]] = value
-                    results.append(result_dict)
-
-                logger.info(
-                    f"Stored procedure executed successfully. Result count: {len(results)}")
-
-                # Close cursor and connection
-                cursor.close()
-                conn.close()
-
-                # If we have output parameters, include them in the result
-                if 'output_params' in locals() and output_params:
-                    return {
-                        'results': results,
-                        'output_params': output_params
-                    }
-                return results
-            else:
-                # No result set, but might have output parameters
-                logger.info(
-                    "Stored procedure executed successfully. No result set.")
-
-                # Commit the transaction for INSERT/UPDATE/DELETE operations
-                conn.commit()
-
-                # Close cursor and connection
-                cursor.close()
-                conn.close()
-
-                # If we have output parameters, return them
-                if 'output_params' in locals() and output_params:
-                    return {
-                        'output_params': output_params
-                    }
-                # Return True instead of None to indicate success
-                return True
+            # Borrow a pooled connection instead of opening a new one
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    plan = self._get_sproc_plan(
+                        cursor, sproc_name, tuple(params), return_value)
+
+                    with timer('db.execute'):
+                        cursor.execute(plan.sql, plan.bind(params))
+
+                    # Collect every result set; the last one holds OUTPUT values
+                    result_sets = []
+                    with timer('db.fetch'):
+                        while True:
+                            if cursor.description:
+                                columns = [column[0] for column in cursor.description]
+                                result_sets.append((columns, cursor.fetchall()))
+                            if not cursor.nextset():
+                                break
+
+                    # Writes made by procedures that also return rows must persist too
+                    conn.commit()
+                finally:
+                    cursor.close()
+
+            output_params = None
+            if plan.outputs:
+                columns, rows = result_sets.pop()
+                output_params = dict(zip(columns, rows[0])) if rows else {}
+
+            results = None
+            if result_sets:
+                columns, rows = result_sets[0]
+                results = []
+                with timer('db.convert'):
+                    for row in rows:
+                        result_dict = {}
+                        for i, value in enumerate(row):
+                            # Convert datetime objects to string for easier handling
+                            if isinstance(value, datetime):
+                                value = value.strftime('%Y-%m-%d %H:%M:%S')
+                            result_dict[columns[i]] = value
+                        results.append(result_dict)
+
+            if output_params is not None:
+                response = {'output_params': output_params}
+                if results is not None:
+                    response['results'] = results
+                return response
+            # Return True instead of None to indicate success
+            return results if results is not None else True
 
         except Exception as e:
             logger.error(
                 f"Unexpected error executing stored procedure {sproc_name}: {str(e)}")
             raise
 
+    def get_sproc_outputs(self, sproc_name: str, params: Optional[Dict[str, Any]] = None,
+                          return_value: bool = False) -> Dict[str, Any]:
+        """
+        Run a procedure for its OUTPUT parameters only.
+
+        Returns:
+            Dictionary of OUTPUT values (and RETURN_VALUE if requested)
+        """
+        result = self.execute_sproc(sproc_name, params, return_value)
+        if not isinstance(result, dict) or 'output_params' not in result:
+            raise ValueError(f"{sproc_name} did not return output parameters")
+        return result['output_params']
+
+    def _exists(self, query: str, params: Tuple) -> Optional[bool]:
+        """Run a SELECT 1 query; None if it fails."""
+        results = self.execute_query(query, params)
+        if results is None:
+            return None
+        return len(results) > 0
+
+    def _check_exists(self, sproc_name: str, params: Dict[str, Any], output: str,
+                      query: str, query_params: Tuple) -> Optional[bool]:
+        """
+        Answer an existence check from a procedure's OUTPUT parameter.
+
+        Falls back to a direct SELECT when the outputs cannot be read, e.g.
+        when sys.parameters is not readable or the procedure is missing.
+
+        Returns:
+            The check result, or None if neither way worked
+        """
+        try:
+            outputs = self.get_sproc_outputs(sproc_name, params)
+            if output in outputs:
+                return bool(outputs[output])
+            cause = f"{sproc_name} did not return {output}"
+        except Exception as e:
+            cause = str(e)
+        logger.warning(f"Falling back to a direct query: {cause}")
+        return self._exists(query, query_params)
+
     # Convenience methods for specific stored procedures
 
+    def login_employee(self, username: str, password: str) -> Optional[Dict]:
+        """
+        Authenticate an employee and load their session data in one round trip.
+
+        SP_LOGIN_NHANVIEN accepts both client-side and server-side password
+        hashes and returns identity, encrypted salary, public key, key type
+        and the IDs of the classes the employee manages. For employees whose
+        key is held by the server (KIEU_KHOA 'SERVER') it also returns the
+        decrypted salary, which replaces LUONG.
+
+        Args:
+            username: Employee username
+            password: Employee password
+
+        Returns:
+            Employee data dictionary or None if the credentials are wrong
+
+        Raises:
+            pyodbc.Error: If the procedure cannot be run, so callers can fall
+                back to the older authentication methods
+        """
+        from crypto_utils import CryptoManager
+
+        params = {
+            'TENDN': username,
+            'MK': password,
+            'MK_HASH': pyodbc.Binary(CryptoManager.hash_password(password))
+        }
+        result = self.execute_sproc('SP_LOGIN_NHANVIEN', params)
+        if not isinstance(result, list) or not result:
+            return None
+
+        employee = result[0]
+        employee['MANAGED_CLASSES'] = [
+            malop for malop in (employee.pop('DS_LOP') or '').split(',') if malop]
+        salary = employee.pop('LUONGCB', None)
+
+        # Keep a copy of the raw LUONG field for backward compatibility
+        if employee.get('LUONG'):
+            employee['ENCRYPTED_LUONG'] = employee['LUONG']
+
+        if employee.get('KIEU_KHOA') == 'SERVER' and salary is not None:
+            employee['LUONG'] = salary
+
+        return employee
+
     def authenticate_employee(self, username: str, password: str) -> Optional[Dict]:
         """Authenticate an employee using the SP_SEL_PUBLIC_NHANVIEN stored procedure."""
         try:
@@ -246,7 +522,6 @@ class DatabaseConnector:
 
             if result and len(result) > 0:
                 employee = result[0]
-                logger.info(f"Retrieved employee data: {employee['MANV']}")
 
                 # Get the PUBKEY for the employee separately as it might not be returned by the SP
                 pubkey_query = "SELECT PUBKEY FROM NHANVIEN WHERE MANV = ?"
@@ -277,14 +552,22 @@ class DatabaseConnector:
             logger.error(f"Error in authenticate_employee: {str(e)}")
             return None
 
-    def get_classes(self) -> Optional[List[Dict]]:
-        """Get all classes using SP_SEL_LOP stored procedure."""
-        return self.execute_sproc('SP_SEL_LOP')
+    def get_classes(self, refresh: bool = False) -> Optional[List[Dict]]:
+        """Get all classes using SP_SEL_LOP stored procedure (cached)."""
+        return self._cached('classes', None,
+                            lambda: self.execute_sproc('SP_SEL_LOP'), refresh)
 
-    def get_classes_by_employee(self, manv: str) -> Optional[List[Dict]]:
-        """Get classes managed by a specific employee."""
+    def get_classes_by_employee(self, manv: str, refresh: bool = False) -> Optional[List[Dict]]:
+        """Get classes managed by a specific employee (cached)."""
         params = {'MANV': manv}
-        return self.execute_sproc('SP_SEL_LOP_BY_MANV', params)
+        return self._cached('classes', manv,
+                            lambda: self.execute_sproc('SP_SEL_LOP_BY_MANV', params), refresh)
+
+    def get_courses(self, refresh: bool = False) -> Optional[List[Dict]]:
+        """Get all courses (MAHP, TENHP, SOTC), ordered by MAHP (cached)."""
+        query = "SELECT MAHP, TENHP, SOTC FROM HOCPHAN ORDER BY MAHP"
+        return self._cached('courses', None,
+                            lambda: self.execute_query(query), refresh)
 
     def check_class_managed_by_employee(self, malop: str, manv: str) -> bool:
         """
@@ -302,20 +585,14 @@ class DatabaseConnector:
                 "Empty class ID or employee ID provided to check_class_managed_by_employee")
             return False
 
-        # Use direct query approach
-        try:
-            logger.info(
-                f"Using direct query to check if class {malop} is managed by employee {manv}")
-            query = "SELECT 1 FROM LOP WHERE MALOP = ? AND MANV = ?"
-            results = self.execute_query(query, (malop, manv))
-            exists = results is not None and len(results) > 0
-            logger.info(
-                f"Direct query result for class {malop} managed by employee {manv}: {exists}")
-            return exists
-        except Exception as e:
+        managed = self._check_exists(
+            'SP_CHECK_CLASS_MANAGED_BY_EMPLOYEE', {'MALOP': malop, 'MANV': manv}, 'RESULT',
+            "SELECT 1 FROM LOP WHERE MALOP = ? AND MANV = ?", (malop, manv))
+        if managed is None:
             logger.error(
-                f"Query failed for class {malop} and employee {manv}: {str(e)}")
+                f"Query failed for class {malop} and employee {manv}")
             return False
+        return managed
 
     def add_class(self, malop: str, tenlop: str, manv: str):
         """
@@ -332,33 +609,79 @@ class DatabaseConnector:
         Raises:
             ValueError: If employee doesn't exist or class already exists
         """
-        logger.info(f"Checking if employee {manv} exists")
-        if not self.check_employee_exists(manv):
+        # Every validation result comes back from a single round trip
+        validation = self.validate_class(malop, manv)
+        if not validation['NHANVIEN_TONTAI']:
             logger.warning(f"Employee {manv} does not exist")
             raise ValueError(
                 f"Nhân viên có mã {manv} không tồn tại trong hệ thống")
 
-        # Check if class already exists
-        logger.info(f"Checking if class {malop} exists")
-        if self.check_class_exists(malop):
+        if validation['LOP_TONTAI']:
             logger.warning(f"Class {malop} already exists")
             raise ValueError(f"Lớp có mã {malop} đã tồn tại trong hệ thống")
 
-        # Check if class is already managed by this employee
-        logger.info(f"Checking if class {malop} is managed by employee {manv}")
-        if self.check_class_managed_by_employee(malop, manv):
+        if validation['DA_QUAN_LY']:
             logger.warning(
                 f"Class {malop} is already managed by employee {manv}")
             raise ValueError(
                 f"Lớp có mã {malop} đã được quản lý bởi nhân viên {manv}")
 
         # All checks passed, proceed with adding the class
-        logger.info(f"All checks passed, adding class {malop}")
         params = {'MALOP': malop, 'TENLOP': tenlop, 'MANV': manv}
         result = self.execute_sproc('SP_INS_LOP', params)
-        logger.info(f"Add class result: {result}")
+        self.invalidate_reference_data('classes')
         return result
 
+    def validate_class(self, malop: str, manv: str) -> Dict[str, Any]:
+        """
+        Run every class validation in one call to SP_VALIDATE_LOP_INSERT.
+
+        Args:
+            malop (str): Class ID
+            manv (str): Employee ID who manages the class
+
+        Returns:
+            Dict with NHANVIEN_TONTAI, LOP_TONTAI and DA_QUAN_LY flags and
+            MA_LOI, the procedure's return code (0 when an insert is valid)
+
+        Raises:
+            ValueError: If the checks cannot be run at all
+        """
+        flags = ('NHANVIEN_TONTAI', 'LOP_TONTAI', 'DA_QUAN_LY')
+        try:
+            outputs = self.get_sproc_outputs(
+                'SP_VALIDATE_LOP_INSERT', {'MALOP': malop, 'MANV': manv}, return_value=True)
+            if all(key in outputs for key in flags):
+                validation = {key: bool(outputs[key]) for key in flags}
+                validation['MA_LOI'] = outputs.get('RETURN_VALUE')
+                return validation
+            cause = "SP_VALIDATE_LOP_INSERT did not return every flag"
+        except Exception as e:
+            cause = str(e)
+        logger.warning(f"Falling back to direct queries for class validation: {cause}")
+
+        validation = {
+            'NHANVIEN_TONTAI': self._exists(
+                "SELECT 1 FROM NHANVIEN WHERE MANV = ?", (manv,)),
+            'LOP_TONTAI': self._exists(
+                "SELECT 1 FROM LOP WHERE MALOP = ?", (malop,)),
+            'DA_QUAN_LY': self._exists(
+                "SELECT 1 FROM LOP WHERE MALOP = ? AND MANV = ?", (malop, manv)),
+        }
+        if None in validation.values():
+            raise ValueError("Không thể kiểm tra thông tin lớp và nhân viên")
+
+        # Same return codes as the procedure
+        if not validation['NHANVIEN_TONTAI']:
+            validation['MA_LOI'] = 1
+        elif validation['LOP_TONTAI']:
+            validation['MA_LOI'] = 2
+        elif validation['DA_QUAN_LY']:
+            validation['MA_LOI'] = 3
+        else:
+            validation['MA_LOI'] = 0
+        return validation
+
     def check_employee_exists(self, manv: str) -> bool:
         """
         Check if an employee exists in the database.
@@ -374,42 +697,13 @@ class DatabaseConnector:
                 "Empty employee ID provided to check_employee_exists")
             return False
 
-        # # First try with stored procedure
-        # try:
-        #     logger.info(
-        #         f"Checking if employee {manv} exists using stored procedure")
-        #     params = {'MANV': manv, 'RESULT': None}
-        #     result = self.execute_sproc('SP_CHECK_EMPLOYEE', params)
-
-        #     if isinstance(result, dict) and 'output_params' in result:
-        #         exists = bool(result['output_params'].get('RESULT', False))
-        #         logger.info(
-        #             f"Stored procedure result for employee {manv} existence: {exists}")
-        #         return exists
-
-        #     logger.warning(
-        #         f"Stored procedure did not return expected output parameters for employee {manv}")
-        #     # If we get here, the stored procedure didn't return the expected format
-        #     # We'll use the direct query approach instead of returning False immediately
-        # except Exception as e:
-        #     logger.error(
-        #         f"Error executing stored procedure to check if employee {manv} exists: {str(e)}")
-        #     # Continue to fallback query
-
-        # Fallback to direct query
-        try:
-            logger.info(
-                f"Falling back to direct query to check if employee {manv} exists")
-            query = "SELECT 1 FROM NHANVIEN WHERE MANV = ?"
-            results = self.execute_query(query, (manv,))
-            exists = results is not None and len(results) > 0
-            logger.info(
-                f"Direct query result for employee {manv} existence: {exists}")
-            return exists
-        except Exception as inner_e:
-            logger.error(
-                f"Final fallback query failed for employee {manv}: {str(inner_e)}")
+        exists = self._check_exists(
+            'SP_CHECK_EMPLOYEE', {'MANV': manv}, 'RESULT',
+            "SELECT 1 FROM NHANVIEN WHERE MANV = ?", (manv,))
+        if exists is None:
+            logger.error(f"Error checking if employee {manv} exists")
             return False
+        return exists
 
     def check_class_exists(self, malop: str) -> bool:
         """
@@ -425,20 +719,13 @@ class DatabaseConnector:
             logger.warning("Empty class ID provided to check_class_exists")
             return False
 
-        # Use direct query approach
-        try:
-            logger.info(
-                f"Using direct query to check if class {malop} exists")
-            query = "SELECT 1 FROM LOP WHERE MALOP = ?"
-            results = self.execute_query(query, (malop,))
-            exists = results is not None and len(results) > 0
-            logger.info(
-                f"Direct query result for class {malop} existence: {exists}")
-            return exists
-        except Exception as inner_e:
-            logger.error(
-                f"Query failed for class {malop}: {str(inner_e)}")
+        exists = self._check_exists(
+            'SP_CHECK_CLASS_EXISTS', {'MALOP': malop}, 'RESULT',
+            "SELECT 1 FROM LOP WHERE MALOP = ?", (malop,))
+        if exists is None:
+            logger.error(f"Query failed for class {malop}")
             return False
+        return exists
 
     def update_class(self, malop, tenlop, manv):
         """
@@ -455,48 +742,73 @@ class DatabaseConnector:
         Raises:
             ValueError: If employee doesn't exist or class doesn't exist
         """
+        validation = self.validate_class(malop, manv)
+
         # Check if employee exists
-        if not self.check_employee_exists(manv):
+        if not validation['NHANVIEN_TONTAI']:
             raise ValueError(
                 f"Nhân viên có mã {manv} không tồn tại trong hệ thống")
 
         # Check if class exists
-        if not self.check_class_exists(malop):
+        if not validation['LOP_TONTAI']:
             raise ValueError(f"Lớp có mã {malop} không tồn tại trong hệ thống")
 
         # All checks passed, proceed with updating the class
         params = {'MALOP': malop, 'TENLOP': tenlop, 'MANV': manv}
-        return self.execute_sproc('SP_UPD_LOP', params)
+        result = self.execute_sproc('SP_UPD_LOP', params)
+        self.invalidate_reference_data('classes')
+        return result
 
     def delete_class(self, malop: str) -> bool:
         """Delete a class."""
         params = {'MALOP': malop}
         result = self.execute_sproc('SP_DEL_LOP', params)
+        self.invalidate_reference_data('classes')
+        self.invalidate_reference_data('students', malop)
         return result is not None
 
     def check_employee_manages_class(self, manv: str, malop: str) -> bool:
         """Check if an employee manages a specific class."""
-        try:
-            # Instead of relying on output parameters which are problematic with pyodbc,
-            # let's use a direct query approach
-            query = """
-            SELECT COUNT(*) AS is_manager 
-            FROM LOP 
-            WHERE MALOP = ? AND MANV = ?
-            """
-            result = self.execute_query(query, (malop, manv))
-
-            if result and len(result) > 0:
-                return result[0]['is_manager'] > 0
-            return False
-        except Exception as e:
-            logger.error(f"Error checking if employee manages class: {str(e)}")
+        is_manager = self._check_exists(
+            'SP_CHECK_EMPLOYEE_MANAGES_CLASS', {'MANV': manv, 'MALOP': malop}, 'IS_MANAGER',
+            "SELECT 1 FROM LOP WHERE MALOP = ? AND MANV = ?", (malop, manv))
+        if is_manager is None:
+            logger.error(f"Error checking if employee {manv} manages class {malop}")
             return False
+        return is_manager
 
-    def get_students_by_class(self, malop: str) -> Optional[List[Dict]]:
-        """Get students by class."""
+    def get_students_by_class(self, malop: str, refresh: bool = False) -> Optional[List[Dict]]:
+        """Get students by class (cached)."""
         params = {'MALOP': malop}
-        return self.execute_sproc('SP_SEL_SINHVIEN_BY_MALOP', params)
+        return self._cached('students', malop,
+                            lambda: self.execute_sproc('SP_SEL_SINHVIEN_BY_MALOP', params), refresh)
+
+    def get_students_by_class_page(self, malop: str, after: Optional[str] = None,
+                                   page_size: int = 200) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        """
+        Get one page of a class's students, ordered by MASV.
+
+        Args:
+            malop: Class ID
+            after: Continuation token from the previous page (None for the first page)
+            page_size: Maximum number of students to return
+
+        Returns:
+            Tuple of (students, next_token); next_token is None on the last page.
+            None if the query fails.
+        """
+        # One extra row tells whether another page exists without a second query
+        params = {'MALOP': malop, 'SOLUONG': page_size + 1}
+        if after is not None:
+            params['SAU_MASV'] = after
+        rows = self.execute_sproc('SP_SEL_SINHVIEN_BY_MALOP_PAGE', params)
+        if rows is None:
+            return None
+
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            return rows, rows[-1]['MASV']
+        return rows, None
 
     def get_student_by_id(self, masv: str) -> Optional[Dict]:
         """Get a single student by ID."""
@@ -524,6 +836,7 @@ class DatabaseConnector:
             'MK': mk
         }
         result = self.execute_sproc('SP_INS_SINHVIEN', params)
+        self.invalidate_reference_data('students', malop)
         return result is not None
 
     def update_student(self, masv: str, hoten: str, ngaysinh: str,
@@ -537,12 +850,15 @@ class DatabaseConnector:
             'MALOP': malop
         }
         result = self.execute_sproc('SP_UPD_SINHVIEN', params)
+        # The student may have moved out of another class's roster
+        self.invalidate_reference_data('students')
         return result is not None
 
     def delete_student(self, masv: str) -> bool:
         """Delete a student."""
         params = {'MASV': masv}
         result = self.execute_sproc('SP_DEL_SINHVIEN', params)
+        self.invalidate_reference_data('students')
         return result is not None
 
     def add_grade(self, masv: str, mahp: str, diemthi: bytes, manv: str) -> bool:
@@ -559,16 +875,12 @@ class DatabaseConnector:
             True if successful, False otherwise
         """
         try:
-            logger.info(f"Adding grade for student {masv}, course {mahp}")
-
             # Use stored procedure instead of direct query
             query = "EXEC SP_INS_ENCRYPTED_BANGDIEM ?, ?, ?"
 
             # Execute the query
             self.execute_query(query, (masv, mahp, pyodbc.Binary(diemthi)))
 
-            logger.info(
-                f"Successfully added grade for student {masv}, course {mahp}")
             return True
 
         except Exception as e:
@@ -589,16 +901,12 @@ class DatabaseConnector:
             True if successful, False otherwise
         """
         try:
-            logger.info(f"Updating grade for student {masv}, course {mahp}")
-
             # Use stored procedure instead of direct query
             query = "EXEC SP_UPD_ENCRYPTED_BANGDIEM ?, ?, ?"
 
             # Execute the query
             self.execute_query(query, (masv, mahp, pyodbc.Binary(diemthi)))
 
-            logger.info(
-                f"Successfully updated grade for student {masv}, course {mahp}")
             return True
 
         except Exception as e:
@@ -679,8 +987,6 @@ class DatabaseConnector:
 
             # Hash the password on the client side
             hashed_password = crypto_mgr.hash_password(password)
-            logger.info(
-                f"Client-side hashed password (hex): {hashed_password.hex()}")
 
             # Use direct SQL query instead of stored procedure
             query = """
@@ -698,13 +1004,8 @@ class DatabaseConnector:
             results = self.execute_query(
                 query, (username, pyodbc.Binary(hashed_password)))
 
-            logger.info(
-                f"Authentication query results count: {len(results) if results else 0}")
-
             if results and len(results) > 0:
                 employee = results[0]
-                logger.info(
-                    f"Retrieved encrypted employee data: {employee['MANV']}")
 
                 # Keep a copy of the raw LUONG field for backward compatibility
                 if 'LUONG' in employee and employee['LUONG']:
@@ -742,28 +1043,33 @@ class DatabaseConnector:
         Returns:
             True if successful, False otherwise
         """
+        from crypto_utils import CryptoManager
+        from key_factory import get_key_factory
+
+        staged_path = None
         try:
             # Create crypto manager
-            from crypto_utils import CryptoManager
             crypto_mgr = CryptoManager()
 
-            # Generate key pair
-            private_key_path, public_key_pem = crypto_mgr.generate_key_pair(
-                manv, password)
+            if not manv or not password:
+                raise ValueError(
+                    "Employee ID and password are required for key generation")
 
-            # Log the public key for debugging
-            logger.info(
-                f"Generated public key (first 50 chars): {public_key_pem[:50]}...")
+            # Take a pre-generated key if one is ready, so only the PKCS8
+            # wrap with the password is paid here
+            encrypted_private_key, public_key_pem = crypto_mgr.create_key_pair(
+                password, get_key_factory().take())
+
+            # The key file is only moved into place once the row exists, so a
+            # failed insert never replaces another employee's key
+            staged_path = crypto_mgr.stage_private_key(manv, encrypted_private_key)
 
             # Hash the password
             hashed_password = crypto_mgr.hash_password(password)
-            logger.info(f"Hashed password (hex): {hashed_password.hex()}")
 
             # Encrypt the salary using the public key
             encrypted_salary = crypto_mgr.encrypt_data(
                 public_key_pem, str(luong))
-            logger.info(
-                f"Encrypted salary (first 20 bytes hex): {encrypted_salary.hex()[:40]}...")
 
             # Use direct SQL INSERT instead of stored procedure
             query = """
@@ -772,18 +1078,85 @@ class DatabaseConnector:
             """
 
             # Execute the query
-            self.execute_query(
+            result = self.execute_query(
                 query, (manv, hoten, email, pyodbc.Binary(encrypted_salary), tendn,
                         pyodbc.Binary(hashed_password), public_key_pem))  # Store the actual public key PEM
+            if result is None:
+                crypto_mgr.discard_staged_key(staged_path)
+                return False
+
+            crypto_mgr.commit_private_key(manv, staged_path)
+            staged_path = None
 
             logger.info(f"Added employee with client-side encryption: {manv}")
+            self.invalidate_reference_data('employees')
             return True
 
         except Exception as e:
             logger.error(
                 f"Error in add_employee_with_client_encryption: {str(e)}")
+            if staged_path:
+                CryptoManager.discard_staged_key(staged_path)
             return False
 
+    def add_employees_bulk(self, rows: List[Tuple[str, str, Optional[str], bytes, str, bytes, str]],
+                           chunk_size: int = 500) -> Dict[str, Any]:
+        """
+        Add many client-side encrypted employees in a single transaction.
+
+        Rows are sent in chunks with pyodbc fast_executemany and committed
+        together, so either every employee is added or none is.
+
+        Args:
+            rows: (MANV, HOTEN, EMAIL, encrypted LUONG, TENDN, hashed MATKHAU,
+                  PUBKEY) tuples
+            chunk_size: Number of rows sent per executemany call
+
+        Returns:
+            Dictionary with 'inserted' (row count) and 'error', the database
+            error message if the transaction was rolled back, else None
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        if not rows:
+            return {'inserted': 0, 'error': None}
+
+        query = """
+        INSERT INTO NHANVIEN (MANV, HOTEN, EMAIL, LUONG, TENDN, MATKHAU, PUBKEY)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        params = [(manv, hoten, email, pyodbc.Binary(luong), tendn,
+                   pyodbc.Binary(matkhau), pubkey)
+                  for manv, hoten, email, luong, tendn, matkhau, pubkey in rows]
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.fast_executemany = True
+                try:
+                    with timer('db.add_employees_bulk'):
+                        for start in range(0, len(params), chunk_size):
+                            cursor.executemany(query, params[start:start + chunk_size])
+                        conn.commit()
+                finally:
+                    cursor.close()
+
+        except (pyodbc.Error, TimeoutError) as e:
+            # Releasing the connection rolls back the partial transaction
+            logger.error(f"Error in add_employees_bulk: {str(e)}")
+            return {'inserted': 0, 'error': str(e)}
+
+        logger.info(f"Bulk employee insert finished: {len(params)} inserted")
+        self.invalidate_reference_data('employees')
+        return {'inserted': len(params), 'error': None}
+
+    def get_employee_logins(self) -> Optional[List[Dict]]:
+        """Get the ID and username of every employee, to detect duplicates before inserting."""
+        try:
+            return self.execute_query("SELECT MANV, TENDN FROM NHANVIEN")
+        except Exception as e:
+            logger.error(f"Error getting employee logins: {str(e)}")
+            return None
+
     def decrypt_employee_salary(self, employee_data: Dict, password: str) -> Optional[int]:
         """
         Decrypt an employee's salary using their private key.
@@ -805,7 +1178,7 @@ class DatabaseConnector:
                 logger.error("No employee ID in employee data")
                 return None
 
-            # Create crypto manager
+            # Create crypto manager; the unlocked key is shared through its cache
             from crypto_utils import CryptoManager
             crypto_mgr = CryptoManager()
 
@@ -825,22 +1198,21 @@ class DatabaseConnector:
             # Convert to integer
             decrypted_salary = int(decrypted_salary_str)
 
-            logger.info(f"Successfully decrypted salary for employee {manv}")
             return decrypted_salary
 
         except Exception as e:
             logger.error(f"Error decrypting employee salary: {str(e)}")
             return None
 
-    def get_employees(self) -> Optional[List[Dict]]:
-        """Get all employees with raw LUONG data."""
+    def get_employees(self, refresh: bool = False) -> Optional[List[Dict]]:
+        """Get all employees with raw LUONG data (cached)."""
         try:
             query = """
             SELECT MANV, HOTEN, EMAIL, LUONG, PUBKEY
             FROM NHANVIEN
             """
-            results = self.execute_query(query)
-            return results
+            return self._cached('employees', None,
+                                lambda: self.execute_query(query), refresh)
         except Exception as e:
             logger.error(f"Error getting employees: {str(e)}")
             return None
@@ -869,8 +1241,6 @@ class DatabaseConnector:
             self.execute_query(
                 query, (masv, mahp, pyodbc.Binary(binary_grade)))
 
-            logger.info(
-                f"Added grade with client-side encryption for student {masv}, course {mahp}")
             return True
 
         except Exception as e:
@@ -878,6 +1248,180 @@ class DatabaseConnector:
                 f"Error in add_grade_with_client_encryption: {str(e)}")
             return False
 
+    def add_grades_bulk(self, rows: List[Tuple[str, str, Union[str, bytes]]],
+                        chunk_size: int = 500, upsert: bool = False) -> Dict[str, Any]:
+        """
+        Add many client-side encrypted grades in a single transaction.
+
+        Rows are sent in chunks with pyodbc fast_executemany. If a chunk fails,
+        the transaction is rolled back, the rows accepted so far are sent
+        again and the failed chunk is replayed row by row so that only the
+        offending rows are rejected. A failed row is undone by itself unless
+        XACT_STATE() shows it doomed the transaction, which is then restarted
+        the same way.
+
+        No explicit BEGIN TRANSACTION or savepoint is used: with autocommit
+        off the driver runs in implicit transaction mode, where a BEGIN
+        TRANSACTION would nest and conn.commit() would leave it open.
+
+        Args:
+            rows: (MASV, MAHP, encrypted grade) tuples; the grade is either raw
+                  bytes or base64 encoded as returned by encrypt_grade
+            chunk_size: Number of rows sent per executemany call
+            upsert: Update grades that already exist instead of rejecting them
+
+        Returns:
+            Dictionary with 'inserted' (rows written) and 'errors', a list of
+            (row index, MASV, MAHP, error message) tuples
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+
+        errors = []
+        params = []
+        for index, (masv, mahp, encrypted_grade) in enumerate(rows):
+            try:
+                if isinstance(encrypted_grade, str):
+                    encrypted_grade = base64.b64decode(encrypted_grade)
+                params.append((index, (masv, mahp, pyodbc.Binary(encrypted_grade))))
+            except Exception as e:
+                errors.append((index, masv, mahp, f"Invalid encrypted grade: {str(e)}"))
+
+        if not params:
+            return {'inserted': 0, 'errors': errors}
+
+        if upsert:
+            query = "EXEC SP_UPSERT_ENCRYPTED_BANGDIEM ?, ?, ?"
+        else:
+            query = "EXEC SP_INS_ENCRYPTED_BANGDIEM ?, ?, ?"
+        accepted = []
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.fast_executemany = True
+
+                def restart():
+                    """Roll back the transaction and send the accepted rows again."""
+                    conn.rollback()
+                    for start in range(0, len(accepted), chunk_size):
+                        cursor.executemany(query, accepted[start:start + chunk_size])
+
+                try:
+                    for start in range(0, len(params), chunk_size):
+                        chunk = params[start:start + chunk_size]
+                        try:
+                            cursor.executemany(query, [values for _, values in chunk])
+                            accepted.extend(values for _, values in chunk)
+                            continue
+                        except pyodbc.Error:
+                            # Part of the chunk may have been written, and the
+                            # transaction may be doomed; start over without it
+                            restart()
+
+                        # Replay the failed chunk one row at a time to find the bad rows
+                        for index, values in chunk:
+                            try:
+                                cursor.execute(query, values)
+                                accepted.append(values)
+                            except pyodbc.Error as e:
+                                errors.append((index, values[0], values[1], str(e)))
+                                if self._transaction_state(cursor) == -1:
+                                    restart()
+
+                    conn.commit()
+                finally:
+                    cursor.close()
+
+        except (pyodbc.Error, TimeoutError) as e:
+            logger.error(f"Error in add_grades_bulk: {str(e)}")
+            failed = {index for index, _, _, _ in errors}
+            errors.extend((index, values[0], values[1], str(e))
+                          for index, values in params if index not in failed)
+            errors.sort(key=lambda error: error[0])
+            return {'inserted': 0, 'errors': errors}
+
+        logger.info(
+            f"Bulk grade insert finished: {len(accepted)} written, {len(errors)} rejected")
+        errors.sort(key=lambda error: error[0])
+        return {'inserted': len(accepted), 'errors': errors}
+
+    @staticmethod
+    def _transaction_state(cursor) -> int:
+        """XACT_STATE() of the cursor's connection: 1 committable, -1 doomed, 0 none."""
+        cursor.execute("SELECT XACT_STATE()")
+        return cursor.fetchone()[0]
+
+    def save_grades_bulk(self, rows: List[Tuple[str, str, Union[str, bytes]]],
+                         chunk_size: int = 500) -> Dict[str, Any]:
+        """
+        Insert or update many client-side encrypted grades.
+
+        The whole batch is first sent to SP_UPSERT_ENCRYPTED_BANGDIEM_TVP in
+        one round trip. If that fails (old driver or database, or a row that
+        breaks a constraint and takes the batch with it), the rows are
+        upserted through add_grades_bulk, which isolates the bad rows.
+
+        Args:
+            rows: (MASV, MAHP, encrypted grade) tuples, as for add_grades_bulk
+            chunk_size: Number of rows sent per executemany call in the fallback
+
+        Returns:
+            Dictionary with 'saved' (rows inserted or updated) and 'errors' as
+            returned by add_grades_bulk
+        """
+        counts = self.upsert_grades_tvp(rows)
+        if counts is not None:
+            return {'saved': counts['inserted'] + counts['updated'], 'errors': []}
+
+        logger.warning("TVP grade upsert failed, upserting row by row")
+        result = self.add_grades_bulk(rows, chunk_size, upsert=True)
+        return {'saved': result['inserted'], 'errors': result['errors']}
+
+    def upsert_grades_tvp(self, rows: List[Tuple[str, str, Union[str, bytes]]]) -> Optional[Dict[str, int]]:
+        """
+        Insert or update a batch of encrypted grades in one round trip.
+
+        The rows are passed as a table-valued parameter to
+        SP_UPSERT_ENCRYPTED_BANGDIEM_TVP, which MERGEs them into BANGDIEM.
+
+        Args:
+            rows: (MASV, MAHP, encrypted grade) tuples; the grade is either raw
+                  bytes or base64 encoded as returned by encrypt_grade
+
+        Returns:
+            Dictionary with 'inserted' and 'updated' counts, or None on failure
+        """
+        try:
+            tvp_rows = []
+            for masv, mahp, encrypted_grade in rows:
+                if isinstance(encrypted_grade, str):
+                    encrypted_grade = base64.b64decode(encrypted_grade)
+                tvp_rows.append((masv, mahp, pyodbc.Binary(encrypted_grade)))
+
+            if not tvp_rows:
+                return {'inserted': 0, 'updated': 0}
+
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    # pyodbc sends a list of row tuples as a table-valued parameter
+                    cursor.execute(
+                        "EXEC SP_UPSERT_ENCRYPTED_BANGDIEM_TVP @BANGDIEM = ?", (tvp_rows,))
+                    row = cursor.fetchone()
+                    conn.commit()
+                finally:
+                    cursor.close()
+
+            counts = {'inserted': row[0], 'updated': row[1]} if row else {
+                'inserted': 0, 'updated': 0}
+            logger.info(
+                f"TVP grade upsert finished: {counts['inserted']} inserted, {counts['updated']} updated")
+            return counts
+
+        except Exception as e:
+            logger.error(f"Error in upsert_grades_tvp: {str(e)}")
+            return None
+
     def update_grade_with_client_encryption(self, masv: str, mahp: str, encrypted_grade: str, manv: str) -> bool:
         """
         Update a grade with client-side encryption.
@@ -902,8 +1446,6 @@ class DatabaseConnector:
             self.execute_query(
                 query, (masv, mahp, pyodbc.Binary(binary_grade)))
 
-            logger.info(
-                f"Updated grade with client-side encryption for student {masv}, course {mahp}")
             return True
 
         except Exception as e:
@@ -911,6 +1453,50 @@ class DatabaseConnector:
                 f"Error in update_grade_with_client_encryption: {str(e)}")
             return False
 
+    def get_class_data_key(self, malop: str, manv: str) -> Optional[bytes]:
+        """
+        Get a class's wrapped envelope data key for an employee.
+
+        Args:
+            malop: Class ID
+            manv: Employee ID whose public key wrapped the data key
+
+        Returns:
+            Wrapped data key bytes, or None if the class has no data key
+        """
+        try:
+            result = self.execute_sproc(
+                'SP_SEL_KHOALOP', {'MALOP': malop, 'MANV': manv})
+            if result and len(result) > 0:
+                return result[0]['KHOA']
+            return None
+        except Exception as e:
+            logger.error(f"Error getting data key for class {malop}: {str(e)}")
+            return None
+
+    def save_class_data_key(self, malop: str, manv: str, wrapped_key: bytes) -> bool:
+        """
+        Store a class's wrapped envelope data key.
+
+        An existing key is never overwritten, since grades already encrypted
+        with it would become unreadable.
+
+        Args:
+            malop: Class ID
+            manv: Employee ID whose public key wrapped the data key
+            wrapped_key: RSA-OAEP encrypted data key
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            params = {'MALOP': malop, 'MANV': manv,
+                      'KHOA': pyodbc.Binary(wrapped_key)}
+            return self.execute_sproc('SP_INS_KHOALOP', params) is not None
+        except Exception as e:
+            logger.error(f"Error saving data key for class {malop}: {str(e)}")
+            return False
+
     def get_grades_with_client_encryption(self, class_id: str) -> Optional[List[Dict]]:
         """
         Get grades for students in a class with encrypted data.
@@ -948,3 +1534,38 @@ class DatabaseConnector:
             logger.error(
                 f"Error in get_grades_with_client_encryption: {str(e)}")
             return None
+
+    def get_grades_page_with_client_encryption(self, class_id: str, after: Optional[Tuple[str, str]] = None,
+                                               page_size: int = 200) -> Optional[Tuple[List[Dict], Optional[Tuple[str, str]]]]:
+        """
+        Get one page of a class's grades with encrypted data, ordered by (MASV, MAHP).
+
+        Args:
+            class_id: Class ID
+            after: Continuation token from the previous page (None for the first page)
+            page_size: Maximum number of grades to return
+
+        Returns:
+            Tuple of (grade records, next_token); next_token is None on the last page.
+            None if the query fails.
+        """
+        params = {'MALOP': class_id, 'SOLUONG': page_size + 1}
+        if after is not None:
+            params['SAU_MASV'], params['SAU_MAHP'] = after
+        results = self.execute_sproc('SP_SEL_BANGDIEM_BY_MALOP_PAGE', params)
+        if results is None:
+            return None
+
+        next_token = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_token = (results[-1]['MASV'], results[-1]['MAHP'])
+
+        for result in results:
+            if 'DIEMTHI' in result and result['DIEMTHI']:
+                # Store the encrypted grade for later decryption
+                result['ENCRYPTED_DIEMTHI'] = result['DIEMTHI']
+                # Placeholder for encrypted data
+                result['DIEMTHI'] = "***"
+
+        return results, next_token
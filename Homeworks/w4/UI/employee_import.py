@@ -0,0 +1,272 @@
+import csv
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from crypto_utils import CryptoManager
+
+"""
+Employee Import Module
+
+Creates many employees at once from a CSV file with the columns MANV, HOTEN,
+EMAIL, LUONG, TENDN and MATKHAU. Every employee needs an RSA key pair, which
+costs tens to hundreds of milliseconds each, so the key pairs are generated
+and the salaries encrypted in a process pool. All NHANVIEN rows are then
+inserted in one transaction.
+
+Private keys are staged as temporary files in the key directory and only
+moved into place once the transaction has committed. If the insert fails,
+the staged keys are deleted and no existing key file is touched.
+
+This module must not import tkinter: the worker processes import it.
+
+Usage Examples:
+--------------
+importer = EmployeeImporter(DatabaseConnector())
+
+# progress(stage, done, total) is called from the importing thread with
+# stage 'keys' while key pairs are generated and 'save' while inserting
+result = importer.import_file("nhanvien.csv", progress=on_progress)
+print(result['inserted'], result['rejected'], result['error'])
+"""
+
+logger = logging.getLogger('employee_import')
+
+CSV_COLUMNS = ('MANV', 'HOTEN', 'EMAIL', 'LUONG', 'TENDN', 'MATKHAU')
+REQUIRED_COLUMNS = ('MANV', 'HOTEN', 'LUONG', 'TENDN', 'MATKHAU')
+
+# Longest accepted values, from the NHANVIEN columns (MATKHAU: SP_LOGIN_NHANVIEN's @MK)
+COLUMN_SIZES = {'MANV': 20, 'HOTEN': 100, 'EMAIL': 20, 'TENDN': 100, 'MATKHAU': 100}
+
+# Below this many employees starting worker processes costs more than it saves
+PARALLEL_KEYGEN_THRESHOLD = 4
+
+ProgressCallback = Callable[[str, int, int], None]
+
+# CryptoManager of a worker process, so public keys stay cached between tasks
+_worker_crypto: Optional[CryptoManager] = None
+
+
+def _provision_employee(keys_dir: str, password: str, salary: int) -> Tuple[bytes, str, bytes]:
+    """
+    Generate an employee's key pair and encrypt their salary. Runs in a worker process.
+
+    Returns:
+        Tuple of (encrypted private key PEM, public_key_pem, encrypted salary)
+    """
+    global _worker_crypto
+    if _worker_crypto is None or _worker_crypto.keys_dir != keys_dir:
+        _worker_crypto = CryptoManager(keys_dir)
+    encrypted_private_key, public_key_pem = _worker_crypto.create_key_pair(password)
+    encrypted_salary = _worker_crypto.encrypt_data(public_key_pem, str(salary))
+    return encrypted_private_key, public_key_pem, encrypted_salary
+
+
+def read_employee_csv(path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Read and validate an employee CSV file.
+
+    Args:
+        path: CSV file with a header row of CSV_COLUMNS (EMAIL is optional)
+
+    Returns:
+        Tuple of (valid records, rejected line messages). Each record holds
+        the CSV columns, LUONG as an int, and its line number under 'line'
+    """
+    records = []
+    rejected = []
+    seen_ids = set()
+    seen_logins = set()
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in REQUIRED_COLUMNS
+                   if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Thiếu cột: {', '.join(missing)}")
+
+        for line_no, row in enumerate(reader, start=2):
+            record = {column: (row.get(column) or '').strip() for column in CSV_COLUMNS}
+            # Passwords are taken verbatim; spaces may be part of them
+            record['MATKHAU'] = row.get('MATKHAU') or ''
+
+            empty = [column for column in REQUIRED_COLUMNS if not record[column]]
+            if empty:
+                rejected.append(f"Dòng {line_no}: thiếu {', '.join(empty)}")
+                continue
+
+            too_long = [column for column, size in COLUMN_SIZES.items()
+                        if len(record[column]) > size]
+            if too_long:
+                rejected.append(f"Dòng {line_no}: quá dài: " + ", ".join(
+                    f"{column} (tối đa {COLUMN_SIZES[column]} ký tự)" for column in too_long))
+                continue
+
+            manv = record['MANV']
+            # MANV names the private key file, so it must be a plain file name
+            if os.path.basename(manv) != manv or manv in ('.', '..'):
+                rejected.append(f"Dòng {line_no}: mã nhân viên không hợp lệ")
+                continue
+
+            try:
+                record['LUONG'] = int(record['LUONG'])
+                if record['LUONG'] <= 0:
+                    raise ValueError
+            except ValueError:
+                rejected.append(f"Dòng {line_no}: lương phải là số nguyên lớn hơn 0")
+                continue
+
+            if manv in seen_ids:
+                rejected.append(f"Dòng {line_no}: trùng mã nhân viên {manv}")
+                continue
+            if record['TENDN'] in seen_logins:
+                rejected.append(f"Dòng {line_no}: trùng tên đăng nhập {record['TENDN']}")
+                continue
+            seen_ids.add(manv)
+            seen_logins.add(record['TENDN'])
+
+            record['line'] = line_no
+            records.append(record)
+
+    return records, rejected
+
+
+class EmployeeImporter:
+    """Creates employees with client-side encryption in bulk."""
+
+    def __init__(self, db, keys_dir: str = 'keys', workers: Optional[int] = None):
+        """
+        Initialize the importer.
+
+        Args:
+            db: DatabaseConnector used to check for and insert employees
+            keys_dir: Directory where private keys are stored
+            workers: Number of key generation processes (default: CPU count)
+        """
+        self.db = db
+        self.crypto_mgr = CryptoManager(keys_dir)
+        self.workers = workers or os.cpu_count() or 1
+
+    def import_file(self, path: str, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Import employees from a CSV file.
+
+        Args:
+            path: CSV file, see read_employee_csv()
+            progress: Called with (stage, done, total) as the import advances
+
+        Returns:
+            Dictionary with 'inserted' (employee count), 'rejected' (messages
+            for skipped lines) and 'error' (why nothing was inserted, or None)
+        """
+        records, rejected = read_employee_csv(path)
+        result = self.import_records(records, progress)
+        result['rejected'] = rejected + result['rejected']
+        return result
+
+    def import_records(self, records: List[Dict[str, Any]],
+                       progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Import validated employee records.
+
+        Records whose MANV or TENDN already exists are rejected before any
+        key is generated, so an existing employee's key is never replaced.
+
+        Args:
+            records: Records as returned by read_employee_csv()
+            progress: Called with (stage, done, total) as the import advances
+
+        Returns:
+            Same as import_file()
+        """
+        existing = self.db.get_employee_logins()
+        if existing is None:
+            return {'inserted': 0, 'rejected': [],
+                    'error': "Không thể đọc danh sách nhân viên hiện có"}
+        existing_ids = {row['MANV'].strip() for row in existing}
+        existing_logins = {row['TENDN'].strip() for row in existing}
+
+        rejected = []
+        pending = []
+        for record in records:
+            if record['MANV'] in existing_ids:
+                rejected.append(f"Dòng {record['line']}: nhân viên {record['MANV']} đã tồn tại")
+            elif record['TENDN'] in existing_logins:
+                rejected.append(f"Dòng {record['line']}: tên đăng nhập {record['TENDN']} đã tồn tại")
+            else:
+                pending.append(record)
+
+        if not pending:
+            return {'inserted': 0, 'rejected': rejected, 'error': None}
+
+        provisioned = self._provision(pending, progress)
+
+        staged = []
+        try:
+            rows = []
+            for record, (encrypted_private_key, public_key_pem, encrypted_salary) in zip(
+                    pending, provisioned):
+                staged.append((record['MANV'], self.crypto_mgr.stage_private_key(
+                    record['MANV'], encrypted_private_key)))
+                rows.append((record['MANV'], record['HOTEN'], record['EMAIL'] or None,
+                             encrypted_salary, record['TENDN'],
+                             self.crypto_mgr.hash_password(record['MATKHAU']),
+                             public_key_pem))
+
+            if progress:
+                progress('save', 0, len(rows))
+            outcome = self.db.add_employees_bulk(rows)
+        except Exception:
+            self._discard(staged)
+            raise
+
+        if outcome['error']:
+            self._discard(staged)
+            return {'inserted': 0, 'rejected': rejected, 'error': outcome['error']}
+
+        # The rows are committed; publish their keys
+        for manv, staged_path in staged:
+            self.crypto_mgr.commit_private_key(manv, staged_path)
+        if progress:
+            progress('save', outcome['inserted'], len(rows))
+
+        logger.info(f"Imported {outcome['inserted']} employees, {len(rejected)} rejected")
+        return {'inserted': outcome['inserted'], 'rejected': rejected, 'error': None}
+
+    def _provision(self, records: List[Dict[str, Any]],
+                   progress: Optional[ProgressCallback]) -> List[Tuple[bytes, str, bytes]]:
+        """Generate key pairs and encrypt salaries, in input order."""
+        total = len(records)
+        keys_dir = self.crypto_mgr.keys_dir
+        if progress:
+            progress('keys', 0, total)
+
+        if total < PARALLEL_KEYGEN_THRESHOLD or self.workers == 1:
+            results = []
+            for done, record in enumerate(records, start=1):
+                results.append(_provision_employee(
+                    keys_dir, record['MATKHAU'], record['LUONG']))
+                if progress:
+                    progress('keys', done, total)
+            return results
+
+        results: List[Optional[Tuple[bytes, str, bytes]]] = [None] * total
+        # Fork would copy locks held by other threads (the key factory, logging,
+        # instrumentation) into the children and can deadlock them; spawn starts clean
+        with ProcessPoolExecutor(max_workers=min(self.workers, total),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(_provision_employee, keys_dir,
+                                       record['MATKHAU'], record['LUONG']): index
+                       for index, record in enumerate(records)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress:
+                    progress('keys', done, total)
+        return results
+
+    def _discard(self, staged: List[Tuple[str, str]]) -> None:
+        """Delete staged keys of an import that was rolled back."""
+        for _, staged_path in staged:
+            self.crypto_mgr.discard_staged_key(staged_path)
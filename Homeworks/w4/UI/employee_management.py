@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -7,6 +7,9 @@ from db_connector import DatabaseConnector
 from session import EmployeeSession
 from ui_components import Form, TextField, DataTable, MessageDisplay
 from crypto_utils import CryptoManager
+from employee_import import EmployeeImporter
+from key_factory import get_key_factory
+from task_runner import TaskExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -98,7 +101,6 @@ class EmployeeForm(Form):
 
         # Get form data
         form_data = self.get_data()
-        logger.info(f"Form data: {form_data}")
 
         manv = form_data.get("MANV", "")
         hoten = form_data.get("HOTEN", "")
@@ -158,6 +160,9 @@ class EmployeeManagementScreen(ttk.Frame):
         self.employee_session = EmployeeSession()
         self.crypto_mgr = CryptoManager()
 
+        # (stage, done, total) written by the import thread, read by the Tk thread
+        self._import_progress: Optional[Tuple[str, int, int]] = None
+
         self._create_widgets()
         self._load_employee_list()
         self._hide_form()
@@ -203,7 +208,21 @@ class EmployeeManagementScreen(ttk.Frame):
         self.employees_table.edit_button.configure(state='disabled')
         self.employees_table.delete_button.configure(state='disabled')
         self.employees_table.refresh_button.configure(
-            command=self._load_employee_list)
+            command=lambda: self._load_employee_list(refresh=True))
+
+        # Bulk import; key pairs are generated in worker processes
+        self.import_button = ttk.Button(
+            self.employees_table.button_frame, text="Nhập CSV", width=10,
+            command=self._on_import_clicked)
+        self.import_button.pack(side=tk.LEFT, padx=5)
+
+        # Import progress, shown only while an import runs
+        self.import_frame = ttk.Frame(self.list_frame)
+        self.import_status = ttk.Label(self.import_frame)
+        self.import_status.pack(anchor='w')
+        self.import_progressbar = ttk.Progressbar(
+            self.import_frame, mode='determinate')
+        self.import_progressbar.pack(fill=tk.X)
 
         # Create separator between list and form
         self.separator = ttk.Separator(self.main_container, orient='vertical')
@@ -226,43 +245,129 @@ class EmployeeManagementScreen(ttk.Frame):
         )
         self.employee_form.pack(fill=tk.BOTH, expand=True)
 
-    def _load_employee_list(self):
-        """Load employee list data from database."""
-        try:
-            # Get all employees
-            employees = self.db.get_employees()
-
-            # Transform data for the table
-            table_data = []
-            if employees:
-                for emp in employees:
-                    # Display raw LUONG data as hexadecimal
-                    salary_display = ""
-                    if 'LUONG' in emp and emp['LUONG']:
-                        # Convert raw binary to hex for display
-                        salary_display = emp['LUONG'].hex()
-
-                    table_data.append({
-                        'id': emp['MANV'],  # Use employee ID as row ID
-                        'MANV': emp['MANV'],
-                        'HOTEN': emp['HOTEN'],
-                        'EMAIL': emp.get('EMAIL', ''),
-                        'LUONG': salary_display
-                    })
-
-                # Load data into table
-                self.employees_table.load_data(table_data)
-                logger.info(f"Loaded {len(table_data)} employees")
-            else:
-                # Display a message in the table instead of a popup
-                self.employees_table.clear_data()  # Clear existing data
-                self.employees_table.show_message(
-                    "Không có nhân viên nào được tìm thấy")
-                logger.info("No employees found")
+    def _load_employee_list(self, refresh: bool = False):
+        """Load employee list data from database in the background; refresh bypasses the cache."""
+        TaskExecutor().submit(
+            self._fetch_employee_rows, refresh,
+            on_success=self._show_employee_rows,
+            on_error=self._on_load_error,
+            key=f"employees:{id(self)}",
+            description="Đang tải danh sách nhân viên...")
+
+    def _fetch_employee_rows(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Fetch employees and format them for the table. Runs off the Tk thread."""
+        # Get all employees
+        employees = self.db.get_employees(refresh=refresh)
+
+        # Transform data for the table
+        table_data = []
+        for emp in employees or []:
+            # Display raw LUONG data as hexadecimal
+            salary_display = ""
+            if 'LUONG' in emp and emp['LUONG']:
+                # Convert raw binary to hex for display
+                salary_display = emp['LUONG'].hex()
+
+            table_data.append({
+                'id': emp['MANV'],  # Use employee ID as row ID
+                'MANV': emp['MANV'],
+                'HOTEN': emp['HOTEN'],
+                'EMAIL': emp.get('EMAIL', ''),
+                'LUONG': salary_display
+            })
+        return table_data
+
+    def _show_employee_rows(self, table_data: List[Dict[str, Any]]):
+        """Load formatted employees into the table."""
+        if table_data:
+            # Load data into table
+            self.employees_table.load_data(table_data)
+            logger.info(f"Loaded {len(table_data)} employees")
+        else:
+            # Display a message in the table instead of a popup
+            self.employees_table.clear_data()  # Clear existing data
+            self.employees_table.show_message(
+                "Không có nhân viên nào được tìm thấy")
+            logger.info("No employees found")
+
+    def _on_load_error(self, error: Exception):
+        """Report a failed employee load."""
+        logger.error(f"Database error when loading employees: {error}")
+        MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(error))
+
+    def _on_import_clicked(self):
+        """Import employees from a CSV file (MANV, HOTEN, EMAIL, LUONG, TENDN, MATKHAU)."""
+        file_path = filedialog.askopenfilename(
+            title="Chọn tệp nhân viên",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not file_path:
+            return
 
-        except Exception as e:
-            logger.error(f"Database error when loading employees: {e}")
-            MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(e))
+        importer = EmployeeImporter(self.db, keys_dir=self.crypto_mgr.keys_dir)
+        self._import_progress = ('keys', 0, 0)
+        self.import_button.configure(state='disabled')
+        self.import_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self._poll_import_progress()
+
+        TaskExecutor().submit(
+            importer.import_file, file_path,
+            progress=self._on_import_progress,
+            on_success=self._on_import_finished,
+            on_error=self._on_import_failed,
+            key=f"employee-import:{id(self)}",
+            description="Đang nhập nhân viên...")
+
+    def _on_import_progress(self, stage: str, done: int, total: int):
+        """Record import progress. Runs on the import thread, so no Tk calls here."""
+        self._import_progress = (stage, done, total)
+
+    def _poll_import_progress(self):
+        """Show the latest import progress until the import finishes."""
+        progress = self._import_progress
+        if progress is None:
+            return
+
+        stage, done, total = progress
+        if stage == 'keys':
+            text = f"Đang tạo khóa: {done}/{total}"
+        else:
+            text = f"Đang lưu {total} nhân viên..."
+        self.import_status.configure(text=text)
+        self.import_progressbar.configure(maximum=max(total, 1), value=done)
+        self.after(100, self._poll_import_progress)
+
+    def _end_import(self):
+        """Hide the import progress and allow another import."""
+        self._import_progress = None
+        self.import_frame.pack_forget()
+        self.import_button.configure(state='normal')
+
+    def _on_import_finished(self, result: Dict[str, Any]):
+        """Report an employee import."""
+        self._end_import()
+
+        rejected = result['rejected']
+        if result['error']:
+            message = f"Không có nhân viên nào được thêm: {result['error']}"
+        else:
+            message = f"Đã thêm {result['inserted']} nhân viên."
+        if rejected:
+            message += f"\n{len(rejected)} dòng bị từ chối:\n" + \
+                "\n".join(rejected[:10])
+
+        if result['error'] or rejected:
+            MessageDisplay.show_warning("Nhập Nhân Viên", message)
+        else:
+            MessageDisplay.show_info("Nhập Nhân Viên", message)
+
+        if result['inserted']:
+            self._load_employee_list()
+
+    def _on_import_failed(self, error: Exception):
+        """Report an employee import that could not run."""
+        self._end_import()
+        logger.error(f"Error importing employees: {error}")
+        MessageDisplay.show_error("Lỗi", f"Không thể nhập tệp nhân viên: {str(error)}")
 
     def _hide_form(self):
         """Hide the form view."""
@@ -286,6 +391,10 @@ class EmployeeManagementScreen(ttk.Frame):
 
     def _on_add_clicked(self):
         """Handle add button click."""
+        # Pre-generate key pairs while the form is filled in, so adding an
+        # employee does not wait for RSA prime generation
+        get_key_factory().start()
+
         # Update form title
         self.form_title.configure(text="Thêm Nhân Viên Mới")
         logger.info("Showing Add Employee form")
@@ -1,5 +1,6 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
+import csv
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -7,6 +8,7 @@ from db_connector import DatabaseConnector
 from session import EmployeeSession
 from ui_components import Form, TextField, ComboBoxField, DataTable, MessageDisplay
 from crypto_utils import CryptoManager
+from task_runner import TaskExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +30,10 @@ class GradeForm(Form):
         # Store class ID
         self.class_id = class_id
 
+        # Display names for the saved row, filled by the dropdown loaders
+        self.student_names = {}
+        self.course_names = {}
+
         # Store encrypted grade data for editing
         self.encrypted_grade = None
 
@@ -79,6 +85,7 @@ class GradeForm(Form):
         try:
             # Get students in this class
             students = self.db.get_students_by_class(self.class_id) or []
+            self.student_names = {s['MASV']: s['HOTEN'] for s in students}
 
             # Format for combobox: (display_text, value)
             return [(f"{s['HOTEN']} ({s['MASV']})", s['MASV']) for s in students]
@@ -89,9 +96,9 @@ class GradeForm(Form):
     def _get_course_values(self):
         """Get courses for dropdown."""
         try:
-            # Execute a query to get courses
-            query = "SELECT MAHP, TENHP FROM HOCPHAN"
-            courses = self.db.execute_query(query) or []
+            # Courses rarely change; served from the reference cache
+            courses = self.db.get_courses() or []
+            self.course_names = {c['MAHP']: c['TENHP'] for c in courses}
 
             # Format for combobox: (display_text, value)
             return [(f"{c['TENHP']} ({c['MAHP']})", c['MAHP']) for c in courses]
@@ -126,8 +133,15 @@ class GradeForm(Form):
                     "Lỗi", "Không tìm thấy khóa công khai của nhân viên")
                 return
 
+            # Use the class data key when envelope encryption is enabled
+            data_key = None
+            if self.employee_session.envelope_encryption:
+                data_key = self.employee_session.get_class_data_key(
+                    self.class_id, self.db, create=True)
+
             # Encrypt the grade using the employee's session methods
-            encoded_grade = self.employee_session.encrypt_grade(diemthi)
+            encoded_grade = self.employee_session.encrypt_grade(
+                diemthi, data_key)
             if not encoded_grade:
                 MessageDisplay.show_error(
                     "Lỗi", "Không thể mã hóa điểm")
@@ -141,7 +155,8 @@ class GradeForm(Form):
                     MessageDisplay.show_info(
                         "Thành Công", "Cập nhật điểm thành công")
                     if self.on_save_callback:
-                        self.on_save_callback()
+                        self.on_save_callback(
+                            self._saved_row(data, diemthi, encoded_grade))
                 else:
                     MessageDisplay.show_error("Lỗi", "Không thể cập nhật điểm")
             else:
@@ -152,7 +167,8 @@ class GradeForm(Form):
                     MessageDisplay.show_info(
                         "Thành Công", "Thêm điểm mới thành công")
                     if self.on_save_callback:
-                        self.on_save_callback()
+                        self.on_save_callback(
+                            self._saved_row(data, diemthi, encoded_grade))
                 else:
                     MessageDisplay.show_error("Lỗi", "Không thể thêm điểm mới")
 
@@ -160,6 +176,19 @@ class GradeForm(Form):
             MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(e))
             logger.error(f"Database error when saving grade: {str(e)}")
 
+    def _saved_row(self, data: Dict[str, Any], diemthi: float,
+                   encoded_grade: str) -> Dict[str, Any]:
+        """Build the grade table row for a grade that was just saved."""
+        return {
+            'id': f"{data['MASV']}_{data['MAHP']}",
+            'MASV': data['MASV'],
+            'TENSV': self.student_names.get(data['MASV'], ''),
+            'MAHP': data['MAHP'],
+            'TENHP': self.course_names.get(data['MAHP'], ''),
+            'DIEMTHI': f"{diemthi:.1f}",
+            'RAW_DIEMTHI': CryptoManager.decode_from_db(encoded_grade)
+        }
+
     def cancel(self):
         """Cancel the form and call the cancel callback."""
         super().cancel()
@@ -172,6 +201,8 @@ class GradeForm(Form):
 class GradeManagementScreen(ttk.Frame):
     """Grade management screen with list and entry form."""
 
+    PAGE_SIZE = 200  # Grades fetched and decrypted per page
+
     def __init__(self, master):
         super().__init__(master)
 
@@ -181,6 +212,10 @@ class GradeManagementScreen(ttk.Frame):
         # Session manager
         self.employee_session = EmployeeSession()
 
+        # Paging state of the grade list
+        self._grades_class_id = None
+        self._next_token = None  # Continuation token of the next grade page
+
         # Create main container with padding
         self.main_container = ttk.Frame(self)
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -236,7 +271,8 @@ class GradeManagementScreen(ttk.Frame):
         view_button.pack(side=tk.LEFT, padx=5)
 
         # Configure refresh button
-        self.class_table.refresh_button.configure(command=self.refresh_classes)
+        self.class_table.refresh_button.configure(
+            command=lambda: self.refresh_classes(refresh=True))
 
         # Double-click to view grades
         self.class_table.bind(
@@ -245,12 +281,12 @@ class GradeManagementScreen(ttk.Frame):
         # Load classes
         self.refresh_classes()
 
-    def refresh_classes(self):
-        """Refresh the class list."""
+    def refresh_classes(self, refresh: bool = False):
+        """Refresh the class list; refresh bypasses the cache."""
         try:
             # Get classes for the current employee
             employee_id = self.employee_session.employee_id
-            classes = self.db.get_classes_by_employee(employee_id)
+            classes = self.db.get_classes_by_employee(employee_id, refresh=refresh)
 
             # Transform data for the table
             table_data = []
@@ -279,9 +315,8 @@ class GradeManagementScreen(ttk.Frame):
             return
 
         # Check if employee can manage this class
-        employee_id = self.employee_session.employee_id
-        has_permission = self.db.check_employee_manages_class(
-            employee_id, selected_id)
+        has_permission = self.employee_session.can_manage_class(
+            selected_id, self.db)
 
         if not has_permission:
             MessageDisplay.show_warning(
@@ -346,7 +381,9 @@ class GradeManagementScreen(ttk.Frame):
         grades_label.pack(anchor='w', pady=(0, 10))
 
         self.grades_table = DataTable(
-            list_frame, columns, on_select=self._on_grade_selected)
+            list_frame, columns, on_select=self._on_grade_selected,
+            virtual=True,  # Large grade sheets: insert rows as the user scrolls
+            page_size=self.PAGE_SIZE, page_loader=self._load_next_page)
 
         # Configure button commands
         self.grades_table.add_button.configure(
@@ -357,10 +394,22 @@ class GradeManagementScreen(ttk.Frame):
         self.grades_table.refresh_button.configure(
             command=lambda: self.refresh_grades(class_id))
 
+        # Bulk import button for term-end grade sheets
+        import_button = ttk.Button(
+            self.grades_table.button_frame, text="Nhập CSV", width=10,
+            command=lambda: self._on_bulk_import_clicked(class_id))
+        import_button.pack(side=tk.LEFT, padx=5)
+
+        # Class statistics (mean, pass rate, distribution) over every grade
+        stats_button = ttk.Button(
+            self.grades_table.button_frame, text="Thống Kê", width=10,
+            command=lambda: self._on_statistics_clicked(class_id, class_info))
+        stats_button.pack(side=tk.LEFT, padx=5)
+
         # Create grade form
         self.grade_form = GradeForm(
             form_frame,
-            lambda: self.refresh_grades(class_id),
+            lambda row=None: self._on_grade_saved(class_id, row),
             lambda: self.hide_grade_form(),
             class_id=class_id
         )
@@ -403,57 +452,138 @@ class GradeManagementScreen(ttk.Frame):
         self.grade_form.pack_forget()
 
     def refresh_grades(self, class_id):
-        """Refresh the grade list for a class with raw encrypted data display."""
-        try:
-            # Get grades for this class with encrypted data
-            grades = self.db.get_grades_with_client_encryption(class_id)
-
-            # Transform data for the table
-            table_data = []
-            if grades:
-                for grade in grades:
-                    # Display raw encrypted grade data
-                    diemthi_display = grade.get('ENCRYPTED_DIEMTHI', b'').hex()
-
-                    # Try to decrypt the grade if we have the private key and show both the raw and decrypted
-                    # if 'ENCRYPTED_DIEMTHI' in grade and grade['ENCRYPTED_DIEMTHI']:
-                    #     try:
-                    #         # Check if we have the private key loaded
-                    #         if self.employee_session.private_key:
-                    #             # Decrypt the grade
-                    #             decrypted_grade = self.employee_session.decrypt_data(
-                    #                 grade['ENCRYPTED_DIEMTHI']
-                    #             )
-                    #             if decrypted_grade:
-                    #                 # Show both raw and decrypted data
-                    #                 diemthi_display = f"{diemthi_display} ({float(decrypted_grade):.1f})"
-                    #     except Exception as e:
-                    #         logger.error(f"Error decrypting grade: {e}")
-
-                    table_data.append({
-                        # Composite key
-                        'id': f"{grade['MASV']}_{grade['MAHP']}",
-                        'MASV': grade['MASV'],
-                        'TENSV': grade['TENSV'],
-                        'MAHP': grade['MAHP'],
-                        'TENHP': grade['TENHP'],
-                        'DIEMTHI': diemthi_display,
-                        # Store raw data for editing
-                        'RAW_DIEMTHI': grade.get('ENCRYPTED_DIEMTHI')
-                    })
-
-                # Load data into table
-                self.grades_table.load_data(table_data)
+        """Reload the grade list for a class from its first page, in the background."""
+        self._grades_class_id = class_id
+        self._next_token = None
+        TaskExecutor().submit(
+            self._load_grades, class_id,
+            on_success=self._show_grades,
+            on_error=self._on_load_error,
+            key=f"grades:{id(self)}",
+            description=f"Đang tải bảng điểm lớp {class_id}...")
+
+    def _load_next_page(self):
+        """Fetch the page after the loaded grades; called by the table on scroll."""
+        if self._next_token is None:
+            return
+        class_id = self._grades_class_id
+        TaskExecutor().submit(
+            self._load_grades, class_id, self._next_token,
+            on_success=self._append_grades,
+            on_error=self._on_page_error,
+            key=f"grades:{id(self)}",
+            description=f"Đang tải thêm điểm lớp {class_id}...")
+
+    def _load_grades(self, class_id, after=None) -> Tuple[List[Dict[str, Any]], Any]:
+        """Fetch and decrypt one page of a class's grades. Runs off the Tk thread."""
+        # Get one page of grades for this class with encrypted data
+        page = self.db.get_grades_page_with_client_encryption(
+            class_id, after, self.PAGE_SIZE)
+        if page is None:
+            raise RuntimeError("Không thể tải bảng điểm")
+        grades, next_token = page
+
+        # Transform data for the table
+        table_data = []
+        if grades:
+            # Envelope-encrypted grades need the class data key, if any
+            data_key = self.employee_session.get_class_data_key(
+                class_id, self.db)
+
+            # Decrypt the whole page at once instead of one value per row
+            decrypted = self.employee_session.decrypt_grades(
+                [grade.get('ENCRYPTED_DIEMTHI') for grade in grades], data_key)
+
+            for grade, plain_grade in zip(grades, decrypted):
+                if plain_grade is not None:
+                    diemthi_display = f"{plain_grade:.1f}"
+                else:
+                    # Fall back to the raw encrypted grade data
+                    diemthi_display = (
+                        grade.get('ENCRYPTED_DIEMTHI') or b'').hex()
+
+                table_data.append({
+                    # Composite key
+                    'id': f"{grade['MASV']}_{grade['MAHP']}",
+                    'MASV': grade['MASV'],
+                    'TENSV': grade['TENSV'],
+                    'MAHP': grade['MAHP'],
+                    'TENHP': grade['TENHP'],
+                    'DIEMTHI': diemthi_display,
+                    # Store raw data for editing
+                    'RAW_DIEMTHI': grade.get('ENCRYPTED_DIEMTHI')
+                })
 
-            else:
-                # No grades found
-                self.grades_table.clear_data()
-                self.grades_table.show_message(
-                    "Không có điểm nào được tìm thấy")
+        return table_data, next_token
 
-        except Exception as e:
-            MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(e))
-            logger.error(f"Database error when loading grades: {str(e)}")
+    def _show_grades(self, page: Tuple[List[Dict[str, Any]], Any]):
+        """Load the first page of decrypted grades into the table."""
+        table_data, self._next_token = page
+        if table_data:
+            # Load data into table
+            self.grades_table.load_data(
+                table_data, has_more=self._next_token is not None)
+        else:
+            # No grades found
+            self.grades_table.clear_data()
+            self.grades_table.show_message(
+                "Không có điểm nào được tìm thấy")
+
+    def _append_grades(self, page: Tuple[List[Dict[str, Any]], Any]):
+        """Add a further page of grades below the loaded ones."""
+        table_data, self._next_token = page
+        self.grades_table.append_data(
+            table_data, has_more=self._next_token is not None)
+
+    def _on_page_error(self, error: Exception):
+        """Stop paging after a failed page load; Refresh starts over."""
+        self.grades_table.append_data([], has_more=False)
+        self._on_load_error(error)
+
+    def _on_load_error(self, error: Exception):
+        """Report a failed grade load."""
+        MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(error))
+        logger.error(f"Database error when loading grades: {str(error)}")
+
+    def _on_grade_saved(self, class_id, row: Optional[Dict[str, Any]] = None):
+        """Patch the saved grade into the table instead of reloading it."""
+        if row:
+            self.grades_table.apply_changes(upserts=[row])
+        else:
+            self.refresh_grades(class_id)
+
+    def _on_statistics_clicked(self, class_id, title):
+        """Load and decrypt the whole class in the background, then show statistics."""
+        TaskExecutor().submit(
+            self._load_grade_matrix, class_id,
+            on_success=lambda matrix: self._show_statistics(matrix, title),
+            on_error=self._on_load_error,
+            key=f"grade-stats:{id(self)}",
+            description=f"Đang tính thống kê lớp {class_id}...")
+
+    def _load_grade_matrix(self, class_id):
+        """Fetch and decrypt every grade of a class into a GradeMatrix. Runs off the Tk thread."""
+        from grade_matrix import GradeMatrix
+
+        grades = self.db.get_grades_with_client_encryption(class_id)
+        if grades is None:
+            raise RuntimeError("Không thể tải bảng điểm")
+
+        data_key = None
+        if grades:
+            data_key = self.employee_session.get_class_data_key(class_id, self.db)
+        decrypted = self.employee_session.decrypt_grades(
+            [grade.get('ENCRYPTED_DIEMTHI') for grade in grades], data_key)
+        return GradeMatrix.from_rows(grades, decrypted)
+
+    def _show_statistics(self, matrix, title):
+        """Open the statistics window for a loaded grade matrix."""
+        from grade_statistics import ClassStatisticsPanel
+
+        if not matrix.grade_count and not matrix.undecryptable:
+            MessageDisplay.show_info("Thống Kê", "Lớp chưa có điểm nào")
+            return
+        ClassStatisticsPanel(self, matrix, title=title.replace("Quản Lý Điểm", "Thống Kê Điểm"))
 
     def _on_grade_selected(self, grade_id):
         """Handle grade selection in the table."""
@@ -466,6 +596,89 @@ class GradeManagementScreen(ttk.Frame):
         self.grade_form.enter_create_mode()
         self.show_grade_form()
 
+    def _on_bulk_import_clicked(self, class_id):
+        """Import a CSV grade sheet (MASV, MAHP, DIEMTHI) in one transaction."""
+        file_path = filedialog.askopenfilename(
+            title="Chọn tệp điểm",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not file_path:
+            return
+
+        # Encrypting every grade is slow; keep it off the Tk thread
+        TaskExecutor().submit(
+            self._import_grade_file, class_id, file_path,
+            on_success=lambda result: self._on_bulk_import_finished(class_id, result),
+            on_error=self._on_bulk_import_failed,
+            key=f"grade-import:{id(self)}",
+            description="Đang nhập bảng điểm...")
+
+    def _import_grade_file(self, class_id, file_path) -> Tuple[int, List[str]]:
+        """Validate, encrypt and save a grade sheet. Runs off the Tk thread."""
+        if not self.employee_session.can_manage_class(class_id, self.db):
+            raise PermissionError("Bạn không có quyền quản lý điểm cho lớp này")
+
+        # Only students of this class may receive grades from its sheet
+        students = self.db.get_students_by_class(class_id, refresh=True)
+        if students is None:
+            raise RuntimeError("Không thể tải danh sách sinh viên của lớp")
+        roster = {student['MASV'].strip() for student in students}
+
+        data_key = None
+        if self.employee_session.envelope_encryption:
+            data_key = self.employee_session.get_class_data_key(
+                class_id, self.db, create=True)
+
+        rows = []
+        rejected = []
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            for line_no, record in enumerate(csv.DictReader(f), start=2):
+                masv = (record.get('MASV') or '').strip()
+                mahp = (record.get('MAHP') or '').strip()
+                if not masv or not mahp:
+                    rejected.append(f"Dòng {line_no}: thiếu mã sinh viên hoặc mã học phần")
+                    continue
+                if masv not in roster:
+                    rejected.append(f"Dòng {line_no}: sinh viên {masv} không thuộc lớp {class_id}")
+                    continue
+                try:
+                    diemthi = float(record.get('DIEMTHI') or '')
+                    if diemthi < 0 or diemthi > 10:
+                        raise ValueError
+                except ValueError:
+                    rejected.append(f"Dòng {line_no}: điểm không hợp lệ")
+                    continue
+
+                encoded_grade = self.employee_session.encrypt_grade(
+                    diemthi, data_key)
+                if not encoded_grade:
+                    rejected.append(f"Dòng {line_no}: không thể mã hóa điểm")
+                    continue
+                rows.append((masv, mahp, encoded_grade))
+
+        # Grades already in BANGDIEM are updated, so a corrected sheet can be imported again
+        result = self.db.save_grades_bulk(rows)
+        for index, masv, mahp, error in result['errors']:
+            rejected.append(f"{masv} - {mahp}: {error}")
+        return result['saved'], rejected
+
+    def _on_bulk_import_finished(self, class_id, result: Tuple[int, List[str]]):
+        """Report a grade sheet import."""
+        saved, rejected = result
+        message = f"Đã lưu {saved} điểm."
+        if rejected:
+            message += f"\n{len(rejected)} dòng bị từ chối:\n" + \
+                "\n".join(rejected[:10])
+            MessageDisplay.show_warning("Nhập Điểm", message)
+        else:
+            MessageDisplay.show_info("Nhập Điểm", message)
+
+        self.refresh_grades(class_id)
+
+    def _on_bulk_import_failed(self, error: Exception):
+        """Report a grade sheet import that could not run."""
+        MessageDisplay.show_error("Lỗi", f"Không thể nhập tệp điểm: {str(error)}")
+        logger.error(f"Error importing grades: {str(error)}")
+
     def _on_edit_grade_clicked(self):
         """Handle edit grade button click."""
         selected_id = self.grades_table.get_selected_item()
@@ -507,8 +720,10 @@ class GradeManagementScreen(ttk.Frame):
                 diemthi = ""
                 try:
                     if self.employee_session.private_key and encrypted_grade:
+                        data_key = self.employee_session.get_class_data_key(
+                            self.grade_form.class_id, self.db)
                         decrypted_grade = self.employee_session.decrypt_data(
-                            encrypted_grade)
+                            encrypted_grade, data_key)
                         if decrypted_grade:
                             diemthi = float(decrypted_grade)
                 except Exception as e:
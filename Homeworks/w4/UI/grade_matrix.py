@@ -0,0 +1,254 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+"""
+Grade Matrix Module
+
+Holds a class's decrypted grades as a student x course matrix so that
+statistics are computed with NumPy over whole columns or rows at once,
+instead of looping over one dict per (MASV, MAHP) pair.
+
+Cells with no grade, or whose grade could not be decrypted, are masked
+out of every statistic.
+
+Usage Examples:
+--------------
+matrix = GradeMatrix.from_rows(rows, decrypted_grades)
+
+stats = matrix.course_stats()          # Arrays aligned with matrix.course_ids
+stats['mean'], stats['pass_rate'], stats['p50']
+
+counts, edges = matrix.histogram('HP001', bins=10)
+"""
+
+logger = logging.getLogger('grade_matrix')
+
+PASS_MARK = 5.0
+GRADE_RANGE = (0.0, 10.0)
+DEFAULT_PERCENTILES = (25, 50, 75)
+
+
+class GradeMatrix:
+    """Student x course grade matrix with a validity mask."""
+
+    def __init__(self, student_ids: Sequence[str], course_ids: Sequence[str],
+                 values: np.ndarray, mask: np.ndarray,
+                 student_names: Optional[Sequence[str]] = None,
+                 course_names: Optional[Sequence[str]] = None,
+                 undecryptable: int = 0):
+        """
+        Initialize the matrix.
+
+        Args:
+            student_ids: MASV of each row
+            course_ids: MAHP of each column
+            values: Float array of shape (students, courses); masked cells are NaN
+            mask: Bool array of the same shape, True where a grade is known
+            student_names: HOTEN of each row
+            course_names: TENHP of each column
+            undecryptable: Number of grades that exist but failed to decrypt
+        """
+        if values.shape != (len(student_ids), len(course_ids)) or mask.shape != values.shape:
+            raise ValueError("Grade matrix shape does not match its labels")
+
+        self.student_ids = list(student_ids)
+        self.course_ids = list(course_ids)
+        self.student_names = list(student_names or self.student_ids)
+        self.course_names = list(course_names or self.course_ids)
+        self.values = values
+        self.mask = mask
+        self.undecryptable = undecryptable
+        self._student_index = {masv: i for i, masv in enumerate(self.student_ids)}
+        self._course_index = {mahp: j for j, mahp in enumerate(self.course_ids)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]],
+                  grades: Optional[Iterable[Optional[float]]] = None) -> 'GradeMatrix':
+        """
+        Build a matrix from grade rows.
+
+        Args:
+            rows: Dicts with MASV, MAHP and optionally TENSV and TENHP
+            grades: Decrypted grade for each row, None where decryption
+                    failed; defaults to each row's DIEMTHI
+
+        Returns:
+            GradeMatrix with students and courses sorted by ID
+        """
+        rows = list(rows)
+        if grades is None:
+            grades = [row.get('DIEMTHI') for row in rows]
+        grades = [cls._to_float(grade) for grade in grades]
+
+        student_names = {row['MASV']: row.get('TENSV') or row['MASV'] for row in rows}
+        course_names = {row['MAHP']: row.get('TENHP') or row['MAHP'] for row in rows}
+        student_ids = sorted(student_names)
+        course_ids = sorted(course_names)
+        student_index = {masv: i for i, masv in enumerate(student_ids)}
+        course_index = {mahp: j for j, mahp in enumerate(course_ids)}
+
+        count = len(rows)
+        row_idx = np.fromiter((student_index[row['MASV']] for row in rows), dtype=np.intp, count=count)
+        col_idx = np.fromiter((course_index[row['MAHP']] for row in rows), dtype=np.intp, count=count)
+        flat = np.fromiter((np.nan if grade is None else grade for grade in grades),
+                           dtype=np.float64, count=count)
+
+        values = np.full((len(student_ids), len(course_ids)), np.nan)
+        values[row_idx, col_idx] = flat
+        mask = ~np.isnan(values)
+
+        return cls(student_ids, course_ids, values, mask,
+                   [student_names[masv] for masv in student_ids],
+                   [course_names[mahp] for mahp in course_ids],
+                   undecryptable=int(np.isnan(flat).sum()))
+
+    @staticmethod
+    def _to_float(grade: Any) -> Optional[float]:
+        """Convert a grade to float; None for missing or non-numeric values."""
+        if grade is None:
+            return None
+        try:
+            return float(grade)
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(number of students, number of courses)."""
+        return self.values.shape
+
+    @property
+    def grade_count(self) -> int:
+        """Number of known grades."""
+        return int(self.mask.sum())
+
+    def get(self, masv: str, mahp: str) -> Optional[float]:
+        """Get one student's grade in one course, or None if unknown."""
+        i = self._student_index.get(masv)
+        j = self._course_index.get(mahp)
+        if i is None or j is None or not self.mask[i, j]:
+            return None
+        return float(self.values[i, j])
+
+    def course_stats(self, pass_mark: float = PASS_MARK,
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, np.ndarray]:
+        """
+        Statistics for every course (column) at once.
+
+        Returns:
+            Dict of arrays aligned with course_ids: count, mean, std, min,
+            max, pass_rate and one 'p<N>' entry per percentile. Courses
+            without grades get NaN.
+        """
+        return self._stats(0, pass_mark, percentiles)
+
+    def student_stats(self, pass_mark: float = PASS_MARK,
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, np.ndarray]:
+        """Statistics for every student (row) at once; see course_stats()."""
+        return self._stats(1, pass_mark, percentiles)
+
+    def overall_stats(self, pass_mark: float = PASS_MARK,
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Statistics over every known grade in the class."""
+        known = self.values[self.mask]
+        stats = {'count': float(known.size)}
+        if not known.size:
+            for name in ('mean', 'std', 'min', 'max', 'pass_rate'):
+                stats[name] = float('nan')
+            for percentile in percentiles:
+                stats[f'p{percentile:g}'] = float('nan')
+            return stats
+
+        stats.update(mean=float(known.mean()), std=float(known.std()),
+                     min=float(known.min()), max=float(known.max()),
+                     pass_rate=float((known >= pass_mark).mean()))
+        if percentiles:
+            for percentile, value in zip(percentiles, np.percentile(known, percentiles)):
+                stats[f'p{percentile:g}'] = float(value)
+        return stats
+
+    def _stats(self, axis: int, pass_mark: float,
+               percentiles: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Masked statistics along an axis (0: per course, 1: per student)."""
+        count = self.mask.sum(axis=axis)
+        filled = np.where(self.mask, self.values, 0.0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = filled.sum(axis=axis) / count
+            # Population variance from the mean of squares, clipped against rounding
+            variance = (filled * filled).sum(axis=axis) / count - mean * mean
+            std = np.sqrt(np.clip(variance, 0.0, None))
+            pass_rate = ((self.values >= pass_mark) & self.mask).sum(axis=axis) / count
+
+        empty = count == 0
+        low = np.where(self.mask, self.values, np.inf).min(axis=axis, initial=np.inf)
+        high = np.where(self.mask, self.values, -np.inf).max(axis=axis, initial=-np.inf)
+        stats = {
+            'count': count,
+            'mean': mean,
+            'std': std,
+            'min': np.where(empty, np.nan, low),
+            'max': np.where(empty, np.nan, high),
+            'pass_rate': pass_rate,
+        }
+
+        for percentile, column in zip(percentiles, self._percentiles(axis, count, percentiles)):
+            stats[f'p{percentile:g}'] = column
+        return stats
+
+    def _percentiles(self, axis: int, count: np.ndarray,
+                     percentiles: Sequence[float]) -> List[np.ndarray]:
+        """
+        Linear-interpolated percentiles of the known grades along an axis.
+
+        np.nanpercentile loops over rows in Python; sorting once (NaN sorts
+        last) and interpolating between gathered neighbours stays vectorized.
+        """
+        ordered = np.moveaxis(np.sort(self.values, axis=axis), axis, -1)
+        last = np.maximum(count - 1, 0)
+        empty = count == 0
+
+        results = []
+        for percentile in percentiles:
+            position = last * (percentile / 100.0)
+            below = np.floor(position).astype(np.intp)
+            above = np.minimum(below + 1, last)
+            if ordered.shape[-1]:
+                low = np.take_along_axis(ordered, below[:, None], axis=-1)[:, 0]
+                high = np.take_along_axis(ordered, above[:, None], axis=-1)[:, 0]
+                with np.errstate(invalid='ignore'):
+                    column = low + (high - low) * (position - below)
+            else:
+                column = np.full(count.shape, np.nan)
+            results.append(np.where(empty, np.nan, column))
+        return results
+
+    def histogram(self, mahp: Optional[str] = None, bins: int = 10,
+                  grade_range: Tuple[float, float] = GRADE_RANGE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Count grades per bin.
+
+        Args:
+            mahp: Course to count; None counts every grade in the class
+            bins: Number of equal-width bins
+            grade_range: (low, high) edges of the first and last bin
+
+        Returns:
+            Tuple of (counts, bin edges) as from numpy.histogram
+        """
+        if mahp is None:
+            known = self.values[self.mask]
+        else:
+            j = self._course_index.get(mahp)
+            if j is None:
+                known = np.empty(0)
+            else:
+                known = self.values[self.mask[:, j], j]
+        return np.histogram(known, bins=bins, range=grade_range)
+
+    def failing_students(self, pass_mark: float = PASS_MARK) -> List[str]:
+        """MASV of students with at least one known grade below the pass mark."""
+        failing = ((self.values < pass_mark) & self.mask).any(axis=1)
+        return [self.student_ids[i] for i in np.flatnonzero(failing)]
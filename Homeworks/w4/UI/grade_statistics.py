@@ -0,0 +1,257 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from grade_matrix import GradeMatrix, PASS_MARK
+from ui_components import DataTable
+
+"""
+Grade Statistics Module
+
+Statistics window for one class, built on GradeMatrix. Every view (summary,
+per-course table, per-student table, histogram) is recomputed from the
+matrix with vectorized NumPy calls, so changing the pass mark, the
+histogram's course or the sort order stays instant for thousands of
+students. The student table is virtual: rows are inserted a page at a
+time as the user scrolls down, not all at once.
+"""
+
+logger = logging.getLogger('grade_statistics')
+
+ALL_COURSES = "Tất cả học phần"
+
+
+def _format_number(value: float, digits: int = 2) -> str:
+    """Format a statistic, showing NaN (no grades) as a dash."""
+    if value is None or math.isnan(value):
+        return "-"
+    return f"{value:.{digits}f}"
+
+
+def _format_rate(value: float) -> str:
+    """Format a pass rate as a percentage."""
+    if value is None or math.isnan(value):
+        return "-"
+    return f"{value * 100:.1f}%"
+
+
+class ClassStatisticsPanel(tk.Toplevel):
+    """Window with grade statistics for a class."""
+
+    COURSE_COLUMNS = [
+        {'id': 'MAHP', 'text': 'Mã HP', 'width': 70},
+        {'id': 'TENHP', 'text': 'Tên Học Phần', 'width': 160},
+        {'id': 'count', 'text': 'Số Điểm', 'width': 60},
+        {'id': 'mean', 'text': 'TB', 'width': 50},
+        {'id': 'std', 'text': 'Độ Lệch', 'width': 60},
+        {'id': 'min', 'text': 'Thấp Nhất', 'width': 70},
+        {'id': 'max', 'text': 'Cao Nhất', 'width': 70},
+        {'id': 'p25', 'text': 'P25', 'width': 50},
+        {'id': 'p50', 'text': 'Trung Vị', 'width': 60},
+        {'id': 'p75', 'text': 'P75', 'width': 50},
+        {'id': 'pass_rate', 'text': 'Tỉ Lệ Đạt', 'width': 70},
+    ]
+
+    STUDENT_COLUMNS = [
+        {'id': 'MASV', 'text': 'Mã SV', 'width': 80},
+        {'id': 'TENSV', 'text': 'Tên Sinh Viên', 'width': 180},
+        {'id': 'count', 'text': 'Số Điểm', 'width': 60},
+        {'id': 'mean', 'text': 'TB', 'width': 50},
+        {'id': 'min', 'text': 'Thấp Nhất', 'width': 70},
+        {'id': 'max', 'text': 'Cao Nhất', 'width': 70},
+        {'id': 'pass_rate', 'text': 'Tỉ Lệ Đạt', 'width': 70},
+    ]
+
+    def __init__(self, master, matrix: GradeMatrix, title: str = "Thống Kê Điểm"):
+        """
+        Create the statistics window.
+
+        Args:
+            master: Parent widget
+            matrix: Decrypted grades of the class
+            title: Window title
+        """
+        super().__init__(master)
+        self.title(title)
+        self.geometry("900x700")
+
+        self.matrix = matrix
+        self.pass_mark_var = tk.DoubleVar(value=PASS_MARK)
+        self.course_var = tk.StringVar(value=ALL_COURSES)
+        self.summary_var = tk.StringVar()
+        self._student_stats: Dict[str, np.ndarray] = {}
+        self._student_sort = ('MASV', False)  # (column, descending)
+
+        self._create_widgets(title)
+        self._recompute()
+
+    def _create_widgets(self, title: str):
+        """Create the summary, controls, histogram and tables."""
+        ttk.Label(self, text=title, font=('Helvetica', 14, 'bold')).pack(
+            anchor='w', padx=10, pady=(10, 0))
+        ttk.Label(self, textvariable=self.summary_var).pack(anchor='w', padx=10, pady=5)
+
+        # Controls
+        controls = ttk.Frame(self)
+        controls.pack(fill=tk.X, padx=10)
+
+        ttk.Label(controls, text="Điểm đạt:").pack(side=tk.LEFT)
+        pass_mark = ttk.Spinbox(controls, from_=0, to=10, increment=0.5, width=5,
+                                textvariable=self.pass_mark_var,
+                                command=self._recompute)
+        pass_mark.pack(side=tk.LEFT, padx=5)
+        pass_mark.bind('<Return>', lambda event: self._recompute())
+
+        ttk.Label(controls, text="Biểu đồ:").pack(side=tk.LEFT, padx=(15, 0))
+        course_choices = [ALL_COURSES] + [
+            f"{name} ({mahp})" for mahp, name in zip(self.matrix.course_ids, self.matrix.course_names)]
+        course_box = ttk.Combobox(controls, textvariable=self.course_var,
+                                  values=course_choices, state='readonly', width=35)
+        course_box.pack(side=tk.LEFT, padx=5)
+        course_box.bind('<<ComboboxSelected>>', lambda event: self._draw_histogram())
+
+        # Histogram
+        self.histogram_canvas = tk.Canvas(self, height=160, background='white',
+                                          highlightthickness=0)
+        self.histogram_canvas.pack(fill=tk.X, padx=10, pady=10)
+        self.histogram_canvas.bind('<Configure>', lambda event: self._draw_histogram())
+
+        # Per-course statistics
+        ttk.Label(self, text="Theo Học Phần", font=('Helvetica', 12, 'bold')).pack(
+            anchor='w', padx=10)
+        course_frame = ttk.Frame(self)
+        course_frame.pack(fill=tk.X)
+        self.course_table = DataTable(course_frame, self.COURSE_COLUMNS,
+                                      height=5, show_buttons=False)
+
+        # Per-student statistics; virtual so thousands of rows stay responsive
+        ttk.Label(self, text="Theo Sinh Viên (nhấn tiêu đề cột để sắp xếp)",
+                  font=('Helvetica', 12, 'bold')).pack(anchor='w', padx=10)
+        student_frame = ttk.Frame(self)
+        student_frame.pack(fill=tk.BOTH, expand=True)
+        self.student_table = DataTable(student_frame, self.STUDENT_COLUMNS,
+                                       show_buttons=False, virtual=True)
+        for col in self.STUDENT_COLUMNS:
+            self.student_table.heading(
+                col['id'], command=lambda column=col['id']: self._sort_students(column))
+
+    def _pass_mark(self) -> float:
+        """Current pass mark, falling back to the default on bad input."""
+        try:
+            return float(self.pass_mark_var.get())
+        except (tk.TclError, ValueError):
+            return PASS_MARK
+
+    def _recompute(self):
+        """Recompute every statistic for the current pass mark."""
+        pass_mark = self._pass_mark()
+        matrix = self.matrix
+
+        overall = matrix.overall_stats(pass_mark)
+        students, courses = matrix.shape
+        summary = (f"{students} sinh viên, {courses} học phần, {matrix.grade_count} điểm"
+                   f" | TB: {_format_number(overall['mean'])}"
+                   f" | Độ lệch: {_format_number(overall['std'])}"
+                   f" | Trung vị: {_format_number(overall['p50'])}"
+                   f" | Tỉ lệ đạt: {_format_rate(overall['pass_rate'])}")
+        if matrix.undecryptable:
+            summary += f" | {matrix.undecryptable} điểm không giải mã được"
+        self.summary_var.set(summary)
+
+        course_stats = matrix.course_stats(pass_mark)
+        self.course_table.load_data(self._stat_rows(
+            course_stats, matrix.course_ids, matrix.course_names, 'MAHP', 'TENHP'))
+
+        self._student_stats = matrix.student_stats(pass_mark)
+        self._show_students()
+        self._draw_histogram()
+
+    def _stat_rows(self, stats: Dict[str, np.ndarray], ids: List[str], names: List[str],
+                   id_column: str, name_column: str,
+                   order: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Turn statistic arrays into table rows, optionally reordered."""
+        if order is None:
+            order = np.arange(len(ids))
+        # Format whole columns once instead of per cell lookups
+        formatted = {}
+        for name, column in stats.items():
+            values = column[order].tolist()
+            if name == 'count':
+                formatted[name] = [str(int(value)) for value in values]
+            elif name == 'pass_rate':
+                formatted[name] = [_format_rate(value) for value in values]
+            else:
+                formatted[name] = [_format_number(value) for value in values]
+
+        rows = []
+        for position, index in enumerate(order.tolist()):
+            row = {'id': ids[index], id_column: ids[index], name_column: names[index]}
+            for name, values in formatted.items():
+                row[name] = values[position]
+            rows.append(row)
+        return rows
+
+    def _sort_students(self, column: str):
+        """Sort the student table by a column; clicking again reverses it."""
+        current, descending = self._student_sort
+        descending = not descending if column == current else column not in ('MASV', 'TENSV')
+        self._student_sort = (column, descending)
+        self._show_students()
+
+    def _show_students(self):
+        """Reload the student table in the current sort order."""
+        column, descending = self._student_sort
+        matrix = self.matrix
+        if column == 'MASV':
+            order = np.arange(len(matrix.student_ids))
+        elif column == 'TENSV':
+            order = np.argsort(np.array(matrix.student_names, dtype=object), kind='stable')
+        else:
+            keys = self._student_stats[column].astype(np.float64)
+            # Students without grades sort last in either direction
+            keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+            order = np.argsort(-keys if descending else keys, kind='stable')
+        if descending and column in ('MASV', 'TENSV'):
+            order = order[::-1]
+
+        stats = {name: self._student_stats[name]
+                 for name in ('count', 'mean', 'min', 'max', 'pass_rate')}
+        self.student_table.load_data(self._stat_rows(
+            stats, matrix.student_ids, matrix.student_names, 'MASV', 'TENSV', order))
+
+    def _draw_histogram(self):
+        """Draw the grade distribution of the selected course, or of all courses."""
+        canvas = self.histogram_canvas
+        canvas.delete('all')
+
+        choice = self.course_var.get()
+        mahp = None
+        if choice != ALL_COURSES and choice.endswith(')'):
+            mahp = choice[choice.rindex('(') + 1:-1]
+        counts, edges = self.matrix.histogram(mahp, bins=10)
+
+        width = max(canvas.winfo_width(), 200)
+        height = int(canvas.cget('height'))
+        margin_x, margin_top, margin_bottom = 30, 15, 20
+        bar_width = (width - 2 * margin_x) / len(counts)
+        tallest = max(int(counts.max()) if counts.size else 0, 1)
+        pass_mark = self._pass_mark()
+
+        for i, count in enumerate(counts.tolist()):
+            x0 = margin_x + i * bar_width
+            bar_height = (height - margin_top - margin_bottom) * count / tallest
+            y0 = height - margin_bottom - bar_height
+            color = '#4a90d9' if edges[i] >= pass_mark else '#d9534f'
+            canvas.create_rectangle(x0 + 2, y0, x0 + bar_width - 2, height - margin_bottom,
+                                    fill=color, outline='')
+            if count:
+                canvas.create_text(x0 + bar_width / 2, y0 - 7, text=str(count),
+                                   font=('Helvetica', 8))
+            canvas.create_text(x0, height - margin_bottom + 9, text=f"{edges[i]:g}",
+                               font=('Helvetica', 8))
+        canvas.create_text(width - margin_x, height - margin_bottom + 9,
+                           text=f"{edges[-1]:g}", font=('Helvetica', 8))
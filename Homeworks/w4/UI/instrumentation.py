@@ -0,0 +1,276 @@
+import os
+import math
+import time
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+"""
+Instrumentation Module
+
+In-process timers and counters for the hot paths (connection checkout,
+query execution, fetching, row conversion, RSA operations, key loading).
+Each timer keeps a fixed-size log-scale histogram, so recording costs a
+lock and an increment and memory does not grow with the number of calls.
+Percentiles are read from the histogram and are accurate to within 10%.
+
+Nothing is logged per call. Statistics are logged by dump(), on demand or
+from a periodic background thread.
+
+Environment:
+------------
+QLSV_METRICS=0                   Disable recording entirely
+QLSV_METRICS_DUMP_INTERVAL=60    Log a dump every 60 seconds
+
+Usage Examples:
+--------------
+from instrumentation import timer, timed, increment, get_metrics
+
+with timer('db.execute'):
+    cursor.execute(sql, params)
+
+@timed('crypto.keygen')  # When the timer covers the whole function
+def new_private_key(): ...
+
+increment('crypto.private_key_cache_hit')
+get_metrics().dump()
+print(get_metrics().snapshot()['db.execute']['p95'])
+"""
+
+logger = logging.getLogger('instrumentation')
+
+# Histogram buckets grow by 10% from 1 microsecond; 250 buckets reach ~20 minutes
+_BUCKET_BASE = 1e-6
+_BUCKET_GROWTH = 1.1
+_BUCKET_COUNT = 250
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+
+class _Histogram:
+    """Log-scale latency histogram with count, total, min and max."""
+
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max', 'errors')
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.errors = 0
+
+    def record(self, seconds: float) -> None:
+        if seconds <= _BUCKET_BASE:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / _BUCKET_BASE) / _LOG_GROWTH), _BUCKET_COUNT - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """Upper edge of the bucket holding the given percentile, clamped to min/max."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                upper = _BUCKET_BASE * _BUCKET_GROWTH ** (index + 1)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class _Timer:
+    """Context manager that records its elapsed time under a name."""
+
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.record(self._name, time.perf_counter() - self._start,
+                             error=exc_type is not None)
+        return False
+
+
+class _NullTimer:
+    """Timer used while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Thread-safe registry of named timers and counters."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._timers: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._started = time.monotonic()
+        self._dump_thread: Optional[threading.Thread] = None
+        self._dump_stop = threading.Event()
+
+    def timer(self, name: str):
+        """Context manager timing its block under name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing every call of a function under name."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float, error: bool = False) -> None:
+        """Add one measurement to a timer."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = _Histogram()
+            histogram.record(seconds)
+            if error:
+                histogram.errors += 1
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get current statistics.
+
+        Returns:
+            Dict mapping each timer name to its count, errors, total, mean,
+            min, max, p50, p95 and p99 (seconds), plus 'counters' and
+            'uptime'
+        """
+        with self._lock:
+            result: Dict[str, Any] = {name: histogram.summary()
+                                      for name, histogram in self._timers.items()}
+            result['counters'] = dict(self._counters)
+            result['uptime'] = time.monotonic() - self._started
+        return result
+
+    def reset(self) -> None:
+        """Clear every timer and counter."""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._started = time.monotonic()
+
+    def format_report(self) -> str:
+        """Render the snapshot as a text table, slowest total first."""
+        snapshot = self.snapshot()
+        counters = snapshot.pop('counters')
+        uptime = snapshot.pop('uptime')
+
+        lines = [f"Metrics after {uptime:.0f}s",
+                 f"{'timer':<32}{'count':>8}{'err':>5}{'total s':>10}"
+                 f"{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, stats in sorted(snapshot.items(), key=lambda item: item[1]['total'], reverse=True):
+            lines.append(
+                f"{name:<32}{stats['count']:>8}{stats['errors']:>5}{stats['total']:>10.3f}"
+                f"{stats['mean'] * 1000:>10.2f}{stats['p50'] * 1000:>10.2f}"
+                f"{stats['p95'] * 1000:>10.2f}{stats['p99'] * 1000:>10.2f}{stats['max'] * 1000:>10.2f}")
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name:<32}{value:>8}")
+        return "\n".join(lines)
+
+    def dump(self, level: int = logging.INFO) -> None:
+        """Log the current statistics."""
+        logger.log(level, self.format_report())
+
+    def start_periodic_dump(self, interval: float) -> None:
+        """Log statistics every interval seconds from a daemon thread."""
+        if interval <= 0 or (self._dump_thread and self._dump_thread.is_alive()):
+            return
+        self._dump_stop.clear()
+
+        def run():
+            while not self._dump_stop.wait(interval):
+                self.dump()
+
+        self._dump_thread = threading.Thread(target=run, name='metrics-dump', daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self) -> None:
+        """Stop the periodic dump thread."""
+        self._dump_stop.set()
+        self._dump_thread = None
+
+
+_metrics = Metrics(enabled=os.environ.get('QLSV_METRICS', '1') != '0')
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics registry."""
+    return _metrics
+
+
+def timer(name: str):
+    """Time a block with the process-wide registry."""
+    return _metrics.timer(name)
+
+
+def timed(name: str) -> Callable:
+    """Time every call of a function with the process-wide registry."""
+    return _metrics.timed(name)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Add to a counter in the process-wide registry."""
+    _metrics.increment(name, amount)
+
+
+def dump_interval_from_env() -> float:
+    """Seconds between periodic dumps from QLSV_METRICS_DUMP_INTERVAL, 0 if unset."""
+    try:
+        return float(os.environ.get('QLSV_METRICS_DUMP_INTERVAL', '0'))
+    except ValueError:
+        return 0.0
@@ -0,0 +1,179 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from crypto_utils import CryptoManager
+from instrumentation import increment
+
+"""
+Key Factory Module
+
+Keeps a small pool of pre-generated RSA key pairs so creating an employee
+does not wait for prime generation. A daemon thread refills the pool while
+the application is idle: it waits IDLE_DELAY seconds after starting and
+after the last key was taken, so a burst of employee creations does not
+compete with it for the CPU. OpenSSL releases the GIL while generating, so
+the Tk loop keeps running.
+
+Pooled keys are unencrypted and only live in memory; each key is handed
+out once and the pool is emptied when the factory stops, which happens at
+logout and at application shutdown. Callers wrap the key with the
+employee's password (CryptoManager.wrap_private_key), which takes
+milliseconds. When the pool is empty, take() returns None and the caller
+generates a key itself.
+
+Environment:
+------------
+QLSV_KEY_POOL_SIZE=4             Keys kept ready; 0 disables the factory
+
+Usage Examples:
+--------------
+factory = get_key_factory()
+factory.start()  # When the add employee form opens
+factory.stop()   # At logout; drops every pooled key
+
+private_key = factory.take()  # None if the pool is empty or disabled
+private_key_path, public_key_pem = crypto_mgr.generate_key_pair(
+    "EMP001", "password", private_key)
+"""
+
+logger = logging.getLogger('key_factory')
+
+DEFAULT_POOL_SIZE = 4
+
+# Seconds without a take() before the pool is refilled
+IDLE_DELAY = 1.0
+
+# Seconds to back off after a failed key generation
+RETRY_DELAY = 5.0
+
+
+class KeyFactory:
+    """Bounded pool of pre-generated RSA private keys, refilled in the background."""
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, idle_delay: float = IDLE_DELAY):
+        """
+        Initialize the factory; nothing is generated until start().
+
+        Args:
+            size: Number of keys to keep ready
+            idle_delay: Seconds without a take() before refilling
+        """
+        self.size = max(0, size)
+        self.idle_delay = idle_delay
+        self._keys: Deque[rsa.RSAPrivateKey] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event: Optional[threading.Event] = None
+        self._last_take = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self) -> None:
+        """Start refilling the pool; does nothing if disabled or already running."""
+        with self._cond:
+            if self.size == 0 or (self._thread and self._thread.is_alive()):
+                return
+            # Each run gets its own event, so a stopped thread that is still
+            # generating never keeps running beside its replacement
+            self._stop_event = threading.Event()
+            # Count the start as activity, so the first refill also waits IDLE_DELAY
+            self._last_take = time.monotonic()
+            self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                            name='key-factory', daemon=True)
+            self._thread.start()
+        logger.info(f"Key factory started, keeping {self.size} keys ready")
+
+    def stop(self) -> None:
+        """Stop refilling and drop every pooled key."""
+        with self._cond:
+            if self._stop_event:
+                self._stop_event.set()
+            self._stop_event = None
+            self._keys.clear()
+            self._thread = None
+            self._cond.notify_all()
+
+    @property
+    def running(self) -> bool:
+        with self._cond:
+            return self._thread is not None and self._thread.is_alive()
+
+    def take(self) -> Optional[rsa.RSAPrivateKey]:
+        """
+        Take a pre-generated private key out of the pool.
+
+        Returns:
+            A key that is handed out to no one else, or None if the pool is
+            empty
+        """
+        with self._cond:
+            self._last_take = time.monotonic()
+            if not self._keys:
+                self.misses += 1
+                increment('crypto.key_pool_miss')
+                return None
+            private_key = self._keys.popleft()
+            self.hits += 1
+            increment('crypto.key_pool_hit')
+            self._cond.notify_all()
+            return private_key
+
+    def stats(self) -> Dict[str, int]:
+        """Get pool statistics (size, max_size, hits, misses)."""
+        with self._cond:
+            return {'size': len(self._keys), 'max_size': self.size,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def _run(self, stop: threading.Event) -> None:
+        """Refill loop of the background thread."""
+        while True:
+            with self._cond:
+                while not stop.is_set() and len(self._keys) >= self.size:
+                    self._cond.wait()
+                if stop.is_set():
+                    return
+                wait = self._last_take + self.idle_delay - time.monotonic()
+                if wait > 0:
+                    # Still busy; check again once things quiet down
+                    self._cond.wait(wait)
+                    continue
+
+            try:
+                private_key = CryptoManager.new_private_key()
+            except Exception as e:
+                logger.error(f"Error pre-generating key pair: {str(e)}")
+                with self._cond:
+                    self._cond.wait(RETRY_DELAY)
+                continue
+
+            with self._cond:
+                if stop.is_set():
+                    return
+                self._keys.append(private_key)
+
+
+def _pool_size_from_env() -> int:
+    """Pool size from QLSV_KEY_POOL_SIZE, DEFAULT_POOL_SIZE if unset or invalid."""
+    try:
+        return int(os.environ.get('QLSV_KEY_POOL_SIZE', DEFAULT_POOL_SIZE))
+    except ValueError:
+        return DEFAULT_POOL_SIZE
+
+
+_key_factory: Optional[KeyFactory] = None
+_key_factory_lock = threading.Lock()
+
+
+def get_key_factory() -> KeyFactory:
+    """Get the process-wide key factory."""
+    global _key_factory
+    with _key_factory_lock:
+        if _key_factory is None:
+            _key_factory = KeyFactory(_pool_size_from_env())
+        return _key_factory
@@ -3,10 +3,9 @@ from tkinter import ttk
 import logging
 from typing import Callable, Optional
 
-from db_connector import DatabaseConnector
 from session import EmployeeSession
 from ui_components import MessageDisplay
-from crypto_utils import CryptoManager
+from task_runner import TaskExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +20,9 @@ class LoginScreen(ttk.Frame):
         self.master = master
         self.on_login_success = on_login_success
 
-        # Database connection
-        self.db = DatabaseConnector()
+        # Database connection, created on the first login attempt so the
+        # form is shown before pyodbc loads
+        self._db = None
 
         # Session manager
         self.employee_session = EmployeeSession()
@@ -36,6 +36,14 @@ class LoginScreen(ttk.Frame):
         self.style.configure("Error.TLabel", foreground='red')
         self.style.configure("Login.TButton", font=('Arial', 10, 'bold'))
 
+    @property
+    def db(self):
+        """Database connector, imported and created on first use."""
+        if self._db is None:
+            from db_connector import DatabaseConnector
+            self._db = DatabaseConnector()
+        return self._db
+
     def _create_widgets(self):
         """Create and layout the login form widgets."""
         # Main container with padding and border
@@ -133,7 +141,6 @@ class LoginScreen(ttk.Frame):
         # Clear previous error
         self.error_var.set("")
         self.status_var.set("Đang xác thực...")
-        self.update()  # Update UI to show status immediately
 
         # Disable login button during authentication
         self.login_button.configure(state="disabled")
@@ -149,9 +156,23 @@ class LoginScreen(ttk.Frame):
             self.login_button.configure(state="normal")
             return
 
-        # Attempt to authenticate
+        # Authenticate in the background so the window keeps repainting
+        TaskExecutor().submit(
+            self._authenticate, username, password,
+            on_success=lambda employee: self._on_authenticated(username, employee),
+            on_error=self._on_login_error,
+            key='login',
+            description="Đang xác thực...")
+
+    def _authenticate(self, username: str, password: str) -> Optional[dict]:
+        """Authenticate and unlock the employee's keys. Runs off the Tk thread."""
         try:
-            # First try with client-side encryption
+            # One round trip checks both password hash styles and returns
+            # everything the session needs
+            employee = self.db.login_employee(username, password)
+        except Exception as e:
+            # Database without SP_LOGIN_NHANVIEN: use the older two-step login
+            logger.warning(f"Single-call login unavailable, falling back: {str(e)}")
             employee = self.db.authenticate_employee_with_client_encryption(
                 username, password)
 
@@ -161,39 +182,75 @@ class LoginScreen(ttk.Frame):
                     f"Client-side authentication failed, trying original method for user: {username}")
                 employee = self.db.authenticate_employee(username, password)
 
-            logger.info(
-                f"Employee authentication result: {employee is not None}")
+        logger.info(
+            f"Employee authentication result: {employee is not None}")
 
-            if employee:
-                # Login successful
-                self.employee_session.login(employee, password)
-                logger.info(f"Login successful for user: {username}")
+        if employee:
+            # Loading the private key runs the slow PKCS8 KDF; keep it here
+            self.employee_session.login(employee, password)
+        return employee
 
-                # Show success message
-                self.status_var.set(
-                    f"Đăng nhập thành công! Xin chào {employee.get('HOTEN', '')}")
-                self.update()  # Update UI to show status
+    def _on_authenticated(self, username: str, employee: Optional[dict]):
+        """Update the form after authentication finished."""
+        if employee:
+            # Login successful
+            logger.info(f"Login successful for user: {username}")
 
-                # Clear form
-                self.username_var.set("")
-                self.password_var.set("")
+            # Show success message
+            self.status_var.set(
+                f"Đăng nhập thành công! Xin chào {employee.get('HOTEN', '')}")
 
-                # Call success callback after a short delay to show the success message
-                self.after(1000, self._complete_login)
-            else:
-                # Login failed
-                self.error_var.set("Tên đăng nhập hoặc mật khẩu không đúng")
-                self.status_var.set("")
-                logger.warning(f"Login failed for user: {username}")
-                self.login_button.configure(state="normal")
+            # Clear form
+            self.username_var.set("")
+            self.password_var.set("")
 
-        except Exception as e:
-            # Handle connection error
-            self.error_var.set(f"Lỗi kết nối đến cơ sở dữ liệu: {str(e)}")
+            # Warm the first screens' caches while the success message shows
+            self._prefetch()
+
+            # Call success callback after a short delay to show the success message
+            self.after(1000, self._complete_login)
+        else:
+            # Login failed
+            self.error_var.set("Tên đăng nhập hoặc mật khẩu không đúng")
             self.status_var.set("")
-            logger.error(f"Database error during login: {str(e)}")
+            logger.warning(f"Login failed for user: {username}")
             self.login_button.configure(state="normal")
 
+    def _on_login_error(self, error: Exception):
+        """Handle connection errors raised during authentication."""
+        self.error_var.set(f"Lỗi kết nối đến cơ sở dữ liệu: {str(error)}")
+        self.status_var.set("")
+        logger.error(f"Database error during login: {str(error)}")
+        self.login_button.configure(state="normal")
+
+    def _prefetch(self):
+        """
+        Load the data the first screens need in the background.
+
+        Each lookup is its own task so they run on separate pooled
+        connections. The private key was already unlocked by _authenticate.
+        """
+        session = self.employee_session
+        employee_id = session.employee_id
+        lookups = {
+            'prefetch:managed-classes': lambda: self.db.get_classes_by_employee(employee_id),
+            'prefetch:classes': self.db.get_classes,
+            'prefetch:courses': self.db.get_courses,
+            'prefetch:employees': self.db.get_employees,
+        }
+        if session.envelope_encryption:
+            lookups['prefetch:data-keys'] = self._prefetch_data_keys
+
+        tasks = TaskExecutor()
+        for key, lookup in lookups.items():
+            tasks.submit(lookup, key=key, description="Đang tải dữ liệu...")
+
+    def _prefetch_data_keys(self):
+        """Unwrap the data keys of every managed class. Runs off the Tk thread."""
+        session = self.employee_session
+        for class_id in session.get_managed_classes(self.db) or ():
+            session.get_class_data_key(class_id, self.db)
+
     def _complete_login(self):
         """Complete the login process after showing success message."""
         # Call success callback
@@ -0,0 +1,145 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+"""
+Reference Cache Module
+
+Read-through cache for slowly changing reference data (classes, courses,
+employees, class rosters) so that navigating between screens does not
+re-run the same lookups. Entries expire after a TTL and are dropped
+explicitly by the code paths that change the underlying tables.
+
+Every kind of data carries a generation counter that invalidate() bumps.
+A load that started before an invalidation is not stored, so a slow
+query racing a write cannot put stale rows back into the cache.
+
+Usage Examples:
+--------------
+cache = get_reference_cache()
+
+classes = cache.get('classes', None, lambda: db.execute_sproc('SP_SEL_LOP'))
+cache.invalidate('classes')               # After add/update/delete class
+cache.invalidate('students', 'L001')      # Only one class's roster
+print(cache.stats())
+"""
+
+logger = logging.getLogger('reference_cache')
+
+# Seconds before a cached lookup is fetched again; other clients' changes
+# become visible after at most this long
+REFERENCE_TTL = 300
+
+
+def _copy(value: Any) -> Any:
+    """Copy a cached row list so callers cannot modify the cached rows."""
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    return value
+
+
+class ReferenceCache:
+    """Thread-safe read-through cache with TTL and per-kind generations."""
+
+    def __init__(self, ttl: float = REFERENCE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, kind: str, key: Hashable, loader: Callable[[], Any],
+            refresh: bool = False) -> Any:
+        """
+        Return a cached value, loading it on a miss.
+
+        Args:
+            kind: Category of data, the unit of invalidation (e.g. 'classes')
+            key: Entry within the kind (e.g. a class ID), or None
+            loader: Zero-argument function fetching the value from the database
+            refresh: Skip the cached value and load again
+
+        Returns:
+            A copy of the cached or freshly loaded value. None results
+            (failed queries) are returned but not cached.
+        """
+        entry_key = (kind, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = None if refresh else self._entries.get(entry_key)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                return _copy(entry[1])
+            self._misses += 1
+            generation = self._generations.get(kind, 0)
+
+        value = loader()
+        if value is None:
+            return None
+
+        with self._lock:
+            # Drop the result if the data changed while it was loading
+            if self._generations.get(kind, 0) == generation:
+                self._entries[entry_key] = (time.monotonic() + self.ttl, value)
+        return _copy(value)
+
+    def invalidate(self, kind: Optional[str] = None, key: Hashable = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            kind: Category to drop; None drops everything
+            key: Single entry within the kind; None drops the whole kind
+        """
+        with self._lock:
+            self._invalidations += 1
+            if kind is None:
+                for name in set(k for k, _ in self._entries) | set(self._generations):
+                    self._generations[name] = self._generations.get(name, 0) + 1
+                self._entries.clear()
+                return
+
+            self._generations[kind] = self._generations.get(kind, 0) + 1
+            if key is None:
+                for entry_key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[entry_key]
+            else:
+                self._entries.pop((kind, key), None)
+
+    def generation(self, kind: str) -> int:
+        """Get how many times a kind has been invalidated."""
+        with self._lock:
+            return self._generations.get(kind, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'invalidations': self._invalidations,
+                'generations': dict(self._generations),
+            }
+
+
+_shared_cache: Optional[ReferenceCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> ReferenceCache:
+    """Get the process-wide reference cache, creating it if needed."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ReferenceCache()
+        return _shared_cache
@@ -1,12 +1,22 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Set
+import os
+import sys
 import logging
-from crypto_utils import CryptoManager
+from reference_cache import get_reference_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('session')
 
 
+def stop_key_factory() -> None:
+    """Drop the unencrypted pre-generated keys, if the key factory was ever loaded."""
+    # Checking sys.modules keeps logout from importing cryptography
+    key_factory = sys.modules.get('key_factory')
+    if key_factory is not None:
+        key_factory.get_key_factory().stop()
+
+
 class EmployeeSession:
     """Singleton class to manage employee session data across the application."""
 
@@ -25,7 +35,12 @@ class EmployeeSession:
             self._password = None  # Store password for private key access
             self._private_key = None  # Store loaded private key
             self._public_key = None  # Store employee's public key
-            self._crypto_mgr = CryptoManager()
+            self._data_keys = {}  # Unwrapped envelope data keys by class ID
+            self._managed_classes = None  # Class IDs managed by the employee, once loaded
+            self._managed_generation = None  # 'classes' cache generation they were loaded at
+            # Encrypt new grades with class data keys; QLSV_ENVELOPE_ENCRYPTION=1 enables it
+            self.envelope_encryption = os.environ.get('QLSV_ENVELOPE_ENCRYPTION', '0') == '1'
+            self._crypto = None  # CryptoManager, created on first use
             self._initialized = True
             logger.info("Employee session initialized")
 
@@ -48,8 +63,16 @@ class EmployeeSession:
         self._authenticated = True
         self._password = password  # Store password for private key access
 
+        # SP_LOGIN_NHANVIEN already lists the managed classes
+        managed = employee_data.get('MANAGED_CLASSES')
+        self._set_managed_classes(managed)
+
+        # Employees whose key is held by the database have no key file, and
+        # SP_LOGIN_NHANVIEN already decrypted their salary
+        server_key = employee_data.get('KIEU_KHOA') == 'SERVER'
+
         # Try to load the keys
-        if password and 'MANV' in employee_data:
+        if password and 'MANV' in employee_data and not server_key:
             if self.load_keys():
                 # If we have encrypted salary data, decrypt it
                 if 'ENCRYPTED_LUONG' in employee_data and employee_data['ENCRYPTED_LUONG']:
@@ -59,8 +82,6 @@ class EmployeeSession:
                             employee_data['ENCRYPTED_LUONG']
                         )
                         employee_data['LUONG'] = int(decrypted_salary)
-                        logger.info(
-                            f"Successfully decrypted salary: {employee_data['LUONG']}")
                     except Exception as e:
                         logger.error(f"Failed to decrypt salary: {str(e)}")
                         employee_data['LUONG'] = 0
@@ -76,8 +97,22 @@ class EmployeeSession:
         self._password = None
         self._private_key = None
         self._public_key = None
+        self._data_keys = {}
+        self._set_managed_classes(None)
+        # Wipe unlocked private keys shared with other CryptoManager instances
+        if self._crypto is not None:
+            self._crypto.forget_private_key()
+        stop_key_factory()
         logger.info("Employee logged out")
 
+    @property
+    def _crypto_mgr(self):
+        """CryptoManager, imported on first use so startup skips cryptography."""
+        if self._crypto is None:
+            from crypto_utils import CryptoManager
+            self._crypto = CryptoManager()
+        return self._crypto
+
     @property
     def is_authenticated(self) -> bool:
         """Check if an employee is currently authenticated."""
@@ -150,12 +185,13 @@ class EmployeeSession:
             logger.error(f"Error encrypting data: {str(e)}")
             return None
 
-    def decrypt_data(self, encrypted_data: bytes) -> Optional[str]:
+    def decrypt_data(self, encrypted_data: bytes, data_key: Optional[bytes] = None) -> Optional[str]:
         """
         Decrypt data using the employee's private key.
 
         Args:
             encrypted_data: Encrypted data as bytes
+            data_key: Class data key for envelope-encrypted values
 
         Returns:
             Decrypted data as string or None if decryption fails
@@ -166,7 +202,7 @@ class EmployeeSession:
 
         try:
             decrypted_data = self._crypto_mgr.decrypt_data(
-                self._private_key, encrypted_data)
+                self._private_key, encrypted_data, data_key)
             return decrypted_data
 
         except Exception as e:
@@ -182,9 +218,58 @@ class EmployeeSession:
         if not employee_id:
             return False
 
-        # Call the stored procedure to check permission
+        managed = self.get_managed_classes(db_connector)
+        if managed is not None:
+            return class_id in managed
+
+        # Class list unavailable; ask about this one class
         return db_connector.check_employee_manages_class(employee_id, class_id)
 
+    def get_managed_classes(self, db_connector) -> Optional[Set[str]]:
+        """
+        Get the IDs of the classes the current employee manages.
+
+        The set is loaded once and reused until a class is created, updated
+        or deleted, which bumps the reference cache's 'classes' generation.
+
+        Args:
+            db_connector: Database connector used if the set must be reloaded
+
+        Returns:
+            Set of MALOP values, or None if it could not be loaded
+        """
+        if not self.is_authenticated:
+            return None
+
+        generation = get_reference_cache().generation('classes')
+        if self._managed_classes is not None and self._managed_generation == generation:
+            return self._managed_classes
+
+        try:
+            classes = db_connector.get_classes_by_employee(self.employee_id)
+        except Exception as e:
+            logger.error(f"Error loading managed classes: {str(e)}")
+            classes = None
+        if classes is None:
+            return None
+
+        self._managed_classes = {cls['MALOP'] for cls in classes}
+        self._managed_generation = generation
+        return self._managed_classes
+
+    def invalidate_managed_classes(self) -> None:
+        """Forget the managed class set so the next check reloads it."""
+        self._set_managed_classes(None)
+
+    def _set_managed_classes(self, managed: Optional[Sequence[str]]) -> None:
+        """Store the managed class IDs, stamped with the current generation."""
+        if managed is None:
+            self._managed_classes = None
+            self._managed_generation = None
+        else:
+            self._managed_classes = set(managed)
+            self._managed_generation = get_reference_cache().generation('classes')
+
     def load_keys(self) -> bool:
         """
         Load the employee's private key if available.
@@ -207,6 +292,9 @@ class EmployeeSession:
             # Store public key from employee data
             if 'PUBKEY' in self._employee_data and self._employee_data['PUBKEY']:
                 self._public_key = self._employee_data['PUBKEY']
+                # Parse once now so grade encryption hits the key cache
+                self._crypto_mgr.load_public_key(
+                    self._public_key, employee_id=self._employee_data['MANV'])
 
             return self._private_key is not None
 
@@ -214,12 +302,60 @@ class EmployeeSession:
             logger.error(f"Failed to load keys: {str(e)}")
             return False
 
-    def encrypt_grade(self, grade: float) -> Optional[str]:
+    def get_class_data_key(self, class_id: str, db_connector, create: bool = False) -> Optional[bytes]:
+        """
+        Get the unwrapped envelope data key for a class.
+
+        Args:
+            class_id: Class ID
+            db_connector: Database connector used to load or store the wrapped key
+            create: Generate and store a new data key if the class has none
+
+        Returns:
+            bytes: Raw AES data key, or None if unavailable
+        """
+        if not self.is_authenticated or not self._private_key:
+            return None
+
+        if class_id in self._data_keys:
+            return self._data_keys[class_id]
+
+        try:
+            wrapped_key = db_connector.get_class_data_key(
+                class_id, self.employee_id)
+
+            if wrapped_key is None and create:
+                if not self._public_key:
+                    logger.error("No public key available to wrap a data key")
+                    return None
+                new_key = self._crypto_mgr.generate_data_key()
+                db_connector.save_class_data_key(
+                    class_id, self.employee_id,
+                    self._crypto_mgr.wrap_data_key(self._public_key, new_key))
+                # Re-read in case another session stored a key first
+                wrapped_key = db_connector.get_class_data_key(
+                    class_id, self.employee_id)
+
+            if wrapped_key is None:
+                return None
+
+            data_key = self._crypto_mgr.unwrap_data_key(
+                self._private_key, wrapped_key)
+            self._data_keys[class_id] = data_key
+            return data_key
+
+        except Exception as e:
+            logger.error(f"Error loading data key for class {class_id}: {str(e)}")
+            return None
+
+    def encrypt_grade(self, grade: float, data_key: Optional[bytes] = None) -> Optional[str]:
         """
         Encrypt a grade value for database storage.
 
         Args:
             grade: Grade value to encrypt
+            data_key: Class data key; if given, the compact envelope format is
+                      used instead of a per-value RSA ciphertext
 
         Returns:
             str: Encoded and encrypted grade ready for database storage,
@@ -230,6 +366,10 @@ class EmployeeSession:
             return None
 
         try:
+            if data_key:
+                return self._crypto_mgr.encode_for_db(
+                    self._crypto_mgr.encrypt_with_data_key(data_key, str(grade)))
+
             # Get the employee's public key
             if 'PUBKEY' not in self._employee_data or not self._employee_data['PUBKEY']:
                 logger.error("No public key available for grade encryption")
@@ -247,12 +387,13 @@ class EmployeeSession:
             logger.error(f"Error encrypting grade: {str(e)}")
             return None
 
-    def decrypt_grade(self, encoded_grade: str) -> Optional[float]:
+    def decrypt_grade(self, encoded_grade: str, data_key: Optional[bytes] = None) -> Optional[float]:
         """
         Decrypt a grade value retrieved from the database.
 
         Args:
             encoded_grade: Encoded and encrypted grade from database
+            data_key: Class data key for envelope-encrypted grades
 
         Returns:
             float: Decrypted grade value, or None if decryption fails
@@ -265,7 +406,8 @@ class EmployeeSession:
             # Decrypt from database format
             decrypted_value = self._crypto_mgr.decrypt_data_from_db(
                 self._private_key,
-                encoded_grade
+                encoded_grade,
+                data_key
             )
 
             # Convert to float
@@ -274,3 +416,28 @@ class EmployeeSession:
         except Exception as e:
             logger.error(f"Error decrypting grade: {str(e)}")
             return None
+
+    def decrypt_grades(self, encrypted_grades: Sequence[Any],
+                       data_key: Optional[bytes] = None) -> List[Optional[float]]:
+        """
+        Decrypt a batch of grade values in parallel.
+
+        Args:
+            encrypted_grades: Encrypted grades as bytes or base64 strings
+            data_key: Class data key for envelope-encrypted grades
+
+        Returns:
+            List of decrypted grades in input order; None where decryption failed
+        """
+        if not self.is_authenticated or not self._private_key:
+            logger.error("Cannot decrypt grades: No private key available")
+            return [None] * len(encrypted_grades)
+
+        grades = []
+        for plaintext, error in self._crypto_mgr.decrypt_many(
+                self._private_key, encrypted_grades, data_key=data_key):
+            try:
+                grades.append(float(plaintext) if error is None else None)
+            except ValueError:
+                grades.append(None)
+        return grades
@@ -7,6 +7,7 @@ from datetime import datetime
 from db_connector import DatabaseConnector
 from session import EmployeeSession
 from ui_components import Form, TextField, DateField, ComboBoxField, DataTable, MessageDisplay
+from task_runner import TaskExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -177,7 +178,7 @@ class StudentForm(Form):
                     MessageDisplay.show_info(
                         "Thành Công", "Cập nhật thông tin sinh viên thành công")
                     if self.on_save:
-                        self.on_save()
+                        self.on_save(data)
                 else:
                     MessageDisplay.show_error(
                         "Lỗi", "Không thể cập nhật thông tin sinh viên")
@@ -197,7 +198,7 @@ class StudentForm(Form):
                     MessageDisplay.show_info(
                         "Thành Công", "Thêm sinh viên mới thành công")
                     if self.on_save:
-                        self.on_save()
+                        self.on_save(data)
                 else:
                     MessageDisplay.show_error(
                         "Lỗi", "Không thể thêm sinh viên mới")
@@ -216,11 +217,14 @@ class StudentForm(Form):
 class StudentListScreen(ttk.Frame):
     """Screen for displaying and managing students in a class."""
 
+    PAGE_SIZE = 200  # Students fetched per page
+
     def __init__(self, master, class_id: str):
         super().__init__(master)
 
         # Store class ID
         self.class_id = class_id
+        self._next_token = None  # Continuation token of the next student page
 
         # Database connection
         self.db = DatabaseConnector()
@@ -253,7 +257,7 @@ class StudentListScreen(ttk.Frame):
         employee_id = self.employee_session.employee_id
         if not employee_id or not self.class_id:
             return False
-        return self.db.check_employee_manages_class(employee_id, self.class_id)
+        return self.employee_session.can_manage_class(self.class_id, self.db)
 
     def _create_widgets(self):
         """Create the main UI components."""
@@ -292,7 +296,10 @@ class StudentListScreen(ttk.Frame):
         self.students_table = DataTable(
             self.list_frame,
             columns=student_columns,
-            on_select=self._on_student_selected
+            on_select=self._on_student_selected,
+            virtual=True,  # Large classes: insert rows as the user scrolls
+            page_size=self.PAGE_SIZE,
+            page_loader=self._load_next_page
         )
 
         # Configure table buttons based on permissions
@@ -345,8 +352,8 @@ class StudentListScreen(ttk.Frame):
 
     def show_list(self):
         """Show the list view, hide the form."""
-        self.refresh_data()
         # No need to adjust layout as both frames are in grid
+        # The initial load happens in __init__; saves patch the table in place
 
     def show_form(self):
         """Show the form view, hide the list."""
@@ -355,73 +362,115 @@ class StudentListScreen(ttk.Frame):
         self.student_form.set_fields_state("normal")
 
     def refresh_data(self):
-        """Refresh the student list."""
-        try:
-            # Get students for this class
-            students = self.db.get_students_by_class(self.class_id)
-
-            # Transform data for the table
-            table_data = []
-            if students:
-                for student in students:
-                    # Format date
-                    ngaysinh = student.get('NGAYSINH', None)
-                    if ngaysinh:
-                        # Handle different datetime formats
-                        if isinstance(ngaysinh, datetime):
-                            ngaysinh = ngaysinh.strftime('%Y-%m-%d')
-                        elif isinstance(ngaysinh, str):
-                            # Try to parse the date string if it's not in the expected format
+        """Reload the student list from its first page, in the background."""
+        self._next_token = None
+        TaskExecutor().submit(
+            self._load_students,
+            on_success=self._show_students,
+            on_error=self._on_load_error,
+            key=f"students:{id(self)}",
+            description=f"Đang tải danh sách sinh viên lớp {self.class_id}...")
+
+    def _load_next_page(self):
+        """Fetch the page after the loaded rows; called by the table on scroll."""
+        if self._next_token is None:
+            return
+        TaskExecutor().submit(
+            self._load_students, self._next_token,
+            on_success=self._append_students,
+            on_error=self._on_page_error,
+            key=f"students:{id(self)}",
+            description=f"Đang tải thêm sinh viên lớp {self.class_id}...")
+
+    def _load_students(self, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch and format one page of students. Runs off the Tk thread."""
+        # Get one page of students for this class
+        page = self.db.get_students_by_class_page(
+            self.class_id, after, self.PAGE_SIZE)
+        if page is None:
+            raise RuntimeError("Không thể tải danh sách sinh viên")
+
+        students, next_token = page
+        return [self._format_student(student) for student in students], next_token
+
+    @staticmethod
+    def _format_student(student: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a SINHVIEN record into a table row."""
+        # Format date
+        ngaysinh = student.get('NGAYSINH', None)
+        if ngaysinh:
+            # Handle different datetime formats
+            if isinstance(ngaysinh, datetime):
+                ngaysinh = ngaysinh.strftime('%Y-%m-%d')
+            elif isinstance(ngaysinh, str):
+                # Try to parse the date string if it's not in the expected format
+                try:
+                    # If it's already in YYYY-MM-DD format, keep it
+                    if len(ngaysinh) == 10 and ngaysinh[4] == '-' and ngaysinh[7] == '-':
+                        pass
+                    else:
+                        # Try to parse with different formats
+                        try:
+                            # Try SQL Server datetime format
+                            date_obj = datetime.strptime(
+                                ngaysinh, '%Y-%m-%d %H:%M:%S')
+                            ngaysinh = date_obj.strftime(
+                                '%Y-%m-%d')
+                        except ValueError:
+                            # Try other common formats
                             try:
-                                # If it's already in YYYY-MM-DD format, keep it
-                                if len(ngaysinh) == 10 and ngaysinh[4] == '-' and ngaysinh[7] == '-':
-                                    pass
-                                else:
-                                    # Try to parse with different formats
-                                    try:
-                                        # Try SQL Server datetime format
-                                        date_obj = datetime.strptime(
-                                            ngaysinh, '%Y-%m-%d %H:%M:%S')
-                                        ngaysinh = date_obj.strftime(
-                                            '%Y-%m-%d')
-                                    except ValueError:
-                                        # Try other common formats
-                                        try:
-                                            from dateutil import parser
-                                            date_obj = parser.parse(ngaysinh)
-                                            ngaysinh = date_obj.strftime(
-                                                '%Y-%m-%d')
-                                        except:
-                                            # If all parsing fails, keep original
-                                            logger.warning(
-                                                f"Could not parse date: {ngaysinh}")
-                            except Exception as e:
-                                logger.error(f"Error formatting date: {e}")
-
-                    table_data.append({
-                        'id': student['MASV'],  # Use student ID as row ID
-                        'MASV': student['MASV'],
-                        'HOTEN': student['HOTEN'],
-                        'NGAYSINH': ngaysinh,
-                        'DIACHI': student.get('DIACHI', ''),
-                        'MALOP': student['MALOP'],
-                        'TENDN': student.get('TENDN', '')
-                    })
-
-                # Load data into table
-                self.students_table.load_data(table_data)
-                logger.info(
-                    f"Loaded {len(table_data)} students for class {self.class_id}")
-            else:
-                # Display a message in the table instead of a popup
-                self.students_table.clear_data()  # Clear existing data
-                self.students_table.show_message(
-                    "Lớp này chưa có sinh viên nào")
-                logger.info(f"No students found for class {self.class_id}")
-
-        except Exception as e:
-            MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(e))
-            logger.error(f"Database error when loading students: {str(e)}")
+                                from dateutil import parser
+                                date_obj = parser.parse(ngaysinh)
+                                ngaysinh = date_obj.strftime(
+                                    '%Y-%m-%d')
+                            except:
+                                # If all parsing fails, keep original
+                                logger.warning(
+                                    f"Could not parse date: {ngaysinh}")
+                except Exception as e:
+                    logger.error(f"Error formatting date: {e}")
+
+        return {
+            'id': student['MASV'],  # Use student ID as row ID
+            'MASV': student['MASV'],
+            'HOTEN': student['HOTEN'],
+            'NGAYSINH': ngaysinh,
+            'DIACHI': student.get('DIACHI', ''),
+            'MALOP': student['MALOP'],
+            'TENDN': student.get('TENDN', '')
+        }
+
+    def _show_students(self, page: Tuple[List[Dict[str, Any]], Optional[str]]):
+        """Load the first page of students into the table."""
+        table_data, self._next_token = page
+        if table_data:
+            # Load data into table
+            self.students_table.load_data(
+                table_data, has_more=self._next_token is not None)
+            logger.info(
+                f"Loaded {len(table_data)} students for class {self.class_id}")
+        else:
+            # Display a message in the table instead of a popup
+            self.students_table.clear_data()  # Clear existing data
+            self.students_table.show_message(
+                "Lớp này chưa có sinh viên nào")
+            logger.info(f"No students found for class {self.class_id}")
+
+    def _append_students(self, page: Tuple[List[Dict[str, Any]], Optional[str]]):
+        """Add a further page of students below the loaded ones."""
+        table_data, self._next_token = page
+        self.students_table.append_data(
+            table_data, has_more=self._next_token is not None)
+
+    def _on_load_error(self, error: Exception):
+        """Report a failed student load."""
+        MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(error))
+        logger.error(f"Database error when loading students: {str(error)}")
+
+    def _on_page_error(self, error: Exception):
+        """Stop paging after a failed page load; Refresh starts over."""
+        self.students_table.append_data([], has_more=False)
+        self._on_load_error(error)
 
     def _on_student_selected(self, student_id):
         """Handle student selection in the table."""
@@ -542,7 +591,7 @@ class StudentListScreen(ttk.Frame):
             if success:
                 MessageDisplay.show_info(
                     "Thành Công", "Xóa sinh viên thành công")
-                self.refresh_data()
+                self.students_table.apply_changes(deletes=[selected_id])
             else:
                 MessageDisplay.show_error("Lỗi", "Không thể xóa sinh viên")
 
@@ -550,13 +599,35 @@ class StudentListScreen(ttk.Frame):
             MessageDisplay.show_error("Lỗi Cơ Sở Dữ Liệu", str(e))
             logger.error(f"Database error when deleting student: {str(e)}")
 
-    def _on_form_saved(self):
+    def _on_form_saved(self, data: Optional[Dict[str, Any]] = None):
         """Handle form save event."""
         # Reset form title
         self.form_title.configure(text="Thông Tin Sinh Viên")
 
-        # Refresh the list and show it
-        self.refresh_data()
+        if not data:
+            # Nothing to patch the table with; reload it
+            self.refresh_data()
+            self.show_list()
+            return
+
+        masv = data['MASV']
+        if data.get('MALOP') != self.class_id:
+            # Student moved to another class
+            self.students_table.apply_changes(deletes=[masv])
+        else:
+            # Patch the single saved row; keep fields the form does not edit
+            row = self.students_table.get_row_data(masv) or {}
+            row.update({
+                'id': masv,
+                'MASV': masv,
+                'HOTEN': data['HOTEN'],
+                'NGAYSINH': (data.get('NGAYSINH') or '')[:10],
+                'DIACHI': data.get('DIACHI', ''),
+                'MALOP': data['MALOP'],
+            })
+            if not row.get('TENDN'):
+                row['TENDN'] = data.get('TENDN', '')
+            self.students_table.apply_changes(upserts=[row])
         self.show_list()
 
     def _on_form_cancelled(self):
@@ -646,7 +717,8 @@ class StudentManagementScreen(ttk.Frame):
         self.view_button.config(state='disabled')  # Initially disabled
 
         # Configure refresh button
-        self.class_table.refresh_button.configure(command=self.refresh_classes)
+        self.class_table.refresh_button.configure(
+            command=lambda: self.refresh_classes(refresh=True))
 
         # Configure selection event
         self.class_table.bind(
@@ -671,12 +743,12 @@ class StudentManagementScreen(ttk.Frame):
         """Handle double-click event on class table."""
         self._on_view_students_clicked()
 
-    def refresh_classes(self):
-        """Refresh the class list."""
+    def refresh_classes(self, refresh: bool = False):
+        """Refresh the class list; refresh bypasses the cache."""
         try:
             # Get classes for the current employee
             employee_id = self.employee_session.employee_id
-            classes = self.db.get_classes_by_employee(employee_id)
+            classes = self.db.get_classes_by_employee(employee_id, refresh=refresh)
 
             # Transform data for the table
             table_data = []
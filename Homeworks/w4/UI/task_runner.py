@@ -0,0 +1,254 @@
+import threading
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+"""
+Task Runner Module
+
+Runs database and crypto work on a small thread pool so Tk callbacks never
+block the main loop. Results are handed back to the Tk thread through a
+queue that is drained with root.after(), because Tk widgets may only be
+touched from the thread running mainloop().
+
+Usage Examples:
+--------------
+executor = TaskExecutor()
+executor.attach(root)  # Once, from Application
+
+# Load off the main thread; on_success runs on the Tk thread
+executor.submit(db.get_employees, on_success=table_loader,
+                on_error=show_error, key='employees',
+                description="Đang tải danh sách nhân viên...")
+
+# Submitting again with the same key cancels the older request
+executor.cancel('employees')
+"""
+
+logger = logging.getLogger('task_runner')
+
+
+class TaskHandle:
+    """Handle to a submitted task, used to cancel it."""
+
+    __slots__ = ('key', 'description', 'future', '_cancelled')
+
+    def __init__(self, key: Optional[str], description: str):
+        self.key = key
+        self.description = description
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Cancel the task; its callbacks will not run."""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class TaskExecutor:
+    """Singleton thread pool whose results are delivered on the Tk thread."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TaskExecutor, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self._root = None
+            self._pool: Optional[ThreadPoolExecutor] = None
+            self._results: 'queue.Queue' = queue.Queue()
+            self._lock = threading.Lock()
+            self._latest: Dict[str, TaskHandle] = {}  # Newest task per key
+            self._running: List[TaskHandle] = []
+            self._listeners: List[Callable[[int, str], None]] = []
+            self._pump_scheduled = False
+            self.max_workers = 4
+            self.poll_interval = 50  # Milliseconds between result checks
+            self._initialized = True
+
+    def attach(self, root, max_workers: int = 4, poll_interval: int = 50) -> None:
+        """
+        Bind the executor to a Tk root so tasks run in the background.
+
+        Until a root is attached, submit() runs tasks inline.
+
+        Args:
+            root: Tk root window whose after() drives the result pump
+            max_workers: Number of worker threads
+            poll_interval: Milliseconds between checks for finished tasks
+        """
+        self._root = root
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+
+    def add_busy_listener(self, listener: Callable[[int, str], None]) -> None:
+        """
+        Register a callback told how many tasks are running.
+
+        The listener runs on the Tk thread with (running_count, description
+        of the most recent running task that has one, or "").
+        """
+        self._listeners.append(listener)
+
+    def submit(self, func: Callable[..., Any], *args,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               key: Optional[str] = None,
+               description: str = "", **kwargs) -> TaskHandle:
+        """
+        Run func(*args, **kwargs) in the background.
+
+        Args:
+            func: Function to run; must not touch Tk widgets
+            on_success: Called on the Tk thread with the result
+            on_error: Called on the Tk thread with the raised exception
+            key: Tasks sharing a key supersede each other; only the newest
+                 one delivers its result
+            description: Status bar text while the task runs
+
+        Returns:
+            TaskHandle for cancellation
+        """
+        handle = TaskHandle(key, description)
+
+        with self._lock:
+            if key is not None:
+                stale = self._latest.get(key)
+                if stale is not None:
+                    stale.cancel()
+                self._latest[key] = handle
+
+        if self._root is None:
+            # No Tk loop to hand results back to; run synchronously
+            self._run_inline(handle, func, args, kwargs, on_success, on_error)
+            return handle
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='task')
+            self._running.append(handle)
+
+        handle.future = self._pool.submit(
+            self._run, handle, func, args, kwargs, on_success, on_error)
+        # Also fires for futures cancelled before they started
+        handle.future.add_done_callback(
+            lambda future: self._results.put((handle, future)))
+        self._notify_listeners()
+        self._schedule_pump()
+        return handle
+
+    def cancel(self, key: str) -> None:
+        """Cancel the newest task submitted with this key."""
+        with self._lock:
+            handle = self._latest.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    def cancel_all(self) -> None:
+        """Cancel every pending task, e.g. on logout."""
+        with self._lock:
+            handles = list(self._latest.values()) + list(self._running)
+            self._latest.clear()
+        for handle in handles:
+            handle.cancel()
+
+    def shutdown(self) -> None:
+        """Cancel pending work and stop the worker threads."""
+        self.cancel_all()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+        self._root = None
+
+    @property
+    def busy_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def _run(self, handle: TaskHandle, func, args, kwargs, on_success, on_error):
+        """Worker side: run the task and return (callback, value)."""
+        if handle.cancelled:
+            return None, None
+        try:
+            return on_success, func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Background task failed: {str(e)}")
+            return on_error, e
+
+    def _run_inline(self, handle: TaskHandle, func, args, kwargs, on_success, on_error) -> None:
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Task failed: {str(e)}")
+            self._finish(handle, on_error, e)
+            return
+        self._finish(handle, on_success, result)
+
+    def _finish(self, handle: TaskHandle, callback, value) -> None:
+        """Tk side: forget the task and deliver its result unless stale."""
+        with self._lock:
+            if handle.key is not None and self._latest.get(handle.key) is handle:
+                del self._latest[handle.key]
+        if handle.cancelled or callback is None:
+            return
+        try:
+            callback(value)
+        except Exception as e:
+            # Most often the screen was destroyed while the task ran
+            logger.error(f"Task callback failed: {str(e)}")
+
+    def _schedule_pump(self) -> None:
+        with self._lock:
+            if self._pump_scheduled or self._root is None:
+                return
+            self._pump_scheduled = True
+        self._root.after(self.poll_interval, self._pump)
+
+    def _pump(self) -> None:
+        """Drain finished tasks on the Tk thread."""
+        with self._lock:
+            self._pump_scheduled = False
+
+        finished = False
+        while True:
+            try:
+                handle, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                if handle in self._running:
+                    self._running.remove(handle)
+            finished = True
+            if not future.cancelled():
+                callback, value = future.result()
+                self._finish(handle, callback, value)
+            else:
+                self._finish(handle, None, None)
+
+        if finished:
+            self._notify_listeners()
+        if self.busy_count:
+            self._schedule_pump()
+
+    def _notify_listeners(self) -> None:
+        with self._lock:
+            count = len(self._running)
+            description = next((handle.description for handle in reversed(self._running)
+                                if handle.description), "")
+        for listener in self._listeners:
+            try:
+                listener(count, description)
+            except Exception as e:
+                logger.error(f"Busy listener failed: {str(e)}")
@@ -3,7 +3,6 @@ from tkinter import ttk, messagebox
 from typing import Callable, List, Dict, Any, Optional, Tuple
 import re
 from datetime import datetime
-from dateutil import parser
 
 
 class FormField:
@@ -212,12 +211,92 @@ class ComboBoxField(FormField):
         self.value_var.set('')
 
 
+class _RowStore:
+    """Compact row storage: one tuple of column values per row instead of a dict copy."""
+
+    def __init__(self, column_ids: List[str]):
+        self.column_ids = column_ids
+        self._column_set = set(column_ids)
+        self.ids: List[str] = []
+        self.values: List[tuple] = []
+        self.index: Dict[str, int] = {}  # Row ID -> position
+        self.extras: Dict[str, Dict[str, Any]] = {}  # Non-column fields, by row ID
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.index
+
+    def clear(self) -> None:
+        self.ids = []
+        self.values = []
+        self.index = {}
+        self.extras = {}
+
+    def append(self, item: Dict[str, Any]) -> str:
+        """Add a row, or replace it in place if its ID is already stored."""
+        item_id = str(item.get('id', len(self.ids)))
+        values = tuple(item.get(col_id, '') for col_id in self.column_ids)
+        position = self.index.get(item_id)
+        if position is None:
+            self.index[item_id] = len(self.ids)
+            self.ids.append(item_id)
+            self.values.append(values)
+        else:
+            self.values[position] = values
+
+        extra = {key: value for key, value in item.items()
+                 if key != 'id' and key not in self._column_set}
+        if extra:
+            self.extras[item_id] = extra
+        else:
+            self.extras.pop(item_id, None)
+        return item_id
+
+    def remove(self, item_ids) -> int:
+        """
+        Remove rows by ID.
+
+        Returns:
+            Lowest position that was removed (len(self) if nothing was)
+        """
+        positions = sorted(self.index[item_id] for item_id in set(item_ids)
+                           if item_id in self.index)
+        if not positions:
+            return len(self.ids)
+        removed = set(positions)
+        first = positions[0]
+        self.ids[first:] = [item_id for i, item_id in enumerate(self.ids[first:], first)
+                            if i not in removed]
+        self.values[first:] = [values for i, values in enumerate(self.values[first:], first)
+                               if i not in removed]
+        for item_id in item_ids:
+            self.index.pop(item_id, None)
+            self.extras.pop(item_id, None)
+        # Only positions after the first removed row moved
+        for i in range(first, len(self.ids)):
+            self.index[self.ids[i]] = i
+        return first
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the row dictionary for an ID."""
+        position = self.index.get(item_id)
+        if position is None:
+            return None
+        row = dict(zip(self.column_ids, self.values[position]))
+        row.update(self.extras.get(item_id, {}))
+        row['id'] = item_id
+        return row
+
+
 class DataTable(ttk.Treeview):
     """Enhanced treeview for tabular data display."""
 
     def __init__(self, master, columns: List[Dict[str, Any]], data: List[Dict] = None,
                  on_select: Optional[Callable] = None, height: int = 10,
-                 show_buttons: bool = True):
+                 show_buttons: bool = True, virtual: bool = False,
+                 page_size: int = 200, page_loader: Optional[Callable[[], None]] = None):
         """
         Initialize a data table with columns configuration.
 
@@ -226,6 +305,14 @@ class DataTable(ttk.Treeview):
         on_select: Callback when a row is selected
         height: Number of rows to display
         show_buttons: Whether to show the action buttons
+        virtual: Keep rows in a compact store and only insert them into the
+            tree a page at a time as the user scrolls down, for large result
+            sets. Inserted rows stay in the tree; this defers the cost of
+            building it rather than bounding its size
+        page_size: Rows inserted per step in virtual mode
+        page_loader: Virtual mode only; called when the user scrolls past the
+            last stored row while more data is available. It should fetch the
+            next page and pass it to append_data().
         """
         self.master = master
         self.columns = columns
@@ -233,6 +320,16 @@ class DataTable(ttk.Treeview):
         self.show_buttons = show_buttons
         self.row_data = {}  # Store original data for each row
 
+        # Virtual mode state
+        self.virtual = virtual
+        self.page_size = page_size
+        self.page_loader = page_loader
+        self._store = _RowStore([col['id'] for col in columns])
+        self._materialized = 0  # Stored rows already inserted into the tree
+        self._has_more = False  # page_loader can provide more rows
+        self._loading_page = False
+        self._fill_pending = False
+
         # Create a frame to hold the table and scrollbar
         self.frame = ttk.Frame(master)
         self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -252,7 +349,7 @@ class DataTable(ttk.Treeview):
         # Add scrollbar
         self.scrollbar = ttk.Scrollbar(
             self.frame, orient="vertical", command=self.yview)
-        self.configure(yscrollcommand=self.scrollbar.set)
+        self.configure(yscrollcommand=self._on_yscroll)
 
         # Layout table and scrollbar
         self.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -296,8 +393,16 @@ class DataTable(ttk.Treeview):
         if data:
             self.load_data(data)
 
-    def load_data(self, data: List[Dict]) -> None:
-        """Load data into the table."""
+    def load_data(self, data: List[Dict], has_more: bool = False) -> None:
+        """
+        Load data into the table.
+
+        has_more: Virtual mode only; more rows can be fetched with page_loader
+        """
+        if self.virtual:
+            self._load_virtual(data, has_more)
+            return
+
         # Clear existing data
         for i in self.get_children():
             self.delete(i)
@@ -334,10 +439,167 @@ class DataTable(ttk.Treeview):
             self.delete_button.configure(
                 state="normal" if has_data else "disabled")
 
+    def append_data(self, data: List[Dict], has_more: bool = False) -> None:
+        """
+        Add a page of rows after the loaded ones (virtual mode).
+
+        data: Rows of the next page
+        has_more: Whether page_loader can provide further pages
+        """
+        if not self.virtual:
+            self.load_data(list(self.row_data.values()) + list(data))
+            return
+
+        for item in data:
+            self._store.append(item)
+        self._has_more = has_more
+        self._loading_page = False
+        self._update_buttons(len(self._store) > 0)
+        self._fill_view()
+
+    def apply_changes(self, upserts: List[Dict] = None, deletes: List[str] = None) -> None:
+        """
+        Update only the rows that changed instead of reloading the table.
+
+        Rows are matched by their 'id'. Existing rows are updated in place,
+        new rows are appended, and deleted rows are removed. Selection and
+        scroll position are kept, and odd/even tags are only recomputed
+        below the first deleted row.
+
+        upserts: Rows to insert or update
+        deletes: IDs of rows to remove
+        """
+        upserts = upserts or []
+        deletes = [str(item_id) for item_id in (deletes or [])]
+        selected = self.get_selected_item()
+        first_visible = self.yview()[0]
+
+        # Drop the "no data" placeholder row, if shown
+        for item in self.get_children():
+            if 'message' in self.item(item, 'tags'):
+                self.delete(item)
+
+        if self.virtual:
+            self._apply_virtual(upserts, deletes)
+        else:
+            self._apply_plain(upserts, deletes)
+
+        if selected and self.exists(selected):
+            self.selection_set(selected)
+        self.yview_moveto(first_visible)
+        self._update_buttons(self.row_count > 0)
+
+    def _apply_plain(self, upserts: List[Dict], deletes: List[str]) -> None:
+        """apply_changes() for tables that keep every row in the tree."""
+        retag_from = len(self.get_children())
+        for item_id in deletes:
+            if self.exists(item_id):
+                retag_from = min(retag_from, self.index(item_id))
+                self.delete(item_id)
+            self.row_data.pop(item_id, None)
+
+        for item in upserts:
+            item_id = str(item.get('id', ''))
+            values = [item.get(col['id'], '') for col in self.columns]
+            self.row_data[item_id] = item.copy()
+            if self.exists(item_id):
+                self.item(item_id, values=values)
+            else:
+                position = len(self.get_children())
+                self.insert('', tk.END, iid=item_id, values=values,
+                            tags=('even' if position % 2 == 0 else 'odd',))
+
+        self._retag(retag_from)
+
+    def _apply_virtual(self, upserts: List[Dict], deletes: List[str]) -> None:
+        """apply_changes() for virtual tables: update the store, then the tree."""
+        store = self._store
+        retag_from = len(store)
+        if deletes:
+            retag_from = store.remove(deletes)
+            for item_id in deletes:
+                if self.exists(item_id):
+                    self.delete(item_id)
+            self._materialized = len(self.get_children())
+
+        fully_shown = self._materialized == len(store)
+        for item in upserts:
+            item_id = store.append(item)
+            if self.exists(item_id):
+                self.item(item_id, values=store.values[store.index[item_id]])
+
+        self._retag(retag_from)
+        if fully_shown:
+            # New rows land after the last shown one; show them right away
+            self._materialize(len(store) - self._materialized)
+
+    def _retag(self, start: int) -> None:
+        """Recompute odd/even tags for tree rows from position start on."""
+        children = self.get_children()
+        for i in range(start, len(children)):
+            self.item(children[i], tags=('even' if i % 2 == 0 else 'odd',))
+
+    def _load_virtual(self, data: List[Dict], has_more: bool) -> None:
+        """Replace the row store and insert only the first page into the tree."""
+        self.delete(*self.get_children())
+        self._store.clear()
+        self._materialized = 0
+        self._loading_page = False
+        for item in data:
+            self._store.append(item)
+        self._has_more = has_more
+        self._update_buttons(len(self._store) > 0)
+        self._materialize(self.page_size)
+
+    def _materialize(self, count: int) -> int:
+        """Insert up to count more stored rows into the tree."""
+        store = self._store
+        end = min(self._materialized + count, len(store))
+        for i in range(self._materialized, end):
+            self.insert('', tk.END, iid=store.ids[i], values=store.values[i],
+                        tags=('even' if i % 2 == 0 else 'odd',))
+        inserted = end - self._materialized
+        self._materialized = end
+        return inserted
+
+    def _on_yscroll(self, first, last) -> None:
+        """Scrollbar update; insert the next page when scrolled near the bottom."""
+        self.scrollbar.set(first, last)
+        if self.virtual and float(last) >= 0.9 and not self._fill_pending:
+            # Inserting from inside yscrollcommand would re-enter it
+            self._fill_pending = True
+            self.after_idle(self._fill_view)
+
+    def _fill_view(self) -> None:
+        """Insert the next stored page, or ask page_loader for one."""
+        self._fill_pending = False
+        if self._materialize(self.page_size):
+            return
+        if self._has_more and self.page_loader and not self._loading_page:
+            self._loading_page = True
+            self.page_loader()
+
+    def _update_buttons(self, has_data: bool) -> None:
+        if self.show_buttons:
+            self.edit_button.configure(
+                state="normal" if has_data else "disabled")
+            self.delete_button.configure(
+                state="normal" if has_data else "disabled")
+
+    @property
+    def row_count(self) -> int:
+        """Number of loaded rows, including ones not yet shown."""
+        return len(self._store) if self.virtual else len(self.row_data)
+
     def clear_data(self) -> None:
         """Clear all data from the table."""
         for i in self.get_children():
             self.delete(i)
+        self.row_data = {}
+        self._store.clear()
+        self._materialized = 0
+        self._has_more = False
+        self._loading_page = False
 
         # Disable edit and delete buttons
         if self.show_buttons:
@@ -363,6 +625,9 @@ class DataTable(ttk.Treeview):
 
     def get_row_data(self, item_id: str) -> Optional[Dict[str, Any]]:
         """Get the data for a specific row by ID."""
+        if self.virtual:
+            return self._store.get(item_id)
+
         # Return the stored data for this row if available
         if item_id in self.row_data:
             return self.row_data[item_id]